@@ -2,17 +2,18 @@ import json
 import boto3
 import os
 from botocore.exceptions import ClientError
-from boto3.dynamodb.conditions import Attr
 
 # Initialize DynamoDB client
 dynamodb = boto3.resource('dynamodb')
-users_table = dynamodb.Table('Users')
-notifications_table = dynamodb.Table(os.environ.get('NOTIFICATIONS_TABLE_NAME', 'Notifications'))
+users_table = dynamodb.Table(os.environ.get('USERS_TABLE_NAME', 'Users'))
 
 def lambda_handler(event, context):
     """
     Checks if a user has any unread notifications.
 
+    Reads the UnreadNotifications counter kept on the user item by every
+    notification writer, so the cost does not depend on the Notifications table.
+
     Expected request body:
     {
         "UserId": "some-user-id"
@@ -33,19 +34,18 @@ def lambda_handler(event, context):
         if not user_id:
             return _res(400, {'message': 'Missing "UserId" in request body.'}, cors_headers)
 
-        # Step 1: Validate user exists
-        user_resp = users_table.get_item(Key={"UserId": user_id})
+        # Validate the user exists and read the unread counter in one call
+        user_resp = users_table.get_item(
+            Key={"UserId": user_id},
+            ProjectionExpression="UserId, UnreadNotifications"
+        )
         if 'Item' not in user_resp:
             return _res(404, {'message': f'User {user_id} does not exist.'}, cors_headers)
 
-        # Step 2: Check for unread notifications (IsRead = 0)
-        unread_resp = notifications_table.scan(
-            FilterExpression=Attr('ToUserId').eq(user_id) & Attr('IsRead').eq(0),
-        )
-
-        has_unread = len(unread_resp.get("Items", [])) > 0
+        unread_count = max(int(user_resp['Item'].get('UnreadNotifications', 0)), 0)
+        has_unread = unread_count > 0
 
-        return _res(200, {'hasUnreadNotifications': has_unread}, cors_headers)
+        return _res(200, {'hasUnreadNotifications': has_unread, 'unreadCount': unread_count}, cors_headers)
 
     except ClientError as e:
         print(f"DynamoDB ClientError: {e}")
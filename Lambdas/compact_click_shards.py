@@ -0,0 +1,318 @@
+import os
+import json
+import time
+import boto3
+from types import MappingProxyType
+from botocore.exceptions import ClientError
+
+# --- DynamoDB Table Names & Constants ---
+LINKS_TABLE_NAME = os.environ.get('LINKS_TABLE_NAME', 'Links')
+USERS_TABLE_NAME = os.environ.get('USERS_TABLE_NAME', 'Users')
+CLICK_SHARDS_TABLE_NAME = os.environ.get('CLICK_SHARDS_TABLE_NAME', 'LinkClickShards')
+ACHIEVEMENTS_TABLE_NAME = os.environ.get('ACHIEVEMENTS_TABLE_NAME', 'Achievement')
+ACHIEVEMENT_CATALOG_TTL_SECONDS = float(os.environ.get('ACHIEVEMENT_CATALOG_TTL_SECONDS', '3600'))
+ACHIEVEMENT_QUEUE_URL = os.environ.get('ACHIEVEMENT_QUEUE_URL', '')
+
+# Must match the value used by track_click (may be raised later, never lowered).
+CLICK_COUNTER_SHARDS = int(os.environ.get('CLICK_COUNTER_SHARDS', '10'))
+
+# A fold that loses a race re-reads the link; conflicts and throttling back off
+MAX_FOLD_RETRIES = 3
+RETRYABLE_CANCELLATION_REASONS = {'TransactionConflict', 'ThrottlingError', 'ProvisionedThroughputExceeded'}
+
+# --- Initialize AWS resources ---
+dynamodb = boto3.resource('dynamodb')
+links_table = dynamodb.Table(LINKS_TABLE_NAME)
+click_shards_table = dynamodb.Table(CLICK_SHARDS_TABLE_NAME)
+achievements_table = dynamodb.Table(ACHIEVEMENTS_TABLE_NAME)
+sqs_client = boto3.client('sqs')
+
+# Click milestones (ClickThreshold -> AchId) from the Achievement table, loaded once
+# per warm container and refreshed after the TTL
+_achievement_milestones = {'items': None, 'loaded_at': None}
+
+
+def lambda_handler(event, context):
+    """
+    Folds the sharded click counters written by track_click back into
+    Links.NumberOfClicks (and the owner's Users.NumberOfClicks), and queues a
+    milestone event for every achievement threshold the new total crosses. The
+    thresholds are the ClickThreshold attributes of the Achievement table rows.
+
+    Triggered by the LinkClickShards DynamoDB stream, in which case only the links
+    touched in the batch are compacted. Any other invocation (e.g. an EventBridge
+    schedule) sweeps every link that has shards.
+
+    Each link keeps MilestonesQueued, the click count up to which milestone events
+    are known to be on the queue. It only moves forward once SQS accepted the
+    events, so a failed send is detected again and re-sent by the next compaction
+    or sweep of the link; process_achievement_events ignores duplicates.
+    """
+    # Folding without the thresholds would move the milestone marks past them
+    milestones = _get_achievement_milestones()
+    if milestones is None:
+        raise RuntimeError('Achievement catalog unavailable; not compacting click shards.')
+
+    records = event.get('Records')
+    if records:
+        link_ids = _link_ids_from_stream(records)
+    else:
+        link_ids = _link_ids_from_scan()
+
+    compacted = 0
+    milestone_events = []
+    queued_marks = {}
+    for link_id in link_ids:
+        try:
+            folded, events, clicks = _compact_link(link_id, milestones)
+        except ClientError as e:
+            print(f"Error compacting clicks for link '{link_id}': {e}")
+            continue
+        compacted += folded
+        if events:
+            milestone_events.extend(events)
+            queued_marks[link_id] = clicks
+
+    failed = _send_milestone_events(milestone_events)
+    for link_id, clicks in queued_marks.items():
+        # Stop just below the first milestone that did not make it to the queue
+        failed_milestones = [event['milestone'] for event in failed if event['linkId'] == link_id]
+        _advance_milestone_mark(link_id, min(failed_milestones) - 1 if failed_milestones else clicks)
+
+    print(f"Compacted click shards for {compacted} of {len(link_ids)} link(s), "
+          f"{len(milestone_events)} milestone(s) crossed.")
+    return {
+        'statusCode': 200,
+        'body': json.dumps({
+            'linksChecked': len(link_ids),
+            'linksCompacted': compacted,
+            'milestonesCrossed': len(milestone_events)
+        })
+    }
+
+
+def _link_ids_from_stream(records):
+    """Collects the distinct LinkIds from a batch of shard stream records."""
+    link_ids = set()
+    for record in records:
+        image = record.get('dynamodb', {}).get('NewImage', {})
+        link_id = image.get('LinkId', {}).get('S')
+        if link_id:
+            link_ids.add(link_id)
+    return sorted(link_ids)
+
+
+def _link_ids_from_scan():
+    """Collects the distinct LinkIds of every shard item, following pagination."""
+    link_ids = set()
+    scan_kwargs = {'ProjectionExpression': 'LinkId'}
+    while True:
+        response = click_shards_table.scan(**scan_kwargs)
+        link_ids.update(item['LinkId'] for item in response.get('Items', []) if 'LinkId' in item)
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return sorted(link_ids)
+
+
+def _sum_click_shards(link_id):
+    """
+    Reads every counter shard of a link in one batch and returns the summed clicks.
+    """
+    keys = [{'ShardKey': f"{link_id}#{shard}"} for shard in range(CLICK_COUNTER_SHARDS)]
+    request = {CLICK_SHARDS_TABLE_NAME: {'Keys': keys, 'ProjectionExpression': 'Clicks'}}
+    total = 0
+    while request:
+        response = dynamodb.batch_get_item(RequestItems=request)
+        for item in response.get('Responses', {}).get(CLICK_SHARDS_TABLE_NAME, []):
+            total += int(item.get('Clicks', 0))
+        request = response.get('UnprocessedKeys')
+    return total
+
+
+def _compact_link(link_id, milestones):
+    """
+    Writes the shard total into Links.NumberOfClicks and adds the same number of
+    new clicks to the owner's Users.NumberOfClicks, in one transaction.
+
+    Shards only ever grow, so the fold is idempotent: the link keeps the click count
+    it had before sharding in BaseClicks and NumberOfClicks is always
+    BaseClicks + shard total. The fold is conditioned on the CompactedClicks value
+    it was computed from, so a slow, stale compaction cannot move the count
+    backwards or add its clicks to the owner twice. If the transaction cannot be
+    written the ClientError is raised and neither counter moves; the shards stay
+    ahead of CompactedClicks, so the next compaction or sweep folds them again.
+
+    Returns (folded, events, clicks): whether this call changed the count, the
+    milestone events not queued yet (between MilestonesQueued and the count,
+    including ones an earlier send failed on) and the link's click count.
+    """
+    shard_total = _sum_click_shards(link_id)
+    attempt = 0
+    credit_owner = True
+    while True:
+        link = links_table.get_item(
+            Key={'LinkId': link_id},
+            ProjectionExpression='UserId, #n, NumberOfClicks, BaseClicks, CompactedClicks, MilestonesQueued',
+            ExpressionAttributeNames={'#n': 'Name'},
+            ConsistentRead=True
+        ).get('Item')
+        if not link:
+            return False, [], 0
+        old_clicks = int(link.get('NumberOfClicks', 0))
+        if 'CompactedClicks' in link and int(link['CompactedClicks']) >= shard_total:
+            # Already up to date: only re-check for milestones whose events never
+            # reached the queue.
+            if 'MilestonesQueued' not in link:
+                return False, [], 0
+            return False, _milestone_events(link_id, link, milestones, int(link['MilestonesQueued']), old_clicks), old_clicks
+
+        if 'CompactedClicks' in link:
+            condition = 'attribute_exists(LinkId) AND CompactedClicks = :compacted'
+            values = {':total': shard_total, ':compacted': link['CompactedClicks']}
+        else:
+            condition = 'attribute_exists(LinkId) AND attribute_not_exists(CompactedClicks)'
+            values = {':total': shard_total}
+        new_clicks = int(link.get('BaseClicks', old_clicks)) + shard_total
+        transact_items = [{'Update': {
+            'TableName': LINKS_TABLE_NAME,
+            'Key': {'LinkId': link_id},
+            'UpdateExpression': (
+                'SET NumberOfClicks = if_not_exists(BaseClicks, NumberOfClicks) + :total, '
+                'BaseClicks = if_not_exists(BaseClicks, NumberOfClicks), '
+                'CompactedClicks = :total, '
+                'MilestonesQueued = if_not_exists(MilestonesQueued, NumberOfClicks)'
+            ),
+            'ConditionExpression': condition,
+            'ExpressionAttributeValues': values
+        }}]
+        if credit_owner and link.get('UserId') and new_clicks > old_clicks:
+            transact_items.append({'Update': {
+                'TableName': USERS_TABLE_NAME,
+                'Key': {'UserId': link['UserId']},
+                'UpdateExpression': 'ADD NumberOfClicks :clicks',
+                'ConditionExpression': 'attribute_exists(UserId)',
+                'ExpressionAttributeValues': {':clicks': new_clicks - old_clicks}
+            }})
+
+        try:
+            dynamodb.meta.client.transact_write_items(TransactItems=transact_items)
+            break
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'TransactionCanceledException':
+                raise
+            reasons = [reason.get('Code') for reason in e.response.get('CancellationReasons', [])]
+            attempt += 1
+            if attempt > MAX_FOLD_RETRIES:
+                raise
+            if reasons[1:2] == ['ConditionalCheckFailed']:
+                # The owner's Users item is gone: fold the link without crediting anyone
+                print(f"Owner {link['UserId']} of link '{link_id}' not found; folding without a user credit.")
+                credit_owner = False
+            elif reasons[:1] == ['ConditionalCheckFailed']:
+                # Another compaction moved CompactedClicks first; re-read and re-check
+                continue
+            elif not set(reasons) & RETRYABLE_CANCELLATION_REASONS:
+                raise
+            else:
+                time.sleep(0.05 * 2 ** attempt)
+
+    queued_mark = int(link.get('MilestonesQueued', old_clicks))
+    return True, _milestone_events(link_id, link, milestones, queued_mark, new_clicks), new_clicks
+
+
+def _milestone_events(link_id, link, milestones, queued_mark, clicks):
+    """Milestone events for the thresholds in (queued_mark, clicks]."""
+    owner_id = link.get('UserId')
+    if not owner_id:
+        return []
+    return [
+        {
+            'type': 'milestone',
+            'linkId': link_id,
+            'linkName': link.get('Name', 'N/A'),
+            'userId': owner_id,
+            'achievementId': achievement_id,
+            'milestone': milestone
+        }
+        for milestone, achievement_id in milestones.items()
+        if queued_mark < milestone <= clicks
+    ]
+
+
+def _get_achievement_milestones():
+    """
+    Returns the click milestones as a read-only ClickThreshold -> AchId map,
+    scanning the Achievement table only when the cached copy is missing or older
+    than ACHIEVEMENT_CATALOG_TTL_SECONDS. Rows without a ClickThreshold are not
+    click milestones. If a refresh fails the previous map keeps being served, and
+    None is returned when none was ever loaded.
+    """
+    now = time.monotonic()
+    loaded_at = _achievement_milestones['loaded_at']
+    if loaded_at is not None and now - loaded_at < ACHIEVEMENT_CATALOG_TTL_SECONDS:
+        return _achievement_milestones['items']
+
+    try:
+        items = {}
+        scan_kwargs = {'ProjectionExpression': 'AchId, ClickThreshold'}
+        while True:
+            response = achievements_table.scan(**scan_kwargs)
+            for item in response.get('Items', []):
+                if 'ClickThreshold' in item:
+                    items[int(item['ClickThreshold'])] = item['AchId']
+            if 'LastEvaluatedKey' not in response:
+                break
+            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    except ClientError as e:
+        print(f"Could not load achievement milestones: {e}")
+        return _achievement_milestones['items']
+
+    if not items:
+        print(f"No achievement in {ACHIEVEMENTS_TABLE_NAME} has a ClickThreshold; no milestones will be queued.")
+    _achievement_milestones['items'] = MappingProxyType(dict(sorted(items.items())))
+    _achievement_milestones['loaded_at'] = now
+    return _achievement_milestones['items']
+
+
+def _advance_milestone_mark(link_id, mark):
+    """Moves Links.MilestonesQueued forward to `mark` (never backwards)."""
+    try:
+        links_table.update_item(
+            Key={'LinkId': link_id},
+            UpdateExpression='SET MilestonesQueued = :mark',
+            ConditionExpression='attribute_exists(LinkId) AND MilestonesQueued < :mark',
+            ExpressionAttributeValues={':mark': mark}
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            print(f"Could not advance the milestone mark of link '{link_id}': {e}")
+
+
+def _send_milestone_events(events):
+    """
+    Publishes milestone events to the achievement queue, 10 messages per call.
+    Returns the events that could not be queued.
+    """
+    if not events:
+        return []
+    if not ACHIEVEMENT_QUEUE_URL:
+        print(f"ACHIEVEMENT_QUEUE_URL is not set; keeping {len(events)} milestone event(s) pending.")
+        return list(events)
+
+    failed = []
+    for start in range(0, len(events), 10):
+        chunk = events[start:start + 10]
+        entries = [
+            {'Id': str(index), 'MessageBody': json.dumps(event)}
+            for index, event in enumerate(chunk)
+        ]
+        try:
+            response = sqs_client.send_message_batch(QueueUrl=ACHIEVEMENT_QUEUE_URL, Entries=entries)
+            for failure in response.get('Failed', []):
+                print(f"Failed to queue milestone event {chunk[int(failure['Id'])]}: {failure.get('Message')}")
+                failed.append(chunk[int(failure['Id'])])
+        except ClientError as e:
+            print(f"Error queueing milestone events: {e}")
+            failed.extend(chunk)
+    return failed
@@ -0,0 +1,76 @@
+import os
+import time
+import boto3
+from boto3.dynamodb.conditions import Key, Attr
+from botocore.exceptions import ClientError
+
+# --- DynamoDB Table Names & Constants ---
+NOTIFICATIONS_TABLE_NAME = os.environ.get('NOTIFICATIONS_TABLE_NAME', 'Notifications')
+NOTIFICATIONS_TIME_INDEX_NAME = os.environ.get('NOTIFICATIONS_TIME_INDEX_NAME', 'ToUserId-Timestamp-index')
+MAX_BATCH_RETRIES = 8
+
+dynamodb = boto3.resource('dynamodb')
+notifications_table = dynamodb.Table(NOTIFICATIONS_TABLE_NAME)
+
+
+def lambda_handler(event, context):
+    """
+    Background clean-up for mark_notifications_as_read, invoked asynchronously
+    with {"userId": ..., "readAt": ...}.
+
+    The NotificationsReadAt watermark on the user already makes everything up to
+    readAt read, so this only rewrites the stored IsRead flags to match, in
+    batch_write_item chunks of 25. Pending friend requests are left alone so a
+    full-item put can never overwrite a concurrent accept/reject.
+    """
+    user_id = event.get('userId')
+    read_at = event.get('readAt')
+    if not user_id or not read_at:
+        print(f"Ignoring compaction request without userId/readAt: {event}")
+        return {'compacted': 0}
+
+    query_kwargs = {
+        'IndexName': NOTIFICATIONS_TIME_INDEX_NAME,
+        'KeyConditionExpression': Key('ToUserId').eq(user_id) & Key('Timestamp').lte(read_at),
+        'FilterExpression': (
+            Attr('IsRead').eq(0)
+            & (Attr('Status').not_exists() | Attr('Status').ne('pending'))
+        )
+    }
+
+    compacted = 0
+    failed = 0
+    while True:
+        response = notifications_table.query(**query_kwargs)
+        items = response.get('Items', [])
+        for item in items:
+            item['IsRead'] = 1
+        for start in range(0, len(items), 25):
+            written = _batch_put(items[start:start + 25])
+            compacted += written
+            failed += len(items[start:start + 25]) - written
+        if 'LastEvaluatedKey' not in response:
+            break
+        query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    print(f"Rewrote IsRead on {compacted} notification(s) for {user_id} ({failed} left for the next run).")
+    return {'compacted': compacted, 'failed': failed}
+
+
+def _batch_put(items):
+    """
+    Writes up to 25 items, retrying UnprocessedItems with exponential backoff.
+    Returns how many were written.
+    """
+    request = {NOTIFICATIONS_TABLE_NAME: [{'PutRequest': {'Item': item}} for item in items]}
+    attempt = 0
+    try:
+        while request and attempt <= MAX_BATCH_RETRIES:
+            if attempt:
+                time.sleep(min(0.05 * 2 ** attempt, 2))
+            request = dynamodb.batch_write_item(RequestItems=request).get('UnprocessedItems')
+            attempt += 1
+    except ClientError as e:
+        print(f"Error writing notification batch: {e}")
+        return 0
+    return len(items) - len((request or {}).get(NOTIFICATIONS_TABLE_NAME, []))
@@ -1,12 +1,17 @@
 import os
 import json
 import boto3
+import zlib
 from botocore.exceptions import ClientError
 
 # --- Initialize DynamoDB ---
 dynamodb = boto3.resource('dynamodb')
 TABLE_NAME = os.environ.get('LINKS_TABLE_NAME', 'Links') # Corrected ENV var name for consistency
 links_table = dynamodb.Table(TABLE_NAME)
+CACHE_STAMPS_TABLE_NAME = os.environ.get('CACHE_STAMPS_TABLE_NAME', 'CacheStamps')
+cache_stamps_table = dynamodb.Table(CACHE_STAMPS_TABLE_NAME)
+USERS_TABLE_NAME = os.environ.get('USERS_TABLE_NAME', 'Users')
+users_table = dynamodb.Table(USERS_TABLE_NAME)
 
 def _make_response(status_code, body):
     """
@@ -23,6 +28,41 @@ def _make_response(status_code, body):
         'body': json.dumps(body)
     }
 
+# Copied verbatim into each link writer (delete_link, restore_link, set_link_password,
+# remove_link_password, toggle_link_privacy): they deploy as single files without a
+# shared layer. track_click's _link_cache_bucket must hash the same way, and
+# LINK_CACHE_STAMP_BUCKETS must have the same value in all six functions.
+LINK_CACHE_STAMP_BUCKETS = int(os.environ.get('LINK_CACHE_STAMP_BUCKETS', '64'))
+
+def _bump_links_cache_stamp(link_id):
+    """
+    Bumps the version of the link's bucket on the Links cache stamp, so warm
+    track_click containers drop the cached links in that bucket (this one and about
+    1/LINK_CACHE_STAMP_BUCKETS of the others) instead of their whole cache.
+    """
+    bucket = zlib.crc32(link_id.encode()) % LINK_CACHE_STAMP_BUCKETS
+    try:
+        cache_stamps_table.update_item(
+            Key={'StampId': 'Links'},
+            UpdateExpression='ADD #bucket :one',
+            ExpressionAttributeNames={'#bucket': f"B{bucket}"},
+            ExpressionAttributeValues={':one': 1}
+        )
+    except ClientError as e:
+        print(f"Could not bump links cache stamp: {e}")
+
+def _adjust_active_links(user_id, delta):
+    """ADDs delta to the owner's Users.ActiveLinks counter (errors are only logged)."""
+    try:
+        users_table.update_item(
+            Key={'UserId': user_id},
+            UpdateExpression='ADD ActiveLinks :delta',
+            ConditionExpression='attribute_exists(UserId)',
+            ExpressionAttributeValues={':delta': delta}
+        )
+    except ClientError as e:
+        print(f"Could not update ActiveLinks for user {user_id}: {e}")
+
 def lambda_handler(event, context):
     """
     AWS Lambda entry point: deactivates a link by setting its IsActive flag to False.
@@ -44,11 +84,12 @@ def lambda_handler(event, context):
 
     try:
         # 2. Perform update: set IsActive to False, only if the item exists
-        links_table.update_item(
+        response = links_table.update_item(
             Key={'LinkId': link_id},
             UpdateExpression='SET IsActive = :false_val',
             ExpressionAttributeValues={':false_val': False},
-            ConditionExpression='attribute_exists(LinkId)'
+            ConditionExpression='attribute_exists(LinkId)',
+            ReturnValues='ALL_OLD'
         )
     except ClientError as e:
         error_code = e.response['Error']['Code']
@@ -60,6 +101,13 @@ def lambda_handler(event, context):
         print(f"DynamoDB Error: {e.response['Error']['Message']}")
         return _make_response(500, {'error': 'Unable to deactivate link.'})
 
+    _bump_links_cache_stamp(link_id)
+
+    # Only an actual active -> inactive change moves the owner's counter
+    old_link = response.get('Attributes', {})
+    if old_link.get('IsActive', True) and old_link.get('UserId'):
+        _adjust_active_links(old_link['UserId'], -1)
+
     # 3. Return success response
     return _make_response(200, {'message': 'Link deactivated successfully.'})
 
@@ -0,0 +1,136 @@
+import os
+import json
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+import boto3
+from botocore.exceptions import ClientError
+
+# --- DynamoDB Table Names ---
+NOTIFICATION_DIGESTS_TABLE_NAME = os.environ.get('NOTIFICATION_DIGESTS_TABLE_NAME', 'NotificationDigests')
+USERS_TABLE_NAME = os.environ.get('USERS_TABLE_NAME', 'Users')
+
+dynamodb = boto3.resource('dynamodb')
+digests_table = dynamodb.Table(NOTIFICATION_DIGESTS_TABLE_NAME)
+users_table = dynamodb.Table(USERS_TABLE_NAME)
+
+
+def lambda_handler(event, context):
+    """
+    Folds notifications removed by DynamoDB TTL into one small digest item per
+    user in NotificationDigests (partition key UserId), so the history keeps
+    "how many of each kind" after the items themselves are gone.
+
+    Triggered by the Notifications table stream (OLD_IMAGE or NEW_AND_OLD_IMAGES).
+    Only REMOVE records made by the TTL service are counted; deletions by the
+    application are ignored. Each digest gets flat counters named
+    Expired_<type> plus ExpiredUnread and LastExpiredAt.
+
+    A notification that expires unread also leaves the recipient's
+    Users.UnreadNotifications counter, unless the NotificationsReadAt watermark
+    already counts it as read.
+    """
+    counts = defaultdict(Counter)
+    expired_unread = []
+    for record in event.get('Records', []):
+        if record.get('eventName') != 'REMOVE' or not _is_ttl_removal(record):
+            continue
+        image = record.get('dynamodb', {}).get('OldImage', {})
+        user_id = image.get('ToUserId', {}).get('S')
+        if not user_id:
+            continue
+        counts[user_id][f"Expired_{_notification_type(image)}"] += 1
+        if image.get('IsRead', {}).get('N', '0') == '0':
+            counts[user_id]['ExpiredUnread'] += 1
+            timestamp = image.get('Timestamp', {}).get('S')
+            if timestamp:
+                expired_unread.append((user_id, timestamp))
+
+    failed = 0
+    for user_id, user_counts in counts.items():
+        try:
+            _add_to_digest(user_id, user_counts)
+        except ClientError as e:
+            print(f"Error updating notification digest for {user_id}: {e}")
+            failed += 1
+
+    decremented = 0
+    decrement_failed = 0
+    for user_id, timestamp in expired_unread:
+        try:
+            decremented += _decrement_unread(user_id, timestamp)
+        except ClientError as e:
+            print(f"Error decrementing unread notifications for {user_id}: {e}")
+            decrement_failed += 1
+
+    # Failures are only logged: retrying the whole batch would double-count the
+    # users whose digests or counters were already updated. The digest is
+    # informational, and the counter is reset when the user marks all as read.
+    print(f"Folded expired notifications into {len(counts) - failed} digest(s) ({failed} failed), "
+          f"decremented {decremented} unread counter(s) ({decrement_failed} failed).")
+    return {'statusCode': 200, 'body': json.dumps({'digestsUpdated': len(counts)})}
+
+
+def _is_ttl_removal(record):
+    identity = record.get('userIdentity') or {}
+    return identity.get('type') == 'Service' and identity.get('principalId') == 'dynamodb.amazonaws.com'
+
+
+def _notification_type(image):
+    """
+    Returns the stored Type, or infers it for notifications written before the
+    Type attribute existed.
+    """
+    stored = image.get('Type', {}).get('S')
+    if stored:
+        return stored
+    text = image.get('Text', {}).get('S', '')
+    if text.endswith('wants to be friends.'):
+        return 'friend_request'
+    if text.endswith('your friend request.'):
+        return 'friend_response'
+    if 'achievement' in text:
+        return 'achievement'
+    return 'general'
+
+
+def _decrement_unread(user_id, notif_timestamp):
+    """
+    Takes one expired unread notification off the user's UnreadNotifications.
+    The condition on NotificationsReadAt makes this a no-op when the notification
+    is older than the read watermark (already counted as read). Returns 1 if the
+    counter was decremented, else 0.
+    """
+    try:
+        users_table.update_item(
+            Key={'UserId': user_id},
+            UpdateExpression='ADD UnreadNotifications :minus_one',
+            ConditionExpression=(
+                'UnreadNotifications > :zero AND '
+                '(attribute_not_exists(NotificationsReadAt) OR NotificationsReadAt < :ts)'
+            ),
+            ExpressionAttributeValues={':minus_one': -1, ':zero': 0, ':ts': notif_timestamp}
+        )
+    except ClientError as e:
+        # Already counted as read by the watermark, or the counter is already zero
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        return 0
+    return 1
+
+
+def _add_to_digest(user_id, user_counts):
+    """ADDs one batch's counts to the user's digest item, creating it if needed."""
+    names = {}
+    values = {':now': datetime.now(timezone.utc).isoformat()}
+    additions = []
+    for index, (counter_name, count) in enumerate(sorted(user_counts.items())):
+        names[f"#c{index}"] = counter_name
+        values[f":c{index}"] = count
+        additions.append(f"#c{index} :c{index}")
+
+    digests_table.update_item(
+        Key={'UserId': user_id},
+        UpdateExpression=f"SET LastExpiredAt = :now ADD {', '.join(additions)}",
+        ExpressionAttributeNames=names,
+        ExpressionAttributeValues=values
+    )
@@ -1,31 +1,51 @@
+import os
 import json
+import time
+import base64
 import boto3
+from concurrent.futures import ThreadPoolExecutor
+from boto3.dynamodb.conditions import Key
 
 dynamodb = boto3.resource('dynamodb')
-user_table = dynamodb.Table("Users")
+USERS_TABLE_NAME = "Users"
+user_table = dynamodb.Table(USERS_TABLE_NAME)
+user_edges_table = dynamodb.Table(os.environ.get("USER_EDGES_TABLE_NAME", "UserEdges"))
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+BATCH_GET_LIMIT = 100  # DynamoDB's per-request key limit for batch_get_item
+HYDRATION_WORKERS = 5
 
 def lambda_handler(event, context):
     try:
         body = json.loads(event.get("body", "{}"))
         user_id = body.get("UserId")
-
         if not user_id:
             return _res(400, "Missing UserId.")
 
+        # Without a pageSize every friend is returned (older clients do not follow nextCursor)
+        try:
+            page_size = _parse_page_size(body["pageSize"]) if "pageSize" in body else None
+            start_key = _decode_cursor(body["cursor"], user_id) if body.get("cursor") else None
+        except (TypeError, ValueError) as e:
+            return _res(400, f"Invalid paging parameters: {e}")
+        if start_key and not page_size:
+            page_size = DEFAULT_PAGE_SIZE
+
         # Get the requesting user
         resp = user_table.get_item(Key={"UserId": user_id})
         user = resp.get("Item")
         if not user or user.get("IsActive") != True:
             return _res(403, "User not found or inactive.")
 
-        # Parse friend list
-        raw_friends = user.get("Friends", "")
-        friend_ids = json.loads(raw_friends) if raw_friends else []
+        # Read one page (or all) of the user's friend edges
+        friend_ids, next_cursor = _get_friend_ids_page(user_id, page_size, start_key)
+
+        friends = _batch_get_users(friend_ids, "UserId, FullName, Email, IsActive")
 
         results = []
         for fid in friend_ids:
-            f_resp = user_table.get_item(Key={"UserId": fid})
-            f_user = f_resp.get("Item")
+            f_user = friends.get(fid)
             if f_user and f_user.get("IsActive") == True:
                 results.append({
                     "UserId": f_user["UserId"],
@@ -33,15 +53,96 @@ def lambda_handler(event, context):
                     "Email": f_user.get("Email", "")
                 })
 
-        return _res(200, results)
+        return _res(200, results, next_cursor)
 
     except Exception as e:
         return _res(500, str(e))
 
 
-def _res(status, body):
+def _get_friend_ids_page(user_id, page_size, start_key=None):
+    """
+    Returns (friend_ids, next_cursor) for one page of the user's FRIEND# edges, or
+    for all of them when page_size is None. The cursor is an opaque token
+    wrapping DynamoDB's LastEvaluatedKey.
+    """
+    query_kwargs = {
+        "KeyConditionExpression": Key("UserId").eq(user_id) & Key("EdgeKey").begins_with("FRIEND#"),
+        "ProjectionExpression": "TargetId"
+    }
+    if page_size:
+        query_kwargs["Limit"] = page_size
+    if start_key:
+        query_kwargs["ExclusiveStartKey"] = start_key
+    friend_ids = []
+    while True:
+        resp = user_edges_table.query(**query_kwargs)
+        friend_ids.extend(edge["TargetId"] for edge in resp.get("Items", []))
+        last_key = resp.get("LastEvaluatedKey")
+        if page_size or not last_key:
+            break
+        query_kwargs["ExclusiveStartKey"] = last_key
+    next_cursor = base64.urlsafe_b64encode(json.dumps(last_key).encode()).decode() if last_key else None
+    return friend_ids, next_cursor
+
+
+def _parse_page_size(value):
+    page_size = int(value)
+    if page_size <= 0:
+        raise ValueError("pageSize must be a positive integer")
+    return min(page_size, MAX_PAGE_SIZE)
+
+
+def _decode_cursor(cursor, user_id):
+    """
+    Decodes a nextCursor from an earlier page back into the ExclusiveStartKey.
+    Raises ValueError if it is malformed or belongs to another user's list.
+    """
+    try:
+        start_key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (AttributeError, ValueError):
+        raise ValueError("cursor is not a valid nextCursor")
+    if (not isinstance(start_key, dict) or set(start_key) != {"UserId", "EdgeKey"}
+            or start_key["UserId"] != user_id or not str(start_key["EdgeKey"]).startswith("FRIEND#")):
+        raise ValueError("cursor is not a valid nextCursor")
+    return start_key
+
+
+def _batch_get_users(user_ids, projection):
+    """
+    Fetches the given users with batch_get_item, 100 keys per request, running the
+    chunks concurrently and retrying UnprocessedKeys with exponential backoff.
+    Returns a dict of UserId -> item containing only the projected attributes.
+    """
+    unique_ids = list(dict.fromkeys(user_ids))
+    chunks = [unique_ids[i:i + BATCH_GET_LIMIT] for i in range(0, len(unique_ids), BATCH_GET_LIMIT)]
+    if not chunks:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(len(chunks), HYDRATION_WORKERS)) as executor:
+        results = executor.map(lambda chunk: _batch_get_chunk(chunk, projection), chunks)
+        return {item["UserId"]: item for items in results for item in items}
+
+
+def _batch_get_chunk(user_ids, projection):
+    request = {USERS_TABLE_NAME: {
+        "Keys": [{"UserId": uid} for uid in user_ids],
+        "ProjectionExpression": projection
+    }}
+    items = []
+    attempt = 0
+    while request:
+        # The low-level client is thread-safe, unlike Table resources.
+        resp = dynamodb.meta.client.batch_get_item(RequestItems=request)
+        items.extend(resp.get("Responses", {}).get(USERS_TABLE_NAME, []))
+        request = resp.get("UnprocessedKeys")
+        if request:
+            attempt += 1
+            time.sleep(min(0.05 * 2 ** attempt, 1))
+    return items
+
+
+def _res(status, body, next_cursor=None):
     return {
         "statusCode": status,
         "headers": {"Content-Type": "application/json"},
-        "body": json.dumps({"data": body} if isinstance(body, list) else {"message": body})
+        "body": json.dumps({"data": body, "nextCursor": next_cursor} if isinstance(body, list) else {"message": body})
     }
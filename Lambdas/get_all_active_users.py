@@ -13,12 +13,23 @@ def lambda_handler(event, context):
     }
 
     try:
-        # Scan for users where IsActive == true (boolean, not string)
+        # Scan for users where IsActive == true (boolean, not string), reading only
+        # what the user cards show. The link count is the ActiveLinks counter kept
+        # by the link writers (see reconcile-user-counters.py).
         response = users_table.scan(
-            FilterExpression=Attr('IsActive').eq(True)
+            FilterExpression=Attr('IsActive').eq(True),
+            ProjectionExpression='UserId, Username, Picture, ActiveLinks'
         )
 
-        active_users = response.get("Items", [])
+        active_users = [
+            {
+                'UserId': u.get('UserId'),
+                'Username': u.get('Username'),
+                'Picture': u.get('Picture'),
+                'ActiveLinks': max(int(u.get('ActiveLinks', 0)), 0)
+            }
+            for u in response.get("Items", [])
+        ]
 
         return {
             'statusCode': 200,
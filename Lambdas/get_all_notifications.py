@@ -1,16 +1,28 @@
 import json
 import boto3
 import os
+import time
+import base64
 import traceback
 from datetime import datetime, timedelta, timezone
-from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.conditions import Key, Attr
 from decimal import Decimal
 
 # DynamoDB setup
 dynamodb = boto3.resource("dynamodb")
 notifications_table = dynamodb.Table(os.environ.get("NOTIFICATIONS_TABLE_NAME", "Notifications"))
-users_table = dynamodb.Table(os.environ.get("USERS_TABLE_NAME", "Users"))
-TOUSERID_INDEX_NAME = os.environ.get("TOUSERID_INDEX_NAME", "ToUserId-index")
+USERS_TABLE_NAME = os.environ.get("USERS_TABLE_NAME", "Users")
+users_table = dynamodb.Table(USERS_TABLE_NAME)
+# GSI with partition key ToUserId and sort key Timestamp
+NOTIFICATIONS_TIME_INDEX_NAME = os.environ.get("NOTIFICATIONS_TIME_INDEX_NAME", "ToUserId-Timestamp-index")
+
+DEFAULT_PAGE_SIZE = int(os.environ.get("DEFAULT_NOTIFICATIONS_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.environ.get("MAX_NOTIFICATIONS_PAGE_SIZE", "200"))
+
+# Sender profiles (Username/Picture) cached per warm container
+PROFILE_CACHE_TTL_SECONDS = float(os.environ.get("PROFILE_CACHE_TTL_SECONDS", "300"))
+PROFILE_CACHE_MAX_ENTRIES = int(os.environ.get("PROFILE_CACHE_MAX_ENTRIES", "2000"))
+_profile_cache = {}
 
 CORS_HEADERS = {
     "Content-Type": "application/json",
@@ -35,50 +47,151 @@ def lambda_handler(event, context):
     try:
         body = json.loads(event.get("body", "{}"))
         user_id = body.get("userId")
+        page_size = max(1, min(int(body.get("pageSize", DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE))
+        start_key = _decode_cursor(body.get("cursor"))
+    except (ValueError, TypeError):
+        return _res(400, {"message": "Invalid request body."})
 
-        if not user_id:
-            return _res(400, {"message": "Missing 'userId' in request body."})
+    if not user_id:
+        return _res(400, {"message": "Missing 'userId' in request body."})
 
-        seven_days_ago = datetime.now(timezone.utc) - timedelta(days=7)
-        seven_days_ago_str = seven_days_ago.isoformat()
+    try:
+        # Everything at or before the user's read watermark counts as read
+        user = users_table.get_item(
+            Key={"UserId": user_id},
+            ProjectionExpression="NotificationsReadAt"
+        ).get("Item", {})
+        read_at = user.get("NotificationsReadAt", "")
 
-        response = notifications_table.query(
-            IndexName=TOUSERID_INDEX_NAME,
-            KeyConditionExpression=Key("ToUserId").eq(user_id)
-        )
-        notifications = response.get("Items", [])
+        notifications, next_cursor = _get_unread_page(user_id, read_at, page_size, start_key)
 
         friend_requests = []
         other_notifications = []
-
         for notif in notifications:
-            if notif.get("IsRead") == 0:
-                if notif.get("Status") == "pending":
-                    # Fetch the sender's username
-                    sender_id = notif.get("FromUserId")
-                    try:
-                        sender = users_table.get_item(Key={"UserId": sender_id}).get("Item", {})
-                        notif["Username"] = sender.get("Username", "Unknown")
-                        notif["Picture"] = sender.get("Picture", "Unknown")
-                    except Exception as e:
-                        print(f"[WARN] Failed to fetch Username for {sender_id}: {e}")
-                        notif["Username"] = "Unknown"
-                        notif["Picture"] = "Unknown"
-
-                    friend_requests.append(notif)
-
-                elif notif.get("Timestamp", "") > seven_days_ago_str and notif.get("Status") in (None, "accepted", "rejected"):
-                    other_notifications.append(notif)
+            if notif.get("Status") == "pending":
+                friend_requests.append(notif)
+            else:
+                other_notifications.append(notif)
+
+        # Answers to the user's own requests are stored as "{username} accepted ..."
+        answers = [notif for notif in other_notifications if "{username}" in notif.get("Text", "")]
+
+        # Fetch the senders' Username/Picture in one batch
+        senders = _get_sender_profiles({notif.get("FromUserId") for notif in friend_requests + answers})
+        for notif in friend_requests:
+            sender = senders.get(notif.get("FromUserId"), {})
+            notif["Username"] = sender.get("Username", "Unknown")
+            notif["Picture"] = sender.get("Picture", "Unknown")
+        for notif in answers:
+            sender = senders.get(notif.get("FromUserId"), {})
+            notif["Text"] = notif["Text"].replace("{username}", sender.get("Username", "Someone"))
 
         return _res(200, {
             "friendRequests": friend_requests,
-            "otherNotifications": other_notifications
+            "otherNotifications": other_notifications,
+            "nextCursor": next_cursor
         })
 
     except Exception:
         print("[ERROR]", traceback.format_exc())
         return _res(500, {"message": "Unexpected server error."})
 
+def _get_unread_page(user_id, read_at, page_size, start_key=None):
+    """
+    Returns (notifications, next_cursor) for one page of the user's unread
+    notifications, newest first.
+
+    Only the part of the time index after the read watermark is queried. Pending
+    friend requests are returned whatever their age; other notifications only
+    from the last 7 days. As with any filtered query the page is refilled with
+    the remaining size until it is full or the range is exhausted.
+    """
+    key_condition = Key("ToUserId").eq(user_id)
+    if read_at:
+        key_condition = key_condition & Key("Timestamp").gt(read_at)
+
+    seven_days_ago_str = (datetime.now(timezone.utc) - timedelta(days=7)).isoformat()
+    recent_answer = (
+        Attr("Timestamp").gt(seven_days_ago_str)
+        & (Attr("Status").not_exists() | Attr("Status").is_in(["accepted", "rejected"]))
+    )
+    query_kwargs = {
+        "IndexName": NOTIFICATIONS_TIME_INDEX_NAME,
+        "KeyConditionExpression": key_condition,
+        "FilterExpression": (
+            Attr("IsRead").eq(0)
+            & (Attr("Status").eq("pending") | recent_answer)
+            # TTL deletes lazily, so hide items that are already past ExpiresAt
+            & (Attr("ExpiresAt").not_exists() | Attr("ExpiresAt").gt(int(time.time())))
+        ),
+        "ScanIndexForward": False
+    }
+
+    notifications = []
+    while True:
+        if start_key:
+            query_kwargs["ExclusiveStartKey"] = start_key
+        query_kwargs["Limit"] = page_size - len(notifications)
+        response = notifications_table.query(**query_kwargs)
+        notifications.extend(response.get("Items", []))
+        start_key = response.get("LastEvaluatedKey")
+        if not start_key or len(notifications) >= page_size:
+            break
+
+    return notifications, _encode_cursor(start_key)
+
+def _get_sender_profiles(user_ids):
+    """
+    Returns {UserId: {"Username", "Picture"}} for the given users, serving warm
+    entries from the container cache and batch-reading the rest (100 keys per call).
+    """
+    now = time.monotonic()
+    profiles = {}
+    missing = []
+    for user_id in filter(None, user_ids):
+        cached = _profile_cache.get(user_id)
+        if cached and now - cached[1] < PROFILE_CACHE_TTL_SECONDS:
+            profiles[user_id] = cached[0]
+        else:
+            missing.append(user_id)
+
+    for start in range(0, len(missing), 100):
+        request = {USERS_TABLE_NAME: {
+            "Keys": [{"UserId": user_id} for user_id in missing[start:start + 100]],
+            "ProjectionExpression": "UserId, Username, Picture"
+        }}
+        attempt = 0
+        while request:
+            try:
+                response = dynamodb.batch_get_item(RequestItems=request)
+            except Exception as e:
+                print(f"[WARN] Failed to fetch sender profiles: {e}")
+                break
+            for item in response.get("Responses", {}).get(USERS_TABLE_NAME, []):
+                profiles[item["UserId"]] = item
+                _profile_cache[item["UserId"]] = (item, now)
+            request = response.get("UnprocessedKeys")
+            if request:
+                attempt += 1
+                time.sleep(min(0.05 * 2 ** attempt, 1))
+
+    if len(_profile_cache) > PROFILE_CACHE_MAX_ENTRIES:
+        _profile_cache.clear()
+    return profiles
+
+def _encode_cursor(last_evaluated_key):
+    if not last_evaluated_key:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(last_evaluated_key, default=_decimal_default).encode()).decode()
+
+def _decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor.")
+
 def _res(status, body):
     return {
         "statusCode": status,
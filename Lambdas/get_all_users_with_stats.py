@@ -36,10 +36,16 @@ def lambda_handler(event, context):
 
     user_id = body.get('userId')
 
-    # Fetch all users
+    # Fetch all users, following pagination
     try:
-        users_response = users_table.scan()
-        users = users_response.get('Items', [])
+        users = []
+        scan_kwargs = {}
+        while True:
+            users_response = users_table.scan(**scan_kwargs)
+            users.extend(users_response.get('Items', []))
+            if 'LastEvaluatedKey' not in users_response:
+                break
+            scan_kwargs['ExclusiveStartKey'] = users_response['LastEvaluatedKey']
     except Exception as e:
         return {
             'statusCode': 500,
@@ -63,7 +69,8 @@ def lambda_handler(event, context):
                 'body': json.dumps({'message': f'Error querying links: {str(e)}'})
             }
 
-    # Map user data
+    # Map user data; the totals are counters kept on the Users item by the click
+    # and link/achievement paths (see reconcile-user-counters.py)
     users_data = [
         {
             'userId': u.get('UserId', ''),
@@ -71,7 +78,9 @@ def lambda_handler(event, context):
             'fullName': u.get('FullName', ''),
             'country': u.get('Country', ''),
             'dateJoined': u.get('DateJoined', ''),
-            'totalClicks': u.get('NumberOfClicks', 0),
+            'totalClicks': int(u.get('NumberOfClicks', 0)),
+            'activeLinks': max(int(u.get('ActiveLinks', 0)), 0),
+            'achievementCount': int(u.get('AchievementCount', 0)),
             'active': u.get('IsActive', False)
         }
         for u in users
@@ -1,7 +1,10 @@
 import json
 import boto3
 import os
+import math
 from collections import Counter
+from datetime import datetime, timedelta, timezone
+from boto3.dynamodb.conditions import Key
 from botocore.exceptions import ClientError
 import decimal
 
@@ -10,7 +13,21 @@ dynamodb = boto3.resource('dynamodb')
 
 # Use environment variables for table names
 LINKS_TABLE_NAME = os.environ.get('LINKS_TABLE_NAME', 'Links')
-LINK_CLICKS_TABLE_NAME = os.environ.get('LINK_CLICKS_TABLE_NAME', 'LinkClicks')
+CLICK_ROLLUPS_TABLE_NAME = os.environ.get('CLICK_ROLLUPS_TABLE_NAME', 'LinkClickRollups')
+CLICK_SHARDS_TABLE_NAME = os.environ.get('CLICK_SHARDS_TABLE_NAME', 'LinkClickShards')
+
+# Must match the value used by track_click (may be raised later, never lowered).
+CLICK_COUNTER_SHARDS = int(os.environ.get('CLICK_COUNTER_SHARDS', '10'))
+
+# Click analytics come from the rollups written by rollup_link_clicks.
+# Bucket sort keys are "H#YYYY-MM-DDTHH" and "D#YYYY-MM-DD".
+GRANULARITY_PREFIXES = {'hour': ('H#', 13), 'day': ('D#', 10)}
+DEFAULT_RANGE_DAYS = 30
+MAX_BUCKETS = {'hour': 24 * 31, 'day': 366}
+
+# Daily HyperLogLog visitor sketches ("U#YYYY-MM-DD"), 2^13 registers each.
+HLL_PRECISION = 13
+HLL_REGISTERS = 1 << HLL_PRECISION
 
 # Helper for JSON serialization of DynamoDB's Decimal type
 class DecimalEncoder(json.JSONEncoder):
@@ -33,10 +50,123 @@ def _make_response(status_code, body):
         'body': json.dumps(body, cls=DecimalEncoder)
     }
 
+def _get_live_click_count(link_details):
+    """
+    Returns the up-to-date click total: the clicks the link had before sharding
+    plus every counter shard, including clicks not yet compacted into NumberOfClicks.
+    """
+    link_id = link_details['LinkId']
+    base_clicks = int(link_details.get('BaseClicks', link_details.get('NumberOfClicks', 0)))
+    keys = [{'ShardKey': f"{link_id}#{shard}"} for shard in range(CLICK_COUNTER_SHARDS)]
+    request = {CLICK_SHARDS_TABLE_NAME: {'Keys': keys, 'ProjectionExpression': 'Clicks'}}
+    shard_total = 0
+    while request:
+        response = dynamodb.batch_get_item(RequestItems=request)
+        for item in response.get('Responses', {}).get(CLICK_SHARDS_TABLE_NAME, []):
+            shard_total += int(item.get('Clicks', 0))
+        request = response.get('UnprocessedKeys')
+    return base_clicks + shard_total
+
+def _parse_range(body):
+    """
+    Returns (granularity, from, to) from the optional "granularity" ("hour" or
+    "day"), "from" and "to" (ISO 8601) fields. Defaults to the last 30 days;
+    ranges longer than MAX_BUCKETS are cut at "from" + MAX_BUCKETS.
+    Raises ValueError on bad input.
+    """
+    granularity = body.get('granularity', 'day')
+    if granularity not in GRANULARITY_PREFIXES:
+        raise ValueError('"granularity" must be "hour" or "day".')
+
+    def parse(value, default):
+        if not value:
+            return default
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        return parsed.astimezone(timezone.utc) if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+    range_to = parse(body.get('to'), datetime.now(timezone.utc))
+    range_from = parse(body.get('from'), range_to - timedelta(days=DEFAULT_RANGE_DAYS))
+    if range_from > range_to:
+        raise ValueError('"from" must not be after "to".')
+
+    step = timedelta(hours=1) if granularity == 'hour' else timedelta(days=1)
+    range_to = min(range_to, range_from + step * (MAX_BUCKETS[granularity] - 1))
+    return granularity, range_from, range_to
+
+def _get_click_rollups(link_id, granularity, range_from, range_to):
+    """
+    Sums the link's rollup buckets in [from, to] with one paginated range query.
+    Returns (series, by_country, by_referrer, by_device); the cost is one read
+    per bucket, whatever the number of clicks.
+    """
+    prefix, key_length = GRANULARITY_PREFIXES[granularity]
+    rollups_table = dynamodb.Table(CLICK_ROLLUPS_TABLE_NAME)
+    query_kwargs = {
+        'KeyConditionExpression': Key('LinkId').eq(link_id) & Key('Bucket').between(
+            prefix + range_from.isoformat()[:key_length],
+            prefix + range_to.isoformat()[:key_length]
+        )
+    }
+
+    series = []
+    by_dimension = {'country': Counter(), 'ref': Counter(), 'ua': Counter()}
+    while True:
+        response = rollups_table.query(**query_kwargs)
+        for item in response.get('Items', []):
+            series.append({'bucket': item['Bucket'][len(prefix):], 'clicks': int(item.get('Clicks', 0))})
+            for name, value in item.items():
+                dimension, _, dimension_value = name.partition(':')
+                if dimension in by_dimension and dimension_value:
+                    by_dimension[dimension][dimension_value] += int(value)
+        if 'LastEvaluatedKey' not in response:
+            break
+        query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    return series, dict(by_dimension['country']), dict(by_dimension['ref']), dict(by_dimension['ua'])
+
+def _get_unique_visitors(link_id, range_from, range_to):
+    """
+    Estimates distinct visitors in [from, to] by merging the daily HyperLogLog
+    sketches (register-wise max) and applying the standard estimator with the
+    small-range (linear counting) correction. Hourly ranges use whole days.
+    """
+    rollups_table = dynamodb.Table(CLICK_ROLLUPS_TABLE_NAME)
+    query_kwargs = {
+        'KeyConditionExpression': Key('LinkId').eq(link_id) & Key('Bucket').between(
+            'U#' + range_from.isoformat()[:10],
+            'U#' + range_to.isoformat()[:10]
+        ),
+        'ProjectionExpression': 'Visitors'
+    }
+
+    merged = bytearray(HLL_REGISTERS)
+    while True:
+        response = rollups_table.query(**query_kwargs)
+        for item in response.get('Items', []):
+            registers = bytes(item['Visitors']) if 'Visitors' in item else b''
+            if len(registers) == HLL_REGISTERS:
+                merged = bytearray(map(max, merged, registers))
+        if 'LastEvaluatedKey' not in response:
+            break
+        query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    zeros = merged.count(0)
+    if zeros == HLL_REGISTERS:
+        return 0
+    alpha = 0.7213 / (1 + 1.079 / HLL_REGISTERS)
+    estimate = alpha * HLL_REGISTERS ** 2 / sum(2.0 ** -register for register in merged)
+    if estimate <= 2.5 * HLL_REGISTERS and zeros:
+        estimate = HLL_REGISTERS * math.log(HLL_REGISTERS / zeros)
+    return round(estimate)
+
 def lambda_handler(event, context):
     """
     Fetches comprehensive details for a given link, including its properties
-    and aggregated click statistics by country.
+    and aggregated click statistics by country, referrer and device plus an
+    estimate of unique visitors.
+
+    Optional body fields select the statistics window: "granularity" ("hour" or
+    "day", default "day") and ISO 8601 "from"/"to" (default: the last 30 days).
     """
     
     # Handle CORS preflight request
@@ -50,6 +180,11 @@ def lambda_handler(event, context):
         if not link_id:
             return _make_response(400, {'message': 'Missing "linkId" in request body.'})
 
+        try:
+            granularity, range_from, range_to = _parse_range(body)
+        except (ValueError, TypeError) as e:
+            return _make_response(400, {'message': f'Invalid statistics range: {e}'})
+
         links_table = dynamodb.Table(LINKS_TABLE_NAME)
         
         # --- Step 1: Get the main link data ---
@@ -59,32 +194,42 @@ def lambda_handler(event, context):
         
         link_details = link_response['Item']
         
-        # --- Step 2: Get and aggregate click data by country ---
-        clicks_by_country = {}
+        # --- Step 2: Sum the pre-aggregated click rollups for the range ---
         try:
-            clicks_table = dynamodb.Table(LINK_CLICKS_TABLE_NAME)
-            # Query all clicks for the given LinkId. This assumes LinkId is a GSI partition key for efficient querying.
-            click_response = clicks_table.query(
-                IndexName='LinkId-index', # Assumed GSI for querying by LinkId
-                KeyConditionExpression=boto3.dynamodb.conditions.Key('LinkId').eq(link_id)
+            series, clicks_by_country, clicks_by_referrer, clicks_by_device = _get_click_rollups(
+                link_id, granularity, range_from, range_to
             )
-            
-            # Use collections.Counter for a highly efficient way to count occurrences
-            country_list = [item['Country'] for item in click_response.get('Items', []) if 'Country' in item]
-            clicks_by_country = Counter(country_list)
-
         except ClientError as e:
-            # It's okay if the LinkClicks table or index doesn't exist yet, we just return empty stats.
+            # It's okay if the rollups table doesn't exist yet, we just return empty stats.
             print(f"Could not fetch click analytics (this may be normal): {e}")
-            clicks_by_country = {}
+            series, clicks_by_country, clicks_by_referrer, clicks_by_device = [], {}, {}, {}
+
+        try:
+            unique_visitors = _get_unique_visitors(link_id, range_from, range_to)
+        except ClientError as e:
+            print(f"Could not fetch visitor sketches: {e}")
+            unique_visitors = 0
+
+        try:
+            total_clicks = _get_live_click_count(link_details)
+        except ClientError as e:
+            print(f"Could not read click shards, using compacted count: {e}")
+            total_clicks = int(link_details.get('NumberOfClicks', 0))
 
         # --- Step 3: Combine all data into a single response ---
         response_body = {
             'IsPrivate': bool(link_details.get('IsPrivate', False)),
             'IsPasswordProtected': bool(link_details.get('IsPasswordProtected', False)),
             'Password': link_details.get('Password'),
-            'TotalClicks': int(link_details.get('NumberOfClicks', 0)),
-            'clicksByCountry': dict(clicks_by_country) # Convert Counter to a regular dict
+            'TotalClicks': total_clicks,
+            'uniqueVisitors': unique_visitors,
+            'clicksByCountry': clicks_by_country,
+            'clicksByReferrer': clicks_by_referrer,
+            'clicksByDevice': clicks_by_device,
+            'clicksOverTime': series,
+            'granularity': granularity,
+            'from': range_from.isoformat(),
+            'to': range_to.isoformat()
         }
 
         return _make_response(200, response_body)
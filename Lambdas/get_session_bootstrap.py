@@ -0,0 +1,324 @@
+import os
+import json
+import time
+import hmac
+import base64
+import hashlib
+import decimal
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import boto3
+from botocore.exceptions import ClientError
+
+# --- Configuration ---
+# The Users table and User Pool are resolved per container like verify_admin_status
+# does: '{prefix}-Users' and the '{prefix}-shortly-cognito' stack's pool, where the
+# prefix comes from the function name '{prefix}-{name}'. USERS_TABLE_NAME and
+# USER_POOL_ID override them.
+#
+# IAM: dynamodb:GetItem on the Users table and cloudformation:DescribeStacks on
+# the Cognito stack. Only requests without a valid ID token fall back to Cognito,
+# which needs cognito-idp:ListUsers and cognito-idp:AdminListGroupsForUser.
+ADMIN_GROUP_NAME = os.environ.get('ADMIN_GROUP_NAME', 'Admins')
+# The app client ID, which is the audience (aud) of the pool's ID tokens
+USER_POOL_CLIENT_ID = os.environ.get('USER_POOL_CLIENT_ID')
+JWKS_TTL_SECONDS = float(os.environ.get('JWKS_TTL_SECONDS', '86400'))
+JWKS_MIN_REFRESH_SECONDS = 60
+
+# Group membership rarely changes, so answers are cached per warm container
+ADMIN_CACHE_TTL_SECONDS = float(os.environ.get('ADMIN_CACHE_TTL_SECONDS', '300'))
+ADMIN_CACHE_MAX_ENTRIES = int(os.environ.get('ADMIN_CACHE_MAX_ENTRIES', '1000'))
+
+dynamodb = boto3.resource('dynamodb')
+cognito_client = boto3.client('cognito-idp')
+cloudformation_client = boto3.client('cloudformation')
+
+# DER prefix of a PKCS#1 v1.5 DigestInfo for SHA-256
+SHA256_DIGEST_INFO_PREFIX = bytes.fromhex('3031300d060960864801650304020105000420')
+
+_executor = ThreadPoolExecutor(max_workers=2)
+_config = {'user_pool_id': None, 'users_table_name': None}
+_admin_cache = {}
+_jwks = {'keys': {}, 'fetched_at': None}
+
+CORS_HEADERS = {
+    "Content-Type": "application/json",
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Headers": "Content-Type,If-None-Match,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token",
+    "Access-Control-Allow-Methods": "OPTIONS,POST",
+    "Access-Control-Expose-Headers": "ETag"
+}
+
+
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, decimal.Decimal):
+            return int(o) if o % 1 == 0 else float(o)
+        return super().default(o)
+
+
+def lambda_handler(event, context):
+    """
+    Everything a page needs to know about the signed-in user, in one call:
+    active status, admin flag, unread notification count and basic profile.
+    Replaces the separate check_unread_notifications / is-user-banned /
+    is-user-admin calls made on every page load.
+
+    Expects a JSON body with:
+      - UserId (string, required)
+    and the user's Cognito ID token as "Authorization: Bearer <token>" (or
+    "IdToken" in the body). The admin flag comes from the verified token's
+    cognito:groups claim; only requests without a valid token for UserId fall
+    back to asking Cognito.
+
+    The response carries an ETag; a request whose If-None-Match header matches
+    it gets an empty 304 so the client can reuse its copy. With a valid token the
+    only read behind a 304 is the one projected Users get_item the ETag covers.
+    """
+    if event.get('httpMethod') == 'OPTIONS':
+        return {'statusCode': 200, 'headers': CORS_HEADERS, 'body': ''}
+
+    try:
+        body = json.loads(event.get('body') or '{}')
+        user_id = body.get('UserId')
+    except (json.JSONDecodeError, AttributeError):
+        return _res(400, {'message': 'Bad Request: Invalid JSON format.'})
+
+    if not user_id:
+        return _res(400, {'message': 'Bad Request: Missing UserId in request body.'})
+
+    user_pool_id, users_table_name = _resolve_config(context)
+    token = _bearer_token(event, body)
+    claims = _verify_id_token(token, user_pool_id, USER_POOL_CLIENT_ID) if token else None
+    if claims and claims.get('sub') == user_id:
+        is_admin = ADMIN_GROUP_NAME in claims.get('cognito:groups', [])
+        admin_future = None
+    else:
+        # The Users read and the Cognito group lookup are independent
+        admin_future = _executor.submit(_is_admin, user_id, user_pool_id)
+
+    try:
+        user = _get_user(user_id, users_table_name)
+    except ClientError as e:
+        print(f"DynamoDB Error: {e.response['Error']['Message']}")
+        return _res(500, {'message': 'A database error occurred.'})
+    if admin_future:
+        is_admin = admin_future.result()
+
+    if not user:
+        print(f"User with ID {user_id} not found. Returning inactive.")
+        payload = {'isActive': False, 'isAdmin': False, 'unreadCount': 0,
+                   'hasUnreadNotifications': False, 'profile': None}
+    else:
+        unread_count = max(int(user.get('UnreadNotifications', 0)), 0)
+        payload = {
+            'isActive': user.get('IsActive', True),
+            'isAdmin': is_admin,
+            'unreadCount': unread_count,
+            'hasUnreadNotifications': unread_count > 0,
+            'profile': {
+                'UserId': user_id,
+                'Username': user.get('Username'),
+                'FullName': user.get('FullName'),
+                'Picture': user.get('Picture')
+            }
+        }
+
+    response_body = json.dumps(payload, cls=DecimalEncoder, sort_keys=True)
+    etag = f'"{hashlib.sha256(response_body.encode()).hexdigest()[:32]}"'
+    if _request_header(event, 'If-None-Match') == etag:
+        return {'statusCode': 304, 'headers': {**CORS_HEADERS, 'ETag': etag}, 'body': ''}
+
+    return {'statusCode': 200, 'headers': {**CORS_HEADERS, 'ETag': etag}, 'body': response_body}
+
+
+def _resolve_config(context):
+    """
+    Returns (user_pool_id, users_table_name), resolved once per container. If the
+    pool cannot be found the pool ID is None and nothing is cached, so the next
+    invocation retries; tokens cannot be verified meanwhile and isAdmin is false.
+    """
+    if _config['user_pool_id']:
+        return _config['user_pool_id'], _config['users_table_name']
+
+    function_name = getattr(context, 'function_name', '') or ''
+    env_prefix = function_name.rsplit('-', 1)[0] if '-' in function_name else None
+    if env_prefix:
+        cognito_stack_name = f"{env_prefix}-shortly-cognito"
+        users_table_name = f"{env_prefix}-Users"
+    else:
+        cognito_stack_name = "shortly-cognito"
+        users_table_name = "Users"
+    users_table_name = os.environ.get('USERS_TABLE_NAME', users_table_name)
+
+    user_pool_id = os.environ.get('USER_POOL_ID') or _get_user_pool_id_from_stack(cognito_stack_name)
+    if not user_pool_id:
+        print(f"WARNING: Could not find the User Pool ID in stack '{cognito_stack_name}'.")
+        return None, users_table_name
+
+    _config.update(user_pool_id=user_pool_id, users_table_name=users_table_name)
+    return user_pool_id, users_table_name
+
+
+def _get_user_pool_id_from_stack(stack_name):
+    """The User Pool ID from the Cognito CloudFormation stack's outputs, or None."""
+    try:
+        outputs = cloudformation_client.describe_stacks(StackName=stack_name)['Stacks'][0].get('Outputs', [])
+    except ClientError as e:
+        print(f"Could not describe stack '{stack_name}': {e}")
+        return None
+    for output in outputs:
+        if output['OutputKey'].endswith('UserPoolP6ytmUserPoolId'):
+            return output['OutputValue']
+    return None
+
+
+def _get_user(user_id, users_table_name):
+    """One projected read for the status, the unread counter and the profile."""
+    response = dynamodb.Table(users_table_name).get_item(
+        Key={'UserId': user_id},
+        ProjectionExpression='UserId, IsActive, Username, FullName, Picture, UnreadNotifications'
+    )
+    return response.get('Item')
+
+
+def _is_admin(user_id, user_pool_id):
+    """
+    Returns whether the user (by sub) is in ADMIN_GROUP_NAME, from the cache when
+    fresh. Any Cognito error is logged and treated as "not an admin".
+    """
+    if not user_pool_id:
+        return False
+    now = time.monotonic()
+    cached = _admin_cache.get(user_id)
+    if cached and now - cached[1] < ADMIN_CACHE_TTL_SECONDS:
+        return cached[0]
+
+    try:
+        users = cognito_client.list_users(
+            UserPoolId=user_pool_id,
+            Filter=f'sub = "{user_id}"',
+            Limit=1
+        ).get('Users', [])
+        if not users:
+            is_admin = False
+        else:
+            groups = cognito_client.admin_list_groups_for_user(
+                UserPoolId=user_pool_id,
+                Username=users[0]['Username']
+            ).get('Groups', [])
+            is_admin = any(group['GroupName'] == ADMIN_GROUP_NAME for group in groups)
+    except ClientError as e:
+        print(f"Could not check admin group for {user_id}: {e}")
+        return False
+
+    if len(_admin_cache) >= ADMIN_CACHE_MAX_ENTRIES:
+        _admin_cache.clear()
+    _admin_cache[user_id] = (is_admin, now)
+    return is_admin
+
+
+def _b64url_decode(segment):
+    return base64.urlsafe_b64decode(segment + '=' * (-len(segment) % 4))
+
+
+def _get_signing_key(user_pool_id, kid):
+    """
+    Returns the (n, e) RSA public key for a key ID from the pool's JWKS, fetched
+    once per container and refreshed after JWKS_TTL_SECONDS, or early (at most
+    once a minute) when a token names an unknown key after a rotation.
+    """
+    now = time.monotonic()
+    fetched_at = _jwks['fetched_at']
+    stale = fetched_at is None or now - fetched_at > JWKS_TTL_SECONDS
+    unknown = kid not in _jwks['keys'] and (fetched_at is None or now - fetched_at > JWKS_MIN_REFRESH_SECONDS)
+    if stale or unknown:
+        region = user_pool_id.split('_', 1)[0]
+        url = f"https://cognito-idp.{region}.amazonaws.com/{user_pool_id}/.well-known/jwks.json"
+        with urllib.request.urlopen(url, timeout=3) as response:
+            jwks = json.loads(response.read())
+        _jwks['keys'] = {
+            key['kid']: (int.from_bytes(_b64url_decode(key['n']), 'big'), int.from_bytes(_b64url_decode(key['e']), 'big'))
+            for key in jwks.get('keys', []) if key.get('kty') == 'RSA'
+        }
+        _jwks['fetched_at'] = now
+    return _jwks['keys'].get(kid)
+
+
+def _rsa_sha256_verify(message, signature, public_key):
+    """RSASSA-PKCS1-v1_5 signature check with SHA-256 (the RS256 JWT algorithm)."""
+    n, e = public_key
+    key_length = (n.bit_length() + 7) // 8
+    if len(signature) != key_length:
+        return False
+    encoded = pow(int.from_bytes(signature, 'big'), e, n).to_bytes(key_length, 'big')
+    digest_info = SHA256_DIGEST_INFO_PREFIX + hashlib.sha256(message).digest()
+    expected = b'\x00\x01' + b'\xff' * (key_length - len(digest_info) - 3) + b'\x00' + digest_info
+    return hmac.compare_digest(encoded, expected)
+
+
+def _verify_id_token(token, user_pool_id, client_id):
+    """
+    Same check as verify_admin_status.verify_id_token (each Lambda ships as a
+    single file): RS256 signature, issuer, audience, token_use and expiry.
+    Returns the claims, or None if the token is not valid.
+    """
+    if not client_id or not user_pool_id:
+        return None
+    try:
+        header_segment, payload_segment, signature_segment = token.split('.')
+        header = json.loads(_b64url_decode(header_segment))
+        claims = json.loads(_b64url_decode(payload_segment))
+        signature = _b64url_decode(signature_segment)
+    except (ValueError, AttributeError):
+        return None
+
+    if header.get('alg') != 'RS256':
+        return None
+    try:
+        public_key = _get_signing_key(user_pool_id, header.get('kid'))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Could not load the signing keys for '{user_pool_id}': {e}")
+        return None
+    if not public_key or not _rsa_sha256_verify(f"{header_segment}.{payload_segment}".encode(), signature, public_key):
+        return None
+
+    region = user_pool_id.split('_', 1)[0]
+    if claims.get('iss') != f"https://cognito-idp.{region}.amazonaws.com/{user_pool_id}":
+        return None
+    if claims.get('aud') != client_id or claims.get('token_use') != 'id':
+        return None
+    if not isinstance(claims.get('exp'), (int, float)) or claims['exp'] <= time.time():
+        return None
+    return claims
+
+
+def _bearer_token(event, body):
+    """The ID token from the Authorization header ("Bearer <token>") or the body's IdToken."""
+    value = _request_header(event, 'Authorization')
+    if value:
+        return value.split(' ', 1)[1] if value.lower().startswith('bearer ') else value
+    return body.get('IdToken')
+
+
+def _request_header(event, name):
+    """Case-insensitive lookup of a request header."""
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name.lower():
+            return value
+    return None
+
+
+def _res(status_code, body):
+    return {
+        'statusCode': status_code,
+        'headers': CORS_HEADERS,
+        'body': json.dumps(body)
+    }
+
+
+# test_event = {
+#     "headers": {},
+#     "body": json.dumps({"UserId": "4488d498-20e1-70d5-3ad2-fa9eb8f64af1"})
+# }
+# print(lambda_handler(test_event, None))
@@ -0,0 +1,110 @@
+import os
+import json
+import time
+import decimal
+import boto3
+from botocore.exceptions import ClientError
+
+# --- DynamoDB Table Names ---
+TRENDING_TABLE_NAME = os.environ.get('TRENDING_TABLE_NAME', 'TrendingLinks')
+LINKS_TABLE_NAME = os.environ.get('LINKS_TABLE_NAME', 'Links')
+SNAPSHOT_ID = 'current'
+
+TRENDING_TOP_K = int(os.environ.get('TRENDING_TOP_K', '20'))
+BATCH_GET_LIMIT = 100  # DynamoDB's per-request key limit for batch_get_item
+
+dynamodb = boto3.resource('dynamodb')
+trending_table = dynamodb.Table(TRENDING_TABLE_NAME)
+
+CORS_HEADERS = {
+    "Content-Type": "application/json",
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Headers": "Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token",
+    "Access-Control-Allow-Methods": "OPTIONS,GET,POST"
+}
+
+
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, decimal.Decimal):
+            return int(o) if o % 1 == 0 else float(o)
+        return super().default(o)
+
+
+def lambda_handler(event, context):
+    """
+    Serves the trending links (links/trending) from the snapshot item kept by
+    update_trending_links: one projected get_item, no scan of Links.
+
+    The snapshot ranks every clicked link, so its candidates are checked against
+    Links with one batch_get_item and only public, active links without a
+    password are served, as in get_public_links. A link made private or
+    deactivated drops out on the next request.
+
+    The response holds the current window's top TRENDING_TOP_K links with their
+    click counts ("links"), the previous window's ("previousLinks"), and the
+    window bounds.
+    """
+    if event.get('httpMethod') == 'OPTIONS':
+        return {'statusCode': 200, 'headers': CORS_HEADERS, 'body': ''}
+
+    try:
+        snapshot = trending_table.get_item(
+            Key={'SnapshotId': SNAPSHOT_ID},
+            ProjectionExpression='WindowStart, WindowSeconds, #top, PreviousTop, UpdatedAt',
+            ExpressionAttributeNames={'#top': 'Top'}
+        ).get('Item', {})
+        top = snapshot.get('Top', [])
+        previous_top = snapshot.get('PreviousTop', [])
+        public = _public_link_ids([entry['linkId'] for entry in top + previous_top])
+    except ClientError as e:
+        print(f"DynamoDB Error: {e.response['Error']['Message']}")
+        return _res(500, {'message': 'A database error occurred.'})
+
+    return _res(200, {
+        'links': [entry for entry in top if entry['linkId'] in public][:TRENDING_TOP_K],
+        'previousLinks': [entry for entry in previous_top if entry['linkId'] in public][:TRENDING_TOP_K],
+        'windowStart': snapshot.get('WindowStart'),
+        'windowSeconds': snapshot.get('WindowSeconds'),
+        'updatedAt': snapshot.get('UpdatedAt')
+    })
+
+
+def _public_link_ids(link_ids):
+    """
+    Returns the IDs among link_ids of links that are public, active and not
+    password-protected, reading Links with batch_get_item 100 keys at a time and
+    retrying UnprocessedKeys with exponential backoff.
+    """
+    unique_ids = list(dict.fromkeys(link_ids))
+    public = set()
+    for start in range(0, len(unique_ids), BATCH_GET_LIMIT):
+        request = {LINKS_TABLE_NAME: {
+            'Keys': [{'LinkId': link_id} for link_id in unique_ids[start:start + BATCH_GET_LIMIT]],
+            'ProjectionExpression': 'LinkId, IsPrivate, IsActive, IsPasswordProtected'
+        }}
+        attempt = 0
+        while request:
+            resp = dynamodb.meta.client.batch_get_item(RequestItems=request)
+            public.update(
+                link['LinkId'] for link in resp.get('Responses', {}).get(LINKS_TABLE_NAME, [])
+                if link.get('IsPrivate') is False and link.get('IsActive') is True
+                and not link.get('IsPasswordProtected', False)
+            )
+            request = resp.get('UnprocessedKeys')
+            if request:
+                attempt += 1
+                time.sleep(min(0.05 * 2 ** attempt, 1))
+    return public
+
+
+def _res(status_code, body):
+    return {
+        'statusCode': status_code,
+        'headers': CORS_HEADERS,
+        'body': json.dumps(body, cls=DecimalEncoder)
+    }
+
+
+# test_event = {"httpMethod": "GET"}
+# print(lambda_handler(test_event, None))
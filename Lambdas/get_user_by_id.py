@@ -1,9 +1,15 @@
 import os
 import json
+import time
+import base64
+import threading
 import boto3
 import decimal
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from boto3.dynamodb.conditions import Attr, Key
-from botocore.exceptions import ClientError
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError, ConnectTimeoutError, ReadTimeoutError
 
 # --- Initialize DynamoDB and Table Resources ---
 USERS_TABLE_NAME = os.environ.get('USERS_TABLE_NAME', 'Users')
@@ -11,13 +17,50 @@ LINKS_TABLE_NAME = os.environ.get('LINKS_TABLE_NAME', 'Links')
 USER_ACHIEVEMENTS_TABLE_NAME = os.environ.get('USER_ACHIEVEMENTS_TABLE_NAME', 'UserAchievements')
 ACHIEVEMENTS_TABLE_NAME = os.environ.get('ACHIEVEMENTS_TABLE_NAME', 'Achievement')
 LINKS_USERID_GSI_NAME = os.environ.get('LINKS_USERID_GSI_NAME', 'UserId-index')
+ACHIEVEMENT_CATALOG_TTL_SECONDS = float(os.environ.get('ACHIEVEMENT_CATALOG_TTL_SECONDS', '3600'))
 
+# Profile links are returned one page at a time; continuation requests pass the
+# returned nextCursor back as 'cursor'.
+DEFAULT_LINKS_PAGE_SIZE = int(os.environ.get('DEFAULT_LINKS_PAGE_SIZE', '100'))
+MAX_LINKS_PAGE_SIZE = int(os.environ.get('MAX_LINKS_PAGE_SIZE', '500'))
+# A mostly inactive or private link list could otherwise take one query per
+# matching link; after this many queries the partial page is returned with its cursor.
+MAX_LINKS_QUERY_ROUNDS = int(os.environ.get('MAX_LINKS_QUERY_ROUNDS', '5'))
 
-dynamodb = boto3.resource('dynamodb')
-users_table = dynamodb.Table(USERS_TABLE_NAME)
-links_table = dynamodb.Table(LINKS_TABLE_NAME)
-user_achievements_table = dynamodb.Table(USER_ACHIEVEMENTS_TABLE_NAME)
-achievements_table = dynamodb.Table(ACHIEVEMENTS_TABLE_NAME)
+# Only the attributes the profile page needs (notably never the link Password)
+LINK_PROJECTION = 'LinkId, UserId, #str, #name, #desc, IsPrivate, IsPasswordProtected, NumberOfClicks, #date, IsActive'
+LINK_PROJECTION_NAMES = {'#str': 'String', '#name': 'Name', '#desc': 'Description', '#date': 'Date'}
+
+# The profile lookups run in parallel and share one time budget, measured from
+# when they are started. Achievements and links degrade to empty results when
+# they fail or run late, the user info is required.
+PROFILE_BRANCH_TIMEOUT_SECONDS = float(os.environ.get('PROFILE_BRANCH_TIMEOUT_SECONDS', '3'))
+
+
+# Bounded socket timeouts so a branch abandoned by the handler does not linger
+# into the next invocation.
+DYNAMODB_CONFIG = Config(
+    connect_timeout=2,
+    read_timeout=PROFILE_BRANCH_TIMEOUT_SECONDS,
+    retries={'max_attempts': 2}
+)
+
+# Each profile load uses three workers. A branch abandoned at the deadline is
+# cancelled if it has not started yet; one already running stops before its next
+# DynamoDB call, and the call in flight ends within DYNAMODB_CONFIG's timeouts.
+# The pool has room for the stale branches of a few timed-out loads in a row, so
+# the next load does not queue behind them (see benchmark-profile-fanout.py).
+PROFILE_EXECUTOR_WORKERS = int(os.environ.get('PROFILE_EXECUTOR_WORKERS', '12'))
+
+# Reused across warm invocations. boto3 resources are not thread-safe, so every
+# thread (the handler's and each executor worker) builds its own resource and
+# Table objects on first use; see _tables().
+_profile_executor = ThreadPoolExecutor(max_workers=PROFILE_EXECUTOR_WORKERS)
+_thread_local = threading.local()
+
+# The Achievement table only holds a handful of static rows, so the whole catalog is
+# loaded once per warm container and refreshed after the TTL.
+_achievement_catalog = {'items': MappingProxyType({}), 'loaded_at': None}
 
 
 class DecimalEncoder(json.JSONEncoder):
@@ -35,53 +78,132 @@ def lambda_handler(event, context):
         body = json.loads(event.get('body', '{}'))
         profile_owner_id = body.get('ProfileOwnerId')
         logged_in_user_id = body.get('LoggedInUserId')
+        page_size = max(1, min(int(body.get('pageSize', DEFAULT_LINKS_PAGE_SIZE)), MAX_LINKS_PAGE_SIZE))
 
         if not profile_owner_id:
             return _make_response(400, {'error': 'ProfileOwnerId is a required field.'})
 
-    except (json.JSONDecodeError, TypeError):
+    except (ValueError, TypeError):
         return _make_response(400, {'error': 'Invalid JSON format in request body.'})
 
     try:
-        user_info = _get_user_info(profile_owner_id)
+        start_key = _decode_cursor(body.get('cursor'), profile_owner_id)
+    except ValueError as e:
+        return _make_response(400, {'error': str(e)})
+
+    is_owner_viewing = profile_owner_id == logged_in_user_id
+
+    # Continuation requests (with a cursor) only need the user check and the next page of links
+    achievements_future = None
+    try:
+        deadline = time.monotonic() + PROFILE_BRANCH_TIMEOUT_SECONDS
+        user_info_future = _profile_executor.submit(_get_user_info, profile_owner_id)
+        if not start_key:
+            achievements_future = _profile_executor.submit(_get_user_achievements, profile_owner_id, deadline)
+        links_future = _profile_executor.submit(
+            _get_user_links_page, profile_owner_id, is_owner_viewing, page_size, start_key, deadline
+        )
+
+        user_info = user_info_future.result(timeout=_remaining(deadline))
         if not user_info:
+            for future in (achievements_future, links_future):
+                if future:
+                    future.cancel()
             return _make_response(404, {'error': 'User not found.'})
 
-        achievements = _get_user_achievements(profile_owner_id)
-        # This function now fetches all links and then filters them in Python
-        links = _get_user_links_with_gsi(profile_owner_id)
+        if start_key:
+            links, next_cursor = links_future.result(timeout=_remaining(deadline))
+            return _make_response(200, {'links': links, 'nextCursor': next_cursor})
 
     except ClientError as e:
         print(f"DynamoDB Error: {e.response['Error']['Message']}")
         return _make_response(500, {'error': 'An error occurred while fetching profile data.'})
+    except (ConnectTimeoutError, ReadTimeoutError) as e:
+        print(f"DynamoDB request timed out: {e}")
+        return _make_response(504, {'error': 'Timed out while fetching profile data.'})
+    except BotoCoreError as e:
+        print(f"DynamoDB request failed: {e}")
+        return _make_response(500, {'error': 'An error occurred while fetching profile data.'})
+    except FutureTimeoutError:
+        print(f"Timed out fetching profile data for '{profile_owner_id}'.")
+        for future in (user_info_future, achievements_future, links_future):
+            if future:
+                future.cancel()
+        return _make_response(504, {'error': 'Timed out while fetching profile data.'})
 
-    is_owner_viewing = profile_owner_id == logged_in_user_id
-    if not is_owner_viewing:
-        # This privacy filter is applied after the active filter
-        links = [link for link in links if not link.get('IsPrivate', False)]
+    degraded = []
+    achievements = _branch_result('achievements', achievements_future, [], degraded, deadline)
+    links, next_cursor = _branch_result('links', links_future, ([], None), degraded, deadline)
 
     response_payload = {
         'userInfo': user_info,
         'achievements': achievements,
-        'links': links
+        'links': links,
+        'nextCursor': next_cursor
     }
+    if degraded:
+        response_payload['degraded'] = degraded
 
     return _make_response(200, response_payload)
 
 
+def _branch_result(name, future, fallback, degraded, deadline):
+    """
+    Waits for an optional profile branch until the shared deadline and returns its
+    result. If the branch failed or is still running at the deadline, returns the
+    fallback and records the branch name in `degraded` so the client can show
+    partial data. A branch abandoned at the deadline is cancelled if it has not
+    started yet.
+    """
+    try:
+        return future.result(timeout=_remaining(deadline))
+    except FutureTimeoutError:
+        future.cancel()
+        print(f"Profile branch '{name}' timed out; returning it empty.")
+    except ClientError as e:
+        print(f"Profile branch '{name}' failed: {e.response['Error']['Message']}")
+    except BotoCoreError as e:
+        print(f"Profile branch '{name}' failed: {e}")
+    degraded.append(name)
+    return fallback
+
+
+def _remaining(deadline):
+    """Seconds left until the monotonic deadline (0 once it has passed)."""
+    return max(0.0, deadline - time.monotonic())
+
+
+def _tables():
+    """
+    Returns the calling thread's Table objects, creating its DynamoDB resource
+    from a fresh session the first time the thread asks.
+    """
+    tables = getattr(_thread_local, 'tables', None)
+    if tables is None:
+        dynamodb = boto3.session.Session().resource('dynamodb', config=DYNAMODB_CONFIG)
+        tables = _thread_local.tables = {
+            'users': dynamodb.Table(USERS_TABLE_NAME),
+            'links': dynamodb.Table(LINKS_TABLE_NAME),
+            'user_achievements': dynamodb.Table(USER_ACHIEVEMENTS_TABLE_NAME),
+            'achievements': dynamodb.Table(ACHIEVEMENTS_TABLE_NAME)
+        }
+    return tables
+
+
 def _get_user_info(user_id):
-    response = users_table.get_item(
+    response = _tables()['users'].get_item(
         Key={'UserId': user_id},
         ProjectionExpression="UserId, Username, FullName, Country, DateJoined, IsActive, Picture"
     )
     return response.get('Item')
 
 
-def _get_user_achievements(user_id):
-    user_ach_response = user_achievements_table.query(
+def _get_user_achievements(user_id, deadline=None):
+    user_ach_response = _tables()['user_achievements'].query(
         KeyConditionExpression=boto3.dynamodb.conditions.Key('UserId').eq(user_id)
     )
     earned_achievements = user_ach_response.get('Items', [])
+    catalog = _get_achievement_catalog(deadline)
     
     enriched_achievements = []
     
@@ -89,54 +211,110 @@ def _get_user_achievements(user_id):
         achievement_id = ach.get('AchievementId')
         if not achievement_id:
             continue
-            
-        try:
-            master_ach_response = achievements_table.get_item(
-                Key={'AchId': achievement_id}
-            )
-            
-            if 'Item' in master_ach_response:
-                ach['Achievement'] = master_ach_response['Item']
-                
-            enriched_achievements.append(ach)
-            
-        except ClientError as e:
-            print(f"Could not fetch details for AchievementId {achievement_id}: {e}")
-            enriched_achievements.append(ach)
+
+        if achievement_id in catalog:
+            ach['Achievement'] = dict(catalog[achievement_id])
+        enriched_achievements.append(ach)
 
     return enriched_achievements
 
 
-def _get_user_links_with_gsi(user_id):
+def _get_achievement_catalog(deadline=None):
     """
-    MODIFIED: Queries the Links table's GSI to get all of a user's links,
-    and then filters them in Python to return only the active ones.
+    Returns the Achievement table as a read-only AchId -> item map, scanning it only
+    when the cached copy is missing or older than ACHIEVEMENT_CATALOG_TTL_SECONDS.
+    If a refresh fails or runs past the deadline, the previous catalog keeps being
+    served.
     """
-    all_user_links = []
-    
-    # First, query DynamoDB to get all links for the user, same as before
-    response = links_table.query(
-        IndexName=LINKS_USERID_GSI_NAME,
-        KeyConditionExpression=Key('UserId').eq(user_id)
-    )
-    all_user_links.extend(response.get('Items', []))
-
-    # Handle pagination to get all results
-    while 'LastEvaluatedKey' in response:
-        response = links_table.query(
-            IndexName=LINKS_USERID_GSI_NAME,
-            KeyConditionExpression=Key('UserId').eq(user_id),
-            ExclusiveStartKey=response['LastEvaluatedKey']
-        )
-        all_user_links.extend(response.get('Items', []))
+    now = time.monotonic()
+    loaded_at = _achievement_catalog['loaded_at']
+    if loaded_at is not None and now - loaded_at < ACHIEVEMENT_CATALOG_TTL_SECONDS:
+        return _achievement_catalog['items']
+
+    try:
+        items = {}
+        scan_kwargs = {}
+        while True:
+            response = _tables()['achievements'].scan(**scan_kwargs)
+            for item in response.get('Items', []):
+                items[item['AchId']] = MappingProxyType(item)
+            if 'LastEvaluatedKey' not in response:
+                break
+            if deadline is not None and _remaining(deadline) == 0:
+                print("Achievement catalog refresh ran past the profile deadline.")
+                return _achievement_catalog['items']
+            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    except (BotoCoreError, ClientError) as e:
+        print(f"Could not load achievement catalog: {e}")
+        return _achievement_catalog['items']
+
+    _achievement_catalog['items'] = MappingProxyType(items)
+    _achievement_catalog['loaded_at'] = now
+    return _achievement_catalog['items']
 
-    # Second, filter the results in Python. This is safer.
-    # A link is considered active if IsActive is True, or if the attribute doesn't exist at all.
-    active_links = [
-        link for link in all_user_links if link.get('IsActive', True)
-    ]
 
-    return active_links
+def _get_user_links_page(user_id, include_private, page_size, start_key=None, deadline=None):
+    """
+    Returns (links, next_cursor) for one page of the user's active links, queried
+    through the UserId GSI. Inactive (and, for other viewers, private) links are
+    dropped by a server-side FilterExpression and only LINK_PROJECTION is read.
+
+    Because filtering happens after DynamoDB's Limit is applied, the query is
+    repeated with the remaining page size until the page is full or the index is
+    exhausted, so the cursor always points right after the last returned link.
+    After MAX_LINKS_QUERY_ROUNDS queries, or past the deadline, no further query is
+    started and the partial page is returned with its cursor.
+    """
+    filter_expression = Attr('IsActive').not_exists() | Attr('IsActive').eq(True)
+    if not include_private:
+        filter_expression = filter_expression & (Attr('IsPrivate').not_exists() | Attr('IsPrivate').eq(False))
+
+    query_kwargs = {
+        'IndexName': LINKS_USERID_GSI_NAME,
+        'KeyConditionExpression': Key('UserId').eq(user_id),
+        'FilterExpression': filter_expression,
+        'ProjectionExpression': LINK_PROJECTION,
+        'ExpressionAttributeNames': dict(LINK_PROJECTION_NAMES)
+    }
+
+    links = []
+    for _ in range(MAX_LINKS_QUERY_ROUNDS):
+        if start_key:
+            query_kwargs['ExclusiveStartKey'] = start_key
+        query_kwargs['Limit'] = page_size - len(links)
+        response = _tables()['links'].query(**query_kwargs)
+        links.extend(response.get('Items', []))
+        start_key = response.get('LastEvaluatedKey')
+        if not start_key or len(links) >= page_size:
+            break
+        if deadline is not None and _remaining(deadline) == 0:
+            break
+
+    return links, _encode_cursor(start_key)
+
+
+def _encode_cursor(last_evaluated_key):
+    """Wraps a LastEvaluatedKey into an opaque continuation token."""
+    if not last_evaluated_key:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(last_evaluated_key, cls=DecimalEncoder).encode()).decode()
+
+
+def _decode_cursor(cursor, user_id):
+    """
+    Turns a continuation token back into an ExclusiveStartKey. Raises ValueError if
+    it is malformed or belongs to another user's link list.
+    """
+    if not cursor:
+        return None
+    try:
+        start_key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (AttributeError, ValueError):
+        raise ValueError('Invalid cursor.')
+    if (not isinstance(start_key, dict) or set(start_key) != {'LinkId', 'UserId'}
+            or start_key['UserId'] != user_id or not isinstance(start_key['LinkId'], str)):
+        raise ValueError('Invalid cursor.')
+    return start_key
 
 
 def _make_response(status_code, body):
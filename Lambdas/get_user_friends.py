@@ -1,11 +1,21 @@
 import os
 import json
+import time
+import base64
 import boto3
 import decimal
+from concurrent.futures import ThreadPoolExecutor
+from boto3.dynamodb.conditions import Key
 
 # --- Initialize AWS resources ---
 dynamodb = boto3.resource('dynamodb')
 TABLE_NAME = os.environ.get('USERS_TABLE', 'Users')
+USER_EDGES_TABLE_NAME = os.environ.get('USER_EDGES_TABLE_NAME', 'UserEdges')
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+BATCH_GET_LIMIT = 100  # DynamoDB's per-request key limit for batch_get_item
+HYDRATION_WORKERS = 5
 
 # --- CORS Headers ---
 CORS_HEADERS = {
@@ -32,7 +42,12 @@ def lambda_handler(event, context):
         raw_body = event.get('body', {})
         body = json.loads(raw_body) if isinstance(raw_body, str) else raw_body
         user_id = body['UserId']
-    except (KeyError, TypeError, json.JSONDecodeError) as e:
+        # Without a pageSize every friend is returned (older clients do not follow nextCursor)
+        page_size = _parse_page_size(body['pageSize']) if 'pageSize' in body else None
+        start_key = _decode_cursor(body['cursor'], user_id) if body.get('cursor') else None
+        if start_key and not page_size:
+            page_size = DEFAULT_PAGE_SIZE
+    except (KeyError, TypeError, ValueError) as e:
         return {
             'statusCode': 400,
             'headers': CORS_HEADERS,
@@ -57,31 +72,118 @@ def lambda_handler(event, context):
             'body': json.dumps({'error': f'Error fetching user: {e}'})
         }
 
-    friends_attr = user_item.get('Friends', '[]')
-    if isinstance(friends_attr, str):
-        try:
-            friends_ids = json.loads(friends_attr)
-        except json.JSONDecodeError:
-            friends_ids = []
-    else:
-        friends_ids = friends_attr
+    try:
+        friends_ids, next_cursor = _get_friend_ids_page(user_id, page_size, start_key)
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': f'Error fetching friends: {e}'})
+        }
+
+    try:
+        friends = _batch_get_users(friends_ids, 'UserId, Username, Picture, Email')
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': f'Error fetching friends: {e}'})
+        }
 
     friends_info = []
     for fid in friends_ids:
-        try:
-            fr = table.get_item(Key={'UserId': fid}).get('Item')
-            if fr:
-                friends_info.append({
-                    'UserId': fr.get('UserId', ''),
-                    'Username': fr.get('Username', ''),
-                    'Picture': fr.get('Picture', ''),
-                    'Email': fr.get('Email', '')
-                })
-        except Exception:
-            continue
+        fr = friends.get(fid)
+        if fr:
+            friends_info.append({
+                'UserId': fr.get('UserId', ''),
+                'Username': fr.get('Username', ''),
+                'Picture': fr.get('Picture', ''),
+                'Email': fr.get('Email', '')
+            })
 
     return {
         'statusCode': 200,
         'headers': CORS_HEADERS,
-        'body': json.dumps({'friends': friends_info}, default=_decimal_default)
+        'body': json.dumps({'friends': friends_info, 'nextCursor': next_cursor}, default=_decimal_default)
     }
+
+
+def _batch_get_users(user_ids, projection):
+    """
+    Fetches the given users with batch_get_item, 100 keys per request, running the
+    chunks concurrently and retrying UnprocessedKeys with exponential backoff.
+    Returns a dict of UserId -> item containing only the projected attributes.
+    """
+    unique_ids = list(dict.fromkeys(user_ids))
+    chunks = [unique_ids[i:i + BATCH_GET_LIMIT] for i in range(0, len(unique_ids), BATCH_GET_LIMIT)]
+    if not chunks:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(len(chunks), HYDRATION_WORKERS)) as executor:
+        results = executor.map(lambda chunk: _batch_get_chunk(chunk, projection), chunks)
+        return {item['UserId']: item for items in results for item in items}
+
+
+def _batch_get_chunk(user_ids, projection):
+    request = {TABLE_NAME: {
+        'Keys': [{'UserId': uid} for uid in user_ids],
+        'ProjectionExpression': projection
+    }}
+    items = []
+    attempt = 0
+    while request:
+        # The low-level client is thread-safe, unlike Table resources.
+        resp = dynamodb.meta.client.batch_get_item(RequestItems=request)
+        items.extend(resp.get('Responses', {}).get(TABLE_NAME, []))
+        request = resp.get('UnprocessedKeys')
+        if request:
+            attempt += 1
+            time.sleep(min(0.05 * 2 ** attempt, 1))
+    return items
+
+
+def _get_friend_ids_page(user_id, page_size, start_key=None):
+    """
+    Returns (friend_ids, next_cursor) for one page of the user's FRIEND# edges in
+    the UserEdges table, or for all of them when page_size is None. The cursor is
+    an opaque token wrapping LastEvaluatedKey.
+    """
+    query_kwargs = {
+        'KeyConditionExpression': Key('UserId').eq(user_id) & Key('EdgeKey').begins_with('FRIEND#'),
+        'ProjectionExpression': 'TargetId'
+    }
+    if page_size:
+        query_kwargs['Limit'] = page_size
+    if start_key:
+        query_kwargs['ExclusiveStartKey'] = start_key
+    friends_ids = []
+    while True:
+        resp = dynamodb.Table(USER_EDGES_TABLE_NAME).query(**query_kwargs)
+        friends_ids.extend(edge['TargetId'] for edge in resp.get('Items', []))
+        last_key = resp.get('LastEvaluatedKey')
+        if page_size or not last_key:
+            break
+        query_kwargs['ExclusiveStartKey'] = last_key
+    next_cursor = base64.urlsafe_b64encode(json.dumps(last_key).encode()).decode() if last_key else None
+    return friends_ids, next_cursor
+
+
+def _parse_page_size(value):
+    page_size = int(value)
+    if page_size <= 0:
+        raise ValueError('pageSize must be a positive integer')
+    return min(page_size, MAX_PAGE_SIZE)
+
+
+def _decode_cursor(cursor, user_id):
+    """
+    Decodes a nextCursor from an earlier page back into the ExclusiveStartKey.
+    Raises ValueError if it is malformed or belongs to another user's list.
+    """
+    try:
+        start_key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (AttributeError, ValueError):
+        raise ValueError('cursor is not a valid nextCursor')
+    if (not isinstance(start_key, dict) or set(start_key) != {'UserId', 'EdgeKey'}
+            or start_key['UserId'] != user_id or not str(start_key['EdgeKey']).startswith('FRIEND#')):
+        raise ValueError('cursor is not a valid nextCursor')
+    return start_key
@@ -1,12 +1,24 @@
 import json
 import boto3
 import os
+from datetime import datetime, timezone
 from botocore.exceptions import ClientError
 
 dynamodb = boto3.resource('dynamodb')
-NOTIFICATIONS_TABLE_NAME = os.environ.get('NOTIFICATIONS_TABLE_NAME', 'Notifications')
+lambda_client = boto3.client('lambda')
+USERS_TABLE_NAME = os.environ.get('USERS_TABLE_NAME', 'Users')
+# Optional: compact_read_notifications, invoked asynchronously to rewrite IsRead
+READ_COMPACTOR_FUNCTION_NAME = os.environ.get('READ_COMPACTOR_FUNCTION_NAME', '')
 
 def lambda_handler(event, context):
+    """
+    Marks all of a user's notifications as read with a single write: the
+    NotificationsReadAt watermark on the user item is moved to now and the
+    UnreadNotifications counter is reset. Notifications at or before the
+    watermark count as read whatever their IsRead flag says.
+
+    Responds with the number of notifications that were unread (markedCount).
+    """
     cors_headers = {
         "Access-Control-Allow-Origin": "*",
         "Access-Control-Allow-Headers": "Content-Type",
@@ -24,28 +36,32 @@ def lambda_handler(event, context):
                 'body': json.dumps({'message': 'Missing "userId" in request body.'})
             }
 
-        table = dynamodb.Table(NOTIFICATIONS_TABLE_NAME)
-
-        # Step 1: Query for unread notifications
-        response = table.query(
-            IndexName='ToUserId-index',
-            KeyConditionExpression=boto3.dynamodb.conditions.Key('ToUserId').eq(user_id)
-        )
-        notifications = response.get('Items', [])
+        read_at = datetime.now(timezone.utc).isoformat()
+        try:
+            response = dynamodb.Table(USERS_TABLE_NAME).update_item(
+                Key={'UserId': user_id},
+                UpdateExpression='SET NotificationsReadAt = :read_at, UnreadNotifications = :zero',
+                ConditionExpression='attribute_exists(UserId)',
+                ExpressionAttributeValues={':read_at': read_at, ':zero': 0},
+                ReturnValues='UPDATED_OLD'
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            return {
+                'statusCode': 404,
+                'headers': cors_headers,
+                'body': json.dumps({'message': f'User {user_id} does not exist.'})
+            }
 
-        # Step 2: Update each unread notification
-        for notification in notifications:
-            if not notification.get('IsRead'):
-                table.update_item(
-                    Key={'NotifId': notification['NotifId']},
-                    UpdateExpression='SET IsRead = :r',
-                    ExpressionAttributeValues={':r': 1}
-                )
+        marked_count = max(int(response.get('Attributes', {}).get('UnreadNotifications', 0)), 0)
+        if marked_count and READ_COMPACTOR_FUNCTION_NAME:
+            _start_read_compaction(user_id, read_at)
 
         return {
             'statusCode': 200,
             'headers': cors_headers,
-            'body': json.dumps({'message': 'Notifications marked as read.'})
+            'body': json.dumps({'message': 'Notifications marked as read.', 'markedCount': marked_count})
         }
 
     except ClientError as e:
@@ -63,3 +79,15 @@ def lambda_handler(event, context):
             'headers': cors_headers,
             'body': json.dumps({'message': 'An unexpected server error occurred.'})
         }
+
+
+def _start_read_compaction(user_id, read_at):
+    """Fire-and-forget: the watermark is already authoritative, so errors are only logged."""
+    try:
+        lambda_client.invoke(
+            FunctionName=READ_COMPACTOR_FUNCTION_NAME,
+            InvocationType='Event',
+            Payload=json.dumps({'userId': user_id, 'readAt': read_at})
+        )
+    except ClientError as e:
+        print(f"Could not start read compaction for {user_id}: {e}")
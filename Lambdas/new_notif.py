@@ -1,12 +1,20 @@
 import os
 import json
+import time
 import uuid
 from datetime import datetime, timezone
 import boto3
+from botocore.exceptions import ClientError
 
 dynamodb = boto3.resource('dynamodb')
 # Table name should be set as an environment variable
 TABLE_NAME = os.environ.get('NOTIFICATIONS_TABLE', 'Notifications')
+USERS_TABLE_NAME = os.environ.get('USERS_TABLE_NAME', 'Users')
+# Notifications expire (DynamoDB TTL on ExpiresAt) after this many days
+NOTIFICATION_RETENTION_DAYS = int(os.environ.get('NOTIFICATION_RETENTION_DAYS', '90'))
+# Transactions cancelled by a conflicting write or throttling are retried this many times
+MAX_TRANSACTION_RETRIES = 3
+RETRYABLE_CANCELLATION_REASONS = {'TransactionConflict', 'ThrottlingError', 'ProvisionedThroughputExceeded'}
 
 def lambda_handler(event, context):
     """
@@ -55,13 +63,50 @@ def lambda_handler(event, context):
         'IsRead': is_read,
         'Text': text,
         'LinkId': link_id,
-        'Timestamp': timestamp
+        'Timestamp': timestamp,
+        'Type': 'general',
+        'ExpiresAt': int(time.time()) + NOTIFICATION_RETENTION_DAYS * 86400
     }
 
-    # Save to DynamoDB
-    table = dynamodb.Table(TABLE_NAME)
+    # Save to DynamoDB. An unread notification also bumps the recipient's
+    # UnreadNotifications counter in the same transaction.
+    transact_items = [{'Put': {'TableName': TABLE_NAME, 'Item': item}}]
+    if not is_read:
+        transact_items.append({
+            'Update': {
+                'TableName': USERS_TABLE_NAME,
+                'Key': {'UserId': to_user},
+                'UpdateExpression': 'ADD UnreadNotifications :one',
+                'ConditionExpression': 'attribute_exists(UserId)',
+                'ExpressionAttributeValues': {':one': 1}
+            }
+        })
+    attempt = 0
     try:
-        table.put_item(Item=item)
+        while True:
+            try:
+                dynamodb.meta.client.transact_write_items(TransactItems=transact_items)
+                break
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'TransactionCanceledException':
+                    raise
+                # One reason per transact item, in order: the Put, then the Users update
+                reasons = [reason.get('Code') for reason in e.response.get('CancellationReasons', [])]
+                if len(reasons) > 1 and reasons[1] == 'ConditionalCheckFailed':
+                    return {
+                        'statusCode': 404,
+                        'body': json.dumps({'error': f'Recipient {to_user} does not exist.'})
+                    }
+                print(f"Notification transaction cancelled: {reasons}")
+                if not set(reasons) & RETRYABLE_CANCELLATION_REASONS:
+                    raise
+                attempt += 1
+                if attempt > MAX_TRANSACTION_RETRIES:
+                    return {
+                        'statusCode': 503,
+                        'body': json.dumps({'error': 'Could not save the notification right now. Please try again.'})
+                    }
+                time.sleep(0.05 * 2 ** attempt)
     except Exception as e:
         return {
             'statusCode': 500,
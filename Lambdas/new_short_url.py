@@ -8,14 +8,24 @@ from botocore.exceptions import ClientError
 
 # Initialize DynamoDB resources from environment variables
 LINKS_TABLE_NAME = 'Links'
-USERS_TABLE_NAME = os.environ.get('USERS_TABLE_NAME', 'Users') # Table for user data
+USER_EDGES_TABLE_NAME = os.environ.get('USER_EDGES_TABLE_NAME', 'UserEdges') # Per-user link/friend items
+USERS_TABLE_NAME = os.environ.get('USERS_TABLE_NAME', 'Users')
+
+# Short code settings: length of generated codes and how many fresh codes to try
+# before giving up when a conditional put collides with an existing LinkId.
+SHORT_CODE_LENGTH = int(os.environ.get('SHORT_CODE_LENGTH', '8'))
+MAX_CODE_ATTEMPTS = int(os.environ.get('MAX_CODE_ATTEMPTS', '5'))
 
 dynamodb = boto3.resource('dynamodb')
 links_table = dynamodb.Table(LINKS_TABLE_NAME)
-users_table = dynamodb.Table(USERS_TABLE_NAME) # Resource for the Users table
+user_edges_table = dynamodb.Table(USER_EDGES_TABLE_NAME)
+users_table = dynamodb.Table(USERS_TABLE_NAME)
+
+# Allocation metrics for this warm container, logged on every collision
+_allocation_stats = {'allocated': 0, 'collisions': 0}
 
 
-def generate_code(length: int = 8) -> str:
+def generate_code(length: int = SHORT_CODE_LENGTH) -> str:
     """
     Generate a random base62 string for the short code.
     """
@@ -23,6 +33,34 @@ def generate_code(length: int = 8) -> str:
     return ''.join(secrets.choice(alphabet) for _ in range(length))
 
 
+def allocate_link(item: dict) -> str:
+    """
+    Stores the link under a fresh short code and returns the code.
+
+    The put is conditional on the LinkId not existing yet, so uniqueness is checked
+    by the write itself instead of a get_item round trip before every creation.
+    Raises RuntimeError if every attempt collided.
+    """
+    for _ in range(MAX_CODE_ATTEMPTS):
+        code = generate_code()
+        try:
+            links_table.put_item(
+                Item={**item, 'LinkId': code},
+                ConditionExpression='attribute_not_exists(LinkId)'
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            _allocation_stats['collisions'] += 1
+            attempts = _allocation_stats['allocated'] + _allocation_stats['collisions']
+            print(f"Short code collision on '{code}' (collision rate {_allocation_stats['collisions'] / attempts:.4%} "
+                  f"over {attempts} attempts, code length {SHORT_CODE_LENGTH}).")
+            continue
+        _allocation_stats['allocated'] += 1
+        return code
+    raise RuntimeError(f"Could not allocate a unique short code in {MAX_CODE_ATTEMPTS} attempts.")
+
+
 def lambda_handler(event, context):
     # --- CORS Preflight Handling ---
     if event.get('httpMethod') == 'OPTIONS':
@@ -73,17 +111,8 @@ def lambda_handler(event, context):
     if not is_password_protected:
         password = ''  # enforce empty password when protection is off
 
-    # --- Generate Unique LinkId ---
-    code = generate_code()
-    while True:
-        resp = links_table.get_item(Key={'LinkId': code})
-        if 'Item' not in resp:
-            break
-        code = generate_code()
-
-    # --- Create Link Item in DynamoDB ---
+    # --- Create Link Item in DynamoDB under a unique LinkId ---
     item = {
-        'LinkId': code,
         'UserId': user_id,
         'String': long_url,
         'Name': name,
@@ -95,53 +124,45 @@ def lambda_handler(event, context):
         'Date': datetime.utcnow().isoformat(),
         'IsActive': True
     }
-    links_table.put_item(Item=item)
-
-    # --- MODIFIED: Update the User's 'Links' String Attribute ---
     try:
-        print(f"Attempting to update user {user_id} with new link {code}")
-        
-        # 1. Get the current user item to read the existing Links string
-        response = users_table.get_item(Key={'UserId': user_id})
-
-        if 'Item' in response:
-            user_item = response['Item']
-            # Get the current JSON string of links, defaulting to an empty string
-            current_links_json = user_item.get('Links', '')
-            
-            links_list = []
-            # 2. Try to parse the existing JSON string into a list
-            if current_links_json:
-                try:
-                    links_list = json.loads(current_links_json)
-                    # Ensure it's a list, not some other JSON type
-                    if not isinstance(links_list, list):
-                        links_list = []
-                except json.JSONDecodeError:
-                    # Handle cases where the string is not valid JSON, start fresh
-                    print(f"Warning: Could not parse existing Links attribute for user {user_id}. Starting a new list.")
-                    links_list = []
-            
-            # 3. Append the new link code to the list
-            links_list.append(code)
-            
-            # 4. Convert the list back to a JSON-formatted string
-            new_links_json_string = json.dumps(links_list)
-            
-            # 5. Update the user item with the new JSON string
-            users_table.update_item(
-                Key={'UserId': user_id},
-                UpdateExpression="SET Links = :l",
-                ExpressionAttributeValues={':l': new_links_json_string}
-            )
-            print(f"Successfully updated user {user_id} with new links string.")
-        else:
-            print(f"User {user_id} not found. Cannot update Links attribute.")
+        code = allocate_link(item)
+    except (ClientError, RuntimeError) as e:
+        print(f"Error creating link for user {user_id}: {e}")
+        return {
+            'statusCode': 500,
+            'headers': {
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Allow-Headers': 'Content-Type',
+                'Access-Control-Allow-Methods': 'OPTIONS,POST'
+            },
+            'body': json.dumps({'error': 'Could not create the short link. Please try again.'})
+        }
 
+    # --- Record the link on the owner's adjacency list ---
+    # Each link is its own UserEdges item, so creating a link no longer rewrites
+    # the user's whole 'Links' JSON string.
+    try:
+        user_edges_table.put_item(Item={
+            'UserId': user_id,
+            'EdgeKey': f"LINK#{code}",
+            'TargetId': code,
+            'CreatedAt': item['Date']
+        })
     except ClientError as e:
         # Log the error but don't fail the entire request,
         # as the link was successfully created.
-        print(f"Error updating Users table for user {user_id}: {e.response['Error']['Message']}")
+        print(f"Error adding link {code} to UserEdges for user {user_id}: {e.response['Error']['Message']}")
+
+    # --- Count the new link on the owner's ActiveLinks counter ---
+    try:
+        users_table.update_item(
+            Key={'UserId': user_id},
+            UpdateExpression='ADD ActiveLinks :one',
+            ConditionExpression='attribute_exists(UserId)',
+            ExpressionAttributeValues={':one': 1}
+        )
+    except ClientError as e:
+        print(f"Error counting link {code} for user {user_id}: {e.response['Error']['Message']}")
 
     # --- Return Success Response ---
     return {
@@ -0,0 +1,261 @@
+import os
+import json
+import time
+import string
+import secrets
+from datetime import datetime
+import boto3
+from botocore.exceptions import ClientError
+
+# Initialize DynamoDB resources from environment variables
+LINKS_TABLE_NAME = os.environ.get('LINKS_TABLE_NAME', 'Links')
+USER_EDGES_TABLE_NAME = os.environ.get('USER_EDGES_TABLE_NAME', 'UserEdges')
+USERS_TABLE_NAME = os.environ.get('USERS_TABLE_NAME', 'Users')
+
+SHORT_CODE_LENGTH = int(os.environ.get('SHORT_CODE_LENGTH', '8'))
+MAX_BULK_LINKS = int(os.environ.get('MAX_BULK_LINKS', '5000'))
+MAX_BATCH_RETRIES = 8
+MAX_TRANSACT_ITEMS = 100
+RETRYABLE_ERRORS = {'TransactionConflict', 'TransactionConflictException', 'ThrottlingError',
+                    'ThrottlingException', 'ProvisionedThroughputExceededException', 'TransactionInProgressException'}
+
+dynamodb = boto3.resource('dynamodb')
+
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type',
+    'Access-Control-Allow-Methods': 'OPTIONS,POST'
+}
+
+
+def generate_code(length: int = SHORT_CODE_LENGTH) -> str:
+    """
+    Generate a random base62 string for the short code.
+    """
+    alphabet = string.ascii_letters + string.digits
+    return ''.join(secrets.choice(alphabet) for _ in range(length))
+
+
+def lambda_handler(event, context):
+    """
+    Creates many short links in one request, e.g. when importing a bookmark file.
+
+    Expects a JSON body with:
+      - userId (string, required)
+      - links (list, required): objects with the same fields new_short_url accepts
+        ("url", "name", "description", "isPrivate", "isPasswordProtected", "password")
+
+    Responds with newline-delimited JSON: one result line per input link, in input
+    order ({"index", "code"} or {"index", "error"}), followed by a summary line.
+    """
+    # --- CORS Preflight Handling ---
+    if event.get('httpMethod') == 'OPTIONS':
+        return {'statusCode': 204, 'headers': CORS_HEADERS, 'body': ''}
+
+    # --- Parse and Validate Incoming Request ---
+    try:
+        body = json.loads(event.get('body', '{}'))
+        user_id = body['userId']
+        requested_links = body['links']
+        if not isinstance(requested_links, list):
+            raise TypeError('"links" must be a list.')
+    except (json.JSONDecodeError, KeyError, TypeError):
+        return _error_response(400, 'Request must be JSON with "userId" and a "links" list.')
+
+    if not requested_links:
+        return _error_response(400, '"links" must contain at least one link.')
+    if len(requested_links) > MAX_BULK_LINKS:
+        return _error_response(400, f'At most {MAX_BULK_LINKS} links can be created per request.')
+
+    results = [None] * len(requested_links)
+    items_by_index = {}
+    for index, link in enumerate(requested_links):
+        item, error = _build_link_item(link, user_id)
+        if error:
+            results[index] = {'index': index, 'error': error}
+        else:
+            items_by_index[index] = item
+
+    # --- Allocate codes and create the links, up to 100 per transaction ---
+    failed_indexes = _create_links(items_by_index)
+
+    created_codes = []
+    for index, item in items_by_index.items():
+        if index in failed_indexes:
+            results[index] = {'index': index, 'error': 'Could not store the link. Please retry it.'}
+        else:
+            results[index] = {'index': index, 'code': item['LinkId']}
+            created_codes.append(item['LinkId'])
+
+    # --- Record the new links on the owner's adjacency list ---
+    if created_codes:
+        edges = [
+            {'UserId': user_id, 'EdgeKey': f"LINK#{code}", 'TargetId': code, 'CreatedAt': datetime.utcnow().isoformat()}
+            for code in created_codes
+        ]
+        failed_edges = _batch_write(USER_EDGES_TABLE_NAME, edges)
+        if failed_edges:
+            # The links themselves were created, so only log the failure.
+            print(f"Could not add {len(failed_edges)} link(s) to UserEdges for user {user_id}.")
+
+        # --- Count the new links on the owner's ActiveLinks counter ---
+        try:
+            dynamodb.Table(USERS_TABLE_NAME).update_item(
+                Key={'UserId': user_id},
+                UpdateExpression='ADD ActiveLinks :created',
+                ConditionExpression='attribute_exists(UserId)',
+                ExpressionAttributeValues={':created': len(created_codes)}
+            )
+        except ClientError as e:
+            print(f"Could not count {len(created_codes)} new link(s) for user {user_id}: {e}")
+
+    summary = {'created': len(created_codes), 'failed': len(results) - len(created_codes)}
+    lines = [json.dumps(result) for result in results]
+    lines.append(json.dumps({'summary': summary}))
+
+    return {
+        'statusCode': 200,
+        'headers': {**CORS_HEADERS, 'Content-Type': 'application/x-ndjson'},
+        'body': '\n'.join(lines) + '\n'
+    }
+
+
+def _build_link_item(link, user_id):
+    """
+    Validates one requested link and returns (item, None), or (None, error message).
+    The LinkId is filled in once codes have been allocated.
+    """
+    if not isinstance(link, dict) or not link.get('url'):
+        return None, 'Each link must be an object with a "url" field.'
+
+    is_password_protected = bool(link.get('isPasswordProtected', False))
+    password = link.get('password', '')
+    if is_password_protected and not password:
+        return None, 'Password must be provided when isPasswordProtected is true.'
+    if not is_password_protected:
+        password = ''  # enforce empty password when protection is off
+
+    return {
+        'UserId': user_id,
+        'String': link['url'],
+        'Name': link.get('name', ''),
+        'Description': link.get('description', ''),
+        'IsPrivate': bool(link.get('isPrivate', False)),
+        'IsPasswordProtected': is_password_protected,
+        'Password': password,
+        'NumberOfClicks': 0,
+        'Date': datetime.utcnow().isoformat(),
+        'IsActive': True
+    }, None
+
+
+def _create_links(items_by_index):
+    """
+    Stores the links with transact_write_items, up to MAX_TRANSACT_ITEMS per call.
+    Every Put is conditional on attribute_not_exists(LinkId), so a code taken by
+    a concurrent create is never overwritten. A transaction is all-or-nothing:
+    when it is cancelled, none of its items were written, the ones whose code
+    was taken get a new code and the chunk is retried.
+
+    Fills in item['LinkId'] and returns the indexes of the links that could not
+    be stored.
+    """
+    failed_indexes = set()
+    indexes = list(items_by_index)
+    for start in range(0, len(indexes), MAX_TRANSACT_ITEMS):
+        chunk = indexes[start:start + MAX_TRANSACT_ITEMS]
+        codes = set()
+        for index in chunk:
+            items_by_index[index]['LinkId'] = _new_code(codes)
+        attempt = 0
+        while True:
+            try:
+                dynamodb.meta.client.transact_write_items(TransactItems=[
+                    {'Put': {
+                        'TableName': LINKS_TABLE_NAME,
+                        'Item': items_by_index[index],
+                        'ConditionExpression': 'attribute_not_exists(LinkId)'
+                    }}
+                    for index in chunk
+                ])
+                break
+            except ClientError as e:
+                reasons = [reason.get('Code') for reason in e.response.get('CancellationReasons', [])]
+                attempt += 1
+                if attempt > MAX_BATCH_RETRIES:
+                    print(f"Gave up on {len(chunk)} link(s) after {MAX_BATCH_RETRIES} retries: {e}")
+                    failed_indexes.update(chunk)
+                    break
+                if 'ConditionalCheckFailed' in reasons:
+                    # Only the colliding codes are replaced; the retry is immediate
+                    for index, reason in zip(chunk, reasons):
+                        if reason == 'ConditionalCheckFailed':
+                            items_by_index[index]['LinkId'] = _new_code(codes)
+                elif e.response['Error']['Code'] in RETRYABLE_ERRORS or set(reasons) & RETRYABLE_ERRORS:
+                    time.sleep(min(0.05 * 2 ** attempt, 2))
+                else:
+                    print(f"Error creating {len(chunk)} link(s): {e}")
+                    failed_indexes.update(chunk)
+                    break
+    return failed_indexes
+
+
+def _new_code(codes):
+    """Returns a code not yet in `codes` (one transaction cannot touch an item twice) and adds it."""
+    code = generate_code()
+    while code in codes:
+        code = generate_code()
+    codes.add(code)
+    return code
+
+
+def _batch_write(table_name, items):
+    """
+    Writes items with batch_write_item in chunks of 25, retrying UnprocessedItems
+    with exponential backoff. Returns the items that could not be written.
+    """
+    failed_items = []
+    for start in range(0, len(items), 25):
+        chunk = items[start:start + 25]
+        request = {table_name: [{'PutRequest': {'Item': item}} for item in chunk]}
+        attempt = 0
+        try:
+            while request and attempt <= MAX_BATCH_RETRIES:
+                if attempt:
+                    time.sleep(min(0.05 * 2 ** attempt, 2))
+                response = dynamodb.batch_write_item(RequestItems=request)
+                request = response.get('UnprocessedItems')
+                attempt += 1
+        except ClientError as e:
+            # Earlier calls may have written part of the chunk; only what is
+            # still in the request is unwritten.
+            print(f"Error writing batch to {table_name}: {e}")
+            failed_items.extend(entry['PutRequest']['Item'] for entry in request.get(table_name, []))
+            continue
+        if request:
+            unprocessed = request.get(table_name, [])
+            print(f"Gave up on {len(unprocessed)} unprocessed item(s) in {table_name} after {MAX_BATCH_RETRIES} retries.")
+            failed_items.extend(entry['PutRequest']['Item'] for entry in unprocessed)
+    return failed_items
+
+
+def _error_response(status_code, message):
+    return {
+        'statusCode': status_code,
+        'headers': CORS_HEADERS,
+        'body': json.dumps({'error': message})
+    }
+
+
+# Example test event
+# if __name__ == "__main__":
+#     test_event = {
+#         'body': json.dumps({
+#             'userId': 'lior1',
+#             'links': [
+#                 {'url': 'https://example.com/a', 'name': 'A'},
+#                 {'url': 'https://example.com/b', 'name': 'B', 'isPrivate': True}
+#             ]
+#         })
+#     }
+#     print(lambda_handler(test_event, None))
@@ -31,10 +31,12 @@ def lambda_handler(event, context):
         'IsActive': True,
         #'Picture': user_attributes.get('picture', 'images/profile-photos/default-user.png'),
         'Picture': user_attributes.get('picture', 'https://shortly-rlt.s3.us-east-1.amazonaws.com/media/profile-photos/default-user.png'),
-        'Friends': "",
         'Email': email,
-        'Links': "",
         'Notifications': "",
+        'UnreadNotifications': 0,
+        'NumberOfClicks': 0,
+        'ActiveLinks': 0,
+        'AchievementCount': 0,
         'Achievements': "",
         'LinksClickedId': "",
     }
@@ -58,9 +58,11 @@ def lambda_handler(event, context):
             'DateJoined': creation_date,                                              # Timestamp of when record was created
             'IsActive': True,                                                         # Default new users to active
             'Picture': user_attributes.get('picture', 'images/profile-photos/default-user.png'),
-            'Friends': "",           # Stored as JSON string of friend records; empty until populated
-            'Links': "",             # JSON string of link IDs owned by user
             'Notifications': "",     # JSON string for notifications
+            'UnreadNotifications': 0,  # Counter kept in sync by every notification writer
+            'NumberOfClicks': 0,  # Aggregate counters, see reconcile-user-counters.py
+            'ActiveLinks': 0,
+            'AchievementCount': 0,
             'Achievements': "",      # JSON string for user achievements
             'LinksClickedId': ""     # JSON string tracking clicked link IDs
         }
@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import boto3
+import uuid
+from types import MappingProxyType
+from datetime import datetime, timezone
+from botocore.exceptions import ClientError
+
+# --- DynamoDB Table Names ---
+ACHIEVEMENTS_TABLE_NAME = os.environ.get('ACHIEVEMENTS_TABLE_NAME', 'Achievement')
+USER_ACHIEVEMENTS_TABLE_NAME = os.environ.get('USER_ACHIEVEMENTS_TABLE_NAME', 'UserAchievements')
+NOTIFICATIONS_TABLE_NAME = os.environ.get('NOTIFICATIONS_TABLE_NAME', 'Notifications')
+USERS_TABLE_NAME = os.environ.get('USERS_TABLE_NAME', 'Users')
+ACHIEVEMENT_CATALOG_TTL_SECONDS = float(os.environ.get('ACHIEVEMENT_CATALOG_TTL_SECONDS', '3600'))
+# Achievement notifications expire (DynamoDB TTL on ExpiresAt) after this many days
+ACHIEVEMENT_NOTIFICATION_RETENTION_DAYS = int(os.environ.get('ACHIEVEMENT_NOTIFICATION_RETENTION_DAYS', '180'))
+
+# --- Initialize DynamoDB ---
+dynamodb = boto3.resource('dynamodb')
+achievements_table = dynamodb.Table(ACHIEVEMENTS_TABLE_NAME)
+dynamodb_client = dynamodb.meta.client
+
+# Static achievement rows, loaded once per warm container and refreshed after the TTL.
+# The same rows define the click milestones compact_click_shards queues (ClickThreshold).
+_achievement_catalog = {'items': MappingProxyType({}), 'loaded_at': None}
+
+
+def lambda_handler(event, context):
+    """
+    Consumes milestone events queued by compact_click_shards (SQS trigger with
+    ReportBatchItemFailures enabled) and awards the matching achievements.
+
+    Each award is a single transaction, so redelivered or duplicate events never
+    award the same achievement, notification or profile entry twice.
+    """
+    failures = []
+    for record in event.get('Records', []):
+        try:
+            milestone_event = json.loads(record['body'])
+            _award_achievement(milestone_event)
+        except Exception as e:
+            print(f"Error processing achievement event {record.get('messageId')}: {e}")
+            failures.append({'itemIdentifier': record['messageId']})
+
+    return {'batchItemFailures': failures}
+
+
+def _award_achievement(milestone_event):
+    """
+    Writes the UserAchievements entry, the user's notification, the
+    Users.Achievements list entry and the unread counter bump together, or
+    nothing if already awarded.
+    """
+    user_id = milestone_event['userId']
+    link_id = milestone_event['linkId']
+    achievement_id = milestone_event['achievementId']
+    link_name = milestone_event.get('linkName', 'N/A')
+    sorting_key = f"{link_id}#{achievement_id}"
+    now = datetime.now(timezone.utc).isoformat()
+
+    user_achievement_item = {
+        'UserId': user_id,
+        'SortingKey': sorting_key,
+        'AchievementId': achievement_id,
+        'LinkId': link_id,
+        'LinkName': link_name,
+        'DateEarned': now
+    }
+    notification_text = (f"Your link '{link_name}' reached {milestone_event['milestone']} clicks! "
+                         f"You've earned the achievement: '{_get_achievement_name(achievement_id)}'.")
+    notification_item = {
+        'NotifId': str(uuid.uuid4()),
+        'ToUserId': user_id,
+        'LinkId': link_id,
+        'Text': notification_text,
+        'IsRead': 0,
+        'Timestamp': now,
+        'Type': 'achievement',
+        'ExpiresAt': int(time.time()) + ACHIEVEMENT_NOTIFICATION_RETENTION_DAYS * 86400
+    }
+
+    try:
+        _transact_award(user_achievement_item, notification_item, overwrite_achievements=False)
+    except ClientError as e:
+        reasons = [reason.get('Code') for reason in e.response.get('CancellationReasons', [])]
+        if e.response['Error']['Code'] != 'TransactionCanceledException':
+            raise
+        if reasons and reasons[0] == 'ConditionalCheckFailed':
+            print(f"User '{user_id}' already has achievement '{achievement_id}' for link '{link_id}'.")
+            return
+        if len(reasons) > 2 and reasons[2] == 'ValidationError':
+            # 'Achievements' exists but is not a list (e.g. the empty string set at
+            # sign-up), so list_append fails. Overwrite it with a new list instead.
+            _transact_award(user_achievement_item, notification_item, overwrite_achievements=True)
+        else:
+            raise
+
+    print(f"User '{user_id}' unlocked achievement '{achievement_id}' for link '{link_id}'.")
+
+
+def _transact_award(user_achievement_item, notification_item, overwrite_achievements):
+    """Runs the award transaction; see _award_achievement."""
+    if overwrite_achievements:
+        users_update = {
+            'Update': {
+                'TableName': USERS_TABLE_NAME,
+                'Key': {'UserId': user_achievement_item['UserId']},
+                'UpdateExpression': 'SET Achievements = :new_achievement ADD UnreadNotifications :one, AchievementCount :one',
+                'ConditionExpression': 'attribute_exists(UserId) AND NOT attribute_type(Achievements, :list_type)',
+                'ExpressionAttributeValues': {
+                    ':new_achievement': [user_achievement_item],
+                    ':list_type': 'L',
+                    ':one': 1
+                }
+            }
+        }
+    else:
+        users_update = {
+            'Update': {
+                'TableName': USERS_TABLE_NAME,
+                'Key': {'UserId': user_achievement_item['UserId']},
+                'UpdateExpression': (
+                    'SET Achievements = list_append(if_not_exists(Achievements, :empty_list), :new_achievement) '
+                    'ADD UnreadNotifications :one, AchievementCount :one'
+                ),
+                'ConditionExpression': 'attribute_exists(UserId)',
+                'ExpressionAttributeValues': {
+                    ':new_achievement': [user_achievement_item],
+                    ':empty_list': [],
+                    ':one': 1
+                }
+            }
+        }
+
+    dynamodb_client.transact_write_items(
+        TransactItems=[
+            {
+                'Put': {
+                    'TableName': USER_ACHIEVEMENTS_TABLE_NAME,
+                    'Item': user_achievement_item,
+                    'ConditionExpression': 'attribute_not_exists(SortingKey)'
+                }
+            },
+            {
+                'Put': {
+                    'TableName': NOTIFICATIONS_TABLE_NAME,
+                    'Item': notification_item
+                }
+            },
+            users_update
+        ]
+    )
+
+
+def _get_achievement_name(achievement_id):
+    """Looks up the display name of an achievement for the notification text."""
+    achievement = _get_achievement_catalog().get(achievement_id, {})
+    return achievement.get('Name', f"Achievement #{achievement_id}")
+
+
+def _get_achievement_catalog():
+    """
+    Returns the Achievement table as a read-only AchId -> item map, rescanning it
+    only when the cached copy is missing or older than the TTL.
+    """
+    now = time.monotonic()
+    loaded_at = _achievement_catalog['loaded_at']
+    if loaded_at is not None and now - loaded_at < ACHIEVEMENT_CATALOG_TTL_SECONDS:
+        return _achievement_catalog['items']
+
+    try:
+        items = {}
+        scan_kwargs = {}
+        while True:
+            response = achievements_table.scan(**scan_kwargs)
+            # Using 'AchId' to match the table schema
+            for item in response.get('Items', []):
+                items[item['AchId']] = MappingProxyType(item)
+            if 'LastEvaluatedKey' not in response:
+                break
+            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    except ClientError as e:
+        print(f"Could not load achievement catalog: {e}")
+        return _achievement_catalog['items']
+
+    _achievement_catalog['items'] = MappingProxyType(items)
+    _achievement_catalog['loaded_at'] = now
+    return _achievement_catalog['items']
+
+
+# test_event = {
+#     "Records": [{
+#         "messageId": "1",
+#         "body": json.dumps({
+#             "type": "milestone",
+#             "linkId": "test-link-123",
+#             "linkName": "Test Link",
+#             "userId": "test-user-456",
+#             "achievementId": "1",
+#             "milestone": 25
+#         })
+#     }]
+# }
+
+# # Call lambda handler with test event
+# print(lambda_handler(test_event, None))
@@ -1,6 +1,9 @@
+import os
 import json
+import time
 import boto3
 from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
 from datetime import datetime
 from uuid import uuid4
 from decimal import Decimal
@@ -9,6 +12,13 @@ from decimal import Decimal
 dynamodb = boto3.resource('dynamodb')
 notif_table = dynamodb.Table("Notifications")
 user_table = dynamodb.Table("Users")
+user_edges_table = dynamodb.Table(os.environ.get("USER_EDGES_TABLE_NAME", "UserEdges"))
+friendships_table = dynamodb.Table(os.environ.get("FRIENDSHIPS_TABLE_NAME", "Friendships"))
+# Answered requests and their replies expire (DynamoDB TTL on ExpiresAt) after this many days
+FRIEND_NOTIFICATION_RETENTION_DAYS = int(os.environ.get("FRIEND_NOTIFICATION_RETENTION_DAYS", "30"))
+# Transactions cancelled by a conflicting write or throttling are retried this many times
+MAX_TRANSACTION_RETRIES = 3
+RETRYABLE_CANCELLATION_REASONS = {"TransactionConflict", "ThrottlingError", "ProvisionedThroughputExceeded"}
 
 # CORS headers
 CORS_HEADERS = {
@@ -35,80 +45,139 @@ def lambda_handler(event, context):
         if not notification_id:
             return _res(400, "Missing NotifId.")
 
-        # Get the original friend request
-        notif_resp = notif_table.get_item(Key={"NotifId": notification_id})
-        notif = notif_resp.get("Item")
-        if not notif or notif.get("Status") != "pending":
-            return _res(404, "Pending friend request not found.")
-
-        from_user = notif["FromUserId"]
-        to_user = notif["ToUserId"]
-
-        # Mark original request as read and update status
-        notif_table.update_item(
-            Key={"NotifId": notification_id},
-            UpdateExpression="SET #s = :s, IsRead = :r",
-            ExpressionAttributeNames={"#s": "Status"},
-            ExpressionAttributeValues={
-                ":s": "accepted" if accept else "rejected",
-                ":r": 1
-            }
-        )
-
-        # Get both users
-        from_data = user_table.get_item(Key={"UserId": from_user}).get("Item")
-        to_data = user_table.get_item(Key={"UserId": to_user}).get("Item")
-        if not from_data or not to_data:
-            return _res(404, "One or both users not found.")
-
-        # Notify the sender
-        notif_table.put_item(
-            Item={
-                "NotifId": str(uuid4()),
-                "FromUserId": to_user,
-                "ToUserId": from_user,
-                "Status": "accepted" if accept else "rejected",
-                "IsRead": 1,
-                "Text": f"{to_data.get('Username', 'Someone')} {'accepted' if accept else 'rejected'} your friend request.",
-                "LinkId": "",
-                "Timestamp": datetime.utcnow().isoformat()
+        # The client sends the request's FromUserId, ToUserId and Timestamp from
+        # the notification list. The transaction conditions check all three
+        # against the stored request, so nothing has to be read first and the
+        # unread decrement below uses the stored Timestamp.
+        from_user = body.get("FromUserId")
+        to_user = body.get("ToUserId")
+        notif_timestamp = body.get("Timestamp")
+        if not from_user or not to_user or not notif_timestamp:
+            # Older clients only send the id
+            notif = notif_table.get_item(Key={"NotifId": notification_id}, ConsistentRead=True).get("Item")
+            if not notif or notif.get("Status") != "pending":
+                return _res(404, "Pending friend request not found.")
+            from_user = notif["FromUserId"]
+            to_user = notif["ToUserId"]
+            notif_timestamp = notif["Timestamp"]
+
+        status = "accepted" if accept else "rejected"
+        now = datetime.utcnow().isoformat()
+        expires_at = int(time.time()) + FRIEND_NOTIFICATION_RETENTION_DAYS * 86400
+
+        # The request status, the pair's state, the sender's notification and (on
+        # accept) one UserEdges item per direction commit together. The conditions
+        # make a second answer to the same request fail instead of re-applying it.
+        transact_items = [
+            {
+                "Update": {
+                    "TableName": notif_table.name,
+                    "Key": {"NotifId": notification_id},
+                    "UpdateExpression": "SET #s = :s, IsRead = :r, ExpiresAt = :expires_at",
+                    "ConditionExpression": (
+                        "#s = :pending AND FromUserId = :from_user AND ToUserId = :to_user AND #ts = :ts"
+                    ),
+                    "ExpressionAttributeNames": {"#s": "Status", "#ts": "Timestamp"},
+                    "ExpressionAttributeValues": {
+                        ":s": status,
+                        ":r": 1,
+                        ":expires_at": expires_at,
+                        ":pending": "pending",
+                        ":from_user": from_user,
+                        ":to_user": to_user,
+                        ":ts": notif_timestamp
+                    }
+                }
+            },
+            {
+                "Update": {
+                    "TableName": friendships_table.name,
+                    "Key": {"PairId": f"{min(from_user, to_user)}#{max(from_user, to_user)}"},
+                    "UpdateExpression": "SET #s = :s, UpdatedAt = :now",
+                    "ConditionExpression": "#s = :pending AND RequestedBy = :from_user",
+                    "ExpressionAttributeNames": {"#s": "Status"},
+                    "ExpressionAttributeValues": {
+                        ":s": status,
+                        ":now": now,
+                        ":pending": "pending",
+                        ":from_user": from_user
+                    }
+                }
+            },
+            {
+                "Put": {
+                    "TableName": notif_table.name,
+                    "Item": {
+                        "NotifId": str(uuid4()),
+                        "FromUserId": to_user,
+                        "ToUserId": from_user,
+                        "Status": status,
+                        "IsRead": 1,
+                        # get_all_notifications fills in the responder's current username
+                        "Text": f"{{username}} {status} your friend request.",
+                        "LinkId": "",
+                        "Timestamp": now,
+                        "Type": "friend_response",
+                        "ExpiresAt": expires_at
+                    }
+                }
             }
-        )
-
-        if not accept:
-            return _res(200, "Friend request rejected.")
-
-        # Update friend lists
-        def parse_friends(user):
-            raw = user.get("Friends", "[]")
+        ]
+        if accept:
+            transact_items += [
+                {"Put": {"TableName": user_edges_table.name, "Item": {
+                    "UserId": from_user, "EdgeKey": f"FRIEND#{to_user}", "TargetId": to_user, "CreatedAt": now
+                }}},
+                {"Put": {"TableName": user_edges_table.name, "Item": {
+                    "UserId": to_user, "EdgeKey": f"FRIEND#{from_user}", "TargetId": from_user, "CreatedAt": now
+                }}}
+            ]
+
+        attempt = 0
+        while True:
             try:
-                return set(json.loads(raw))
-            except:
-                return set()
-
-        from_friends = parse_friends(from_data)
-        to_friends = parse_friends(to_data)
-
-        from_friends.add(to_user)
-        to_friends.add(from_user)
-
-        user_table.update_item(
-            Key={"UserId": from_user},
-            UpdateExpression="SET Friends = :f",
-            ExpressionAttributeValues={":f": json.dumps(list(from_friends))}
-        )
-        user_table.update_item(
-            Key={"UserId": to_user},
-            UpdateExpression="SET Friends = :f",
-            ExpressionAttributeValues={":f": json.dumps(list(to_friends))}
-        )
-
-        return _res(200, "Friend request accepted.")
+                dynamodb.meta.client.transact_write_items(TransactItems=transact_items)
+                break
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "TransactionCanceledException":
+                    raise
+                reasons = [reason.get("Code") for reason in e.response.get("CancellationReasons", [])]
+                if "ConditionalCheckFailed" in reasons:
+                    return _res(409, "Pending friend request not found or already answered.")
+                print(f"[ERROR] Friend request transaction cancelled: {reasons}")
+                if not set(reasons) & RETRYABLE_CANCELLATION_REASONS:
+                    return _res(500, "Could not answer the friend request.")
+                attempt += 1
+                if attempt > MAX_TRANSACTION_RETRIES:
+                    return _res(503, "Could not answer the friend request right now. Please try again.")
+                time.sleep(0.05 * 2 ** attempt)
+
+        # A pending request is unread unless it is older than the read watermark;
+        # the condition on NotificationsReadAt makes this a no-op in that case.
+        _decrement_unread(to_user, notif_timestamp)
+
+        return _res(200, f"Friend request {status}.")
 
     except Exception as e:
         print("[ERROR]", str(e))
         return _res(500, f"Unexpected server error: {str(e)}")
 
+def _decrement_unread(user_id, notif_timestamp):
+    try:
+        user_table.update_item(
+            Key={"UserId": user_id},
+            UpdateExpression="ADD UnreadNotifications :minus_one",
+            ConditionExpression=(
+                "UnreadNotifications > :zero AND "
+                "(attribute_not_exists(NotificationsReadAt) OR NotificationsReadAt < :ts)"
+            ),
+            ExpressionAttributeValues={":minus_one": -1, ":zero": 0, ":ts": notif_timestamp}
+        )
+    except ClientError as e:
+        # Already counted as read by the watermark, or the counter is already zero
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+
 def _res(status, message):
     return {
         "statusCode": status,
@@ -1,12 +1,56 @@
 import os  # environment variables
 import json  # JSON parsing/serialization
 import boto3  # AWS SDK for Python
+import zlib  # stable LinkId hash for the cache stamp bucket
 from botocore.exceptions import ClientError  # catch DynamoDB errors
 
 # Initialize DynamoDB resource (uses IAM role or AWS credentials)
 dynamodb = boto3.resource('dynamodb')
 # Table name for Links; override via environment variable if needed
 TABLE_NAME = os.environ.get('LINKS_TABLE', 'Links')
+# Stamp table read by track_click's warm-container link cache
+CACHE_STAMPS_TABLE_NAME = os.environ.get('CACHE_STAMPS_TABLE_NAME', 'CacheStamps')
+cache_stamps_table = dynamodb.Table(CACHE_STAMPS_TABLE_NAME)
+# Users table, whose ActiveLinks counter follows the link's IsActive flag
+USERS_TABLE_NAME = os.environ.get('USERS_TABLE_NAME', 'Users')
+users_table = dynamodb.Table(USERS_TABLE_NAME)
+
+
+# Copied verbatim into each link writer (delete_link, restore_link, set_link_password,
+# remove_link_password, toggle_link_privacy): they deploy as single files without a
+# shared layer. track_click's _link_cache_bucket must hash the same way, and
+# LINK_CACHE_STAMP_BUCKETS must have the same value in all six functions.
+LINK_CACHE_STAMP_BUCKETS = int(os.environ.get('LINK_CACHE_STAMP_BUCKETS', '64'))
+
+def _bump_links_cache_stamp(link_id):
+    """
+    Bumps the version of the link's bucket on the Links cache stamp, so warm
+    track_click containers drop the cached links in that bucket (this one and about
+    1/LINK_CACHE_STAMP_BUCKETS of the others) instead of their whole cache.
+    """
+    bucket = zlib.crc32(link_id.encode()) % LINK_CACHE_STAMP_BUCKETS
+    try:
+        cache_stamps_table.update_item(
+            Key={'StampId': 'Links'},
+            UpdateExpression='ADD #bucket :one',
+            ExpressionAttributeNames={'#bucket': f"B{bucket}"},
+            ExpressionAttributeValues={':one': 1}
+        )
+    except ClientError as e:
+        print(f"Could not bump links cache stamp: {e}")
+
+
+def _adjust_active_links(user_id, delta):
+    """ADDs delta to the owner's Users.ActiveLinks counter (errors are only logged)."""
+    try:
+        users_table.update_item(
+            Key={'UserId': user_id},
+            UpdateExpression='ADD ActiveLinks :delta',
+            ConditionExpression='attribute_exists(UserId)',
+            ExpressionAttributeValues={':delta': delta}
+        )
+    except ClientError as e:
+        print(f"Could not update ActiveLinks for user {user_id}: {e}")
 
 
 def lambda_handler(event, context):
@@ -37,11 +81,12 @@ def lambda_handler(event, context):
 
     try:
         # 2. Update item: set IsActive to True, only if LinkId exists
-        table.update_item(
+        response = table.update_item(
             Key={'LinkId': link_id},
             UpdateExpression='SET IsActive = :true_val',
             ExpressionAttributeValues={':true_val': True},
-            ConditionExpression='attribute_exists(LinkId)'
+            ConditionExpression='attribute_exists(LinkId)',
+            ReturnValues='ALL_OLD'
         )
     except ClientError as e:
         error_code = e.response['Error']['Code']
@@ -55,6 +100,13 @@ def lambda_handler(event, context):
             'body': json.dumps({'error': f'Unable to restore link: {e.response.get("Error", {}).get("Message", str(e))}'})
         }
 
+    _bump_links_cache_stamp(link_id)
+
+    # Only an actual inactive -> active change moves the owner's counter
+    old_link = response.get('Attributes', {})
+    if not old_link.get('IsActive', True) and old_link.get('UserId'):
+        _adjust_active_links(old_link['UserId'], 1)
+
     # 3. Return success
     return {
         'statusCode': 200,
@@ -1,12 +1,19 @@
+import os
 import json
 import boto3
 import uuid
 from datetime import datetime
-from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
 
 dynamodb = boto3.resource('dynamodb')
 users_table = dynamodb.Table("Users")
 notification_table = dynamodb.Table("Notifications")
+# One item per user pair: PairId = "<smaller id>#<larger id>",
+# Status pending -> accepted | rejected, RequestedBy = sender of the latest request
+friendships_table = dynamodb.Table(os.environ.get("FRIENDSHIPS_TABLE_NAME", "Friendships"))
+
+def pair_id(user_a, user_b):
+    return f"{min(user_a, user_b)}#{max(user_a, user_b)}"
 
 def lambda_handler(event, context):
     try:
@@ -17,39 +24,28 @@ def lambda_handler(event, context):
         if from_user == to_user:
             return _res(400, "Cannot send request to yourself.")
 
-        # Check both users exist
-        from_data = users_table.get_item(Key={"UserId": from_user}).get("Item")
-        to_data = users_table.get_item(Key={"UserId": to_user}).get("Item")
-        if not from_data or not to_data:
+        # Sender's name for the notification text
+        from_data = users_table.get_item(
+            Key={"UserId": from_user},
+            ProjectionExpression="UserId, Username"
+        ).get("Item")
+        if not from_data:
             return _res(404, "User not found.")
 
-        # Look for existing friend requests between these users (any direction)
-        existing = notification_table.scan(
-            FilterExpression=(
-                (Attr("FromUserId").eq(from_user) & Attr("ToUserId").eq(to_user)) |
-                (Attr("FromUserId").eq(to_user) & Attr("ToUserId").eq(from_user))
-            )
-        )
-
-        for req in existing.get("Items", []):
-            status = req.get("Status")
-            sender = req.get("FromUserId")
-            receiver = req.get("ToUserId")
-
-            if status == "pending":
-                return _res(400, "A friend request is already pending between these users.")
-
-            if status == "accepted":
-                return _res(400, "You are already friends.")
-
-            if status == "rejected":
-                if sender == from_user:
-                    return _res(400, "Your previous request was rejected. Let the other user send a request.")
-
-        # No conflict, create friend request notification
         notif_id = str(uuid.uuid4())
+        now = datetime.utcnow().isoformat()
         text = f"{from_data.get('Username', 'Someone')} wants to be friends."
 
+        friendship = {
+            "PairId": pair_id(from_user, to_user),
+            "UserA": min(from_user, to_user),
+            "UserB": max(from_user, to_user),
+            "Status": "pending",
+            "RequestedBy": from_user,
+            "NotifId": notif_id,
+            "UpdatedAt": now
+        }
+
         item = {
             "NotifId": notif_id,
             "FromUserId": from_user,
@@ -58,7 +54,9 @@ def lambda_handler(event, context):
             "IsRead": 0,
             "Text": text,
             "LinkId": "",
-            "Timestamp": datetime.utcnow().isoformat()
+            "Timestamp": now,
+            # No ExpiresAt while pending; respond_to_friend_request sets it on answer
+            "Type": "friend_request"
         }
         
         # Example Request Body
@@ -96,13 +94,63 @@ def lambda_handler(event, context):
             # }
         
         
-        notification_table.put_item(Item=item)
+        # A new pair, or one whose last request was rejected by the user who is
+        # now asking, can become pending. The pair item, the notification and the
+        # recipient's unread counter are written together.
+        try:
+            dynamodb.meta.client.transact_write_items(
+                TransactItems=[
+                    {
+                        "Put": {
+                            "TableName": friendships_table.name,
+                            "Item": friendship,
+                            "ConditionExpression": "attribute_not_exists(PairId) OR (#s = :rejected AND RequestedBy <> :from_user)",
+                            "ExpressionAttributeNames": {"#s": "Status"},
+                            "ExpressionAttributeValues": {":rejected": "rejected", ":from_user": from_user}
+                        }
+                    },
+                    {"Put": {"TableName": notification_table.name, "Item": item}},
+                    {
+                        "Update": {
+                            "TableName": users_table.name,
+                            "Key": {"UserId": to_user},
+                            "UpdateExpression": "ADD UnreadNotifications :one",
+                            "ConditionExpression": "attribute_exists(UserId)",
+                            "ExpressionAttributeValues": {":one": 1}
+                        }
+                    }
+                ]
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "TransactionCanceledException":
+                raise
+            reasons = [reason.get("Code") for reason in e.response.get("CancellationReasons", [])]
+            if len(reasons) > 2 and reasons[2] == "ConditionalCheckFailed":
+                return _res(404, "User not found.")
+            if reasons and reasons[0] == "ConditionalCheckFailed":
+                return _res(400, _conflict_message(friendship["PairId"], from_user))
+            raise
+
         return _res(200, {"message": "Friend request sent.", "NotificationId": notif_id})
 
     except Exception as e:
         return _res(500, str(e))
 
 
+def _conflict_message(pair, from_user):
+    """Explains why a new request is not allowed, from the existing pair item."""
+    existing = friendships_table.get_item(Key={"PairId": pair}).get("Item", {})
+    status = existing.get("Status")
+
+    if status == "pending":
+        return "A friend request is already pending between these users."
+    if status == "accepted":
+        return "You are already friends."
+    if status == "rejected" and existing.get("RequestedBy") == from_user:
+        return "Your previous request was rejected. Let the other user send a request."
+    return "A friend request between these users was just updated. Please try again."
+
+
 def _res(status, message):
     return {
         "statusCode": status,
@@ -1,5 +1,6 @@
 import json
 import boto3
+import zlib
 import os
 from botocore.exceptions import ClientError
 
@@ -7,6 +8,8 @@ from botocore.exceptions import ClientError
 dynamodb = boto3.resource('dynamodb')
 LINKS_TABLE_NAME = os.environ.get('LINKS_TABLE_NAME', 'Links')
 links_table = dynamodb.Table(LINKS_TABLE_NAME)
+CACHE_STAMPS_TABLE_NAME = os.environ.get('CACHE_STAMPS_TABLE_NAME', 'CacheStamps')
+cache_stamps_table = dynamodb.Table(CACHE_STAMPS_TABLE_NAME)
 
 def _make_response(status_code, body):
     """Creates a CORS-compliant API response."""
@@ -21,6 +24,29 @@ def _make_response(status_code, body):
         'body': json.dumps(body)
     }
 
+# Copied verbatim into each link writer (delete_link, restore_link, set_link_password,
+# remove_link_password, toggle_link_privacy): they deploy as single files without a
+# shared layer. track_click's _link_cache_bucket must hash the same way, and
+# LINK_CACHE_STAMP_BUCKETS must have the same value in all six functions.
+LINK_CACHE_STAMP_BUCKETS = int(os.environ.get('LINK_CACHE_STAMP_BUCKETS', '64'))
+
+def _bump_links_cache_stamp(link_id):
+    """
+    Bumps the version of the link's bucket on the Links cache stamp, so warm
+    track_click containers drop the cached links in that bucket (this one and about
+    1/LINK_CACHE_STAMP_BUCKETS of the others) instead of their whole cache.
+    """
+    bucket = zlib.crc32(link_id.encode()) % LINK_CACHE_STAMP_BUCKETS
+    try:
+        cache_stamps_table.update_item(
+            Key={'StampId': 'Links'},
+            UpdateExpression='ADD #bucket :one',
+            ExpressionAttributeNames={'#bucket': f"B{bucket}"},
+            ExpressionAttributeValues={':one': 1}
+        )
+    except ClientError as e:
+        print(f"Could not bump links cache stamp: {e}")
+
 def lambda_handler(event, context):
     """
     Sets a password for a link that doesn't have one, with an ownership check.
@@ -59,6 +85,7 @@ def lambda_handler(event, context):
             },
             ReturnValues="UPDATED_NEW"
         )
+        _bump_links_cache_stamp(link_id)
         
         return _make_response(200, {'message': 'Password set successfully.'})
 
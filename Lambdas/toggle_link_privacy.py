@@ -1,10 +1,37 @@
+import os
 import json
 import boto3
+import zlib
 from botocore.exceptions import ClientError
 
 # Initialize the DynamoDB resource
 dynamodb = boto3.resource('dynamodb')
 LINKS_TABLE = 'Links'
+CACHE_STAMPS_TABLE_NAME = os.environ.get('CACHE_STAMPS_TABLE_NAME', 'CacheStamps')
+cache_stamps_table = dynamodb.Table(CACHE_STAMPS_TABLE_NAME)
+
+# Copied verbatim into each link writer (delete_link, restore_link, set_link_password,
+# remove_link_password, toggle_link_privacy): they deploy as single files without a
+# shared layer. track_click's _link_cache_bucket must hash the same way, and
+# LINK_CACHE_STAMP_BUCKETS must have the same value in all six functions.
+LINK_CACHE_STAMP_BUCKETS = int(os.environ.get('LINK_CACHE_STAMP_BUCKETS', '64'))
+
+def _bump_links_cache_stamp(link_id):
+    """
+    Bumps the version of the link's bucket on the Links cache stamp, so warm
+    track_click containers drop the cached links in that bucket (this one and about
+    1/LINK_CACHE_STAMP_BUCKETS of the others) instead of their whole cache.
+    """
+    bucket = zlib.crc32(link_id.encode()) % LINK_CACHE_STAMP_BUCKETS
+    try:
+        cache_stamps_table.update_item(
+            Key={'StampId': 'Links'},
+            UpdateExpression='ADD #bucket :one',
+            ExpressionAttributeNames={'#bucket': f"B{bucket}"},
+            ExpressionAttributeValues={':one': 1}
+        )
+    except ClientError as e:
+        print(f"Could not bump links cache stamp: {e}")
 
 def lambda_handler(event, context):
     """
@@ -58,6 +85,7 @@ def lambda_handler(event, context):
                 ':new_status': new_status
             }
         )
+        _bump_links_cache_stamp(link_id)
         
         # Return a success message with the new flipped state
         return {
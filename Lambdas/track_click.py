@@ -1,32 +1,93 @@
 import os
 import json
-import boto3
 import uuid
+import boto3
+import hashlib
+import random
+import time
+import mmap
+import sys
+import struct
+import socket
+import bisect
+import signal
+import threading
+import zlib
+from collections import OrderedDict, deque
 from datetime import datetime, timezone
+from urllib.parse import urlparse
 from botocore.exceptions import ClientError
 from decimal import Decimal
 
-# --- DynamoDB Table Names & Constants (Unchanged) ---
+# --- DynamoDB Table Names & Constants ---
 LINKS_TABLE_NAME = os.environ.get('LINKS_TABLE_NAME', 'Links')
-ACHIEVEMENTS_TABLE_NAME = os.environ.get('ACHIEVEMENTS_TABLE_NAME', 'Achievement')
-USER_ACHIEVEMENTS_TABLE_NAME = os.environ.get('USER_ACHIEVEMENTS_TABLE_NAME', 'UserAchievements')
-NOTIFICATIONS_TABLE_NAME = os.environ.get('NOTIFICATIONS_TABLE_NAME', 'Notifications')
-USERS_TABLE_NAME = os.environ.get('USERS_TABLE_NAME', 'Users')
-
-ACHIEVEMENT_MILESTONES = {
-    25: '1',
-    100: '2',
-    1000: '3',
-    10000: '4'
-}
-
-# --- Initialize DynamoDB (Unchanged) ---
+CLICK_SHARDS_TABLE_NAME = os.environ.get('CLICK_SHARDS_TABLE_NAME', 'LinkClickShards')
+CACHE_STAMPS_TABLE_NAME = os.environ.get('CACHE_STAMPS_TABLE_NAME', 'CacheStamps')
+LINK_CLICKS_TABLE_NAME = os.environ.get('LINK_CLICKS_TABLE_NAME', 'LinkClicks')
+LINKS_CACHE_STAMP_ID = 'Links'
+
+# Clicks are spread over this many counter items per link so a viral link does not
+# serialize every increment on one item. May be raised later, never lowered.
+CLICK_COUNTER_SHARDS = int(os.environ.get('CLICK_COUNTER_SHARDS', '10'))
+
+# Warm containers keep recently redirected links in memory. Entries expire after
+# the TTL. The Links stamp item holds one version per bucket of LinkIds (bumped by
+# delete/restore/privacy/password changes), and when a bucket's version moves only
+# the cached links in that bucket are dropped; the stamp is re-read at most once
+# per LINK_CACHE_STAMP_CHECK_SECONDS. LINK_CACHE_STAMP_BUCKETS must match the
+# link writers' (see _link_cache_bucket).
+LINK_CACHE_MAX_ENTRIES = int(os.environ.get('LINK_CACHE_MAX_ENTRIES', '5000'))
+LINK_CACHE_TTL_SECONDS = float(os.environ.get('LINK_CACHE_TTL_SECONDS', '300'))
+LINK_CACHE_STAMP_CHECK_SECONDS = float(os.environ.get('LINK_CACHE_STAMP_CHECK_SECONDS', '2'))
+LINK_CACHE_STAMP_BUCKETS = int(os.environ.get('LINK_CACHE_STAMP_BUCKETS', '64'))
+LINK_CACHE_REPORT_EVERY = 1000
+
+# Click events for the LinkClicks analytics table are sent off the response path:
+# the redirect only appends the event to an in-memory buffer, and a background
+# sender thread resolves its country and hands the buffer to the click-events
+# queue with send_message_batch, 10 per call (write_click_events then writes them
+# to LinkClicks). Without a queue it writes them with batch_write_item, 25 per
+# call. The sender is woken by every click, so the buffer normally drains within
+# milliseconds; events still buffered when the container is frozen go out as soon
+# as it thaws, and SIGTERM (sent before shutdown when an extension is registered)
+# flushes the rest. Events that cannot be sent are retried after
+# CLICK_RETRY_SECONDS; beyond CLICK_BUFFER_HARD_LIMIT the oldest are dropped.
+CLICK_EVENTS_QUEUE_URL = os.environ.get('CLICK_EVENTS_QUEUE_URL', '')
+CLICK_BUFFER_HARD_LIMIT = int(os.environ.get('CLICK_BUFFER_HARD_LIMIT', '1000'))
+CLICK_RETRY_SECONDS = float(os.environ.get('CLICK_RETRY_SECONDS', '1'))
+SQS_BATCH_SIZE = 10
+BATCH_WRITE_SIZE = 25
+
+# Secret salt for the visitor hash; without it the hash cannot be tied back
+# to an IP address or user.
+VISITOR_HASH_SALT = os.environ.get('VISITOR_HASH_SALT', '')
+
+# Clicks without a CloudFront country header are resolved offline from the
+# range table built by build-geoip-table.py, memory-mapped once per warm
+# container from GEOIP_TABLE_PATH (e.g. a Lambda layer under /opt). When the file
+# is not there it is first downloaded to /tmp from GEOIP_TABLE_S3_URI, if set.
+GEOIP_TABLE_PATH = os.environ.get('GEOIP_TABLE_PATH', '/opt/geoip/countries.bin')
+GEOIP_TABLE_S3_URI = os.environ.get('GEOIP_TABLE_S3_URI', '')
+GEOIP_MAGIC = b'GEOIP1\0\0'
+
+# --- Initialize DynamoDB ---
 dynamodb = boto3.resource('dynamodb')
 links_table = dynamodb.Table(LINKS_TABLE_NAME)
-achievements_table = dynamodb.Table(ACHIEVEMENTS_TABLE_NAME)
-user_achievements_table = dynamodb.Table(USER_ACHIEVEMENTS_TABLE_NAME)
-notifications_table = dynamodb.Table(NOTIFICATIONS_TABLE_NAME)
-users_table = dynamodb.Table(USERS_TABLE_NAME)
+click_shards_table = dynamodb.Table(CLICK_SHARDS_TABLE_NAME)
+cache_stamps_table = dynamodb.Table(CACHE_STAMPS_TABLE_NAME)
+sqs_client = boto3.client('sqs')
+
+# --- Warm-container link cache (survives between invocations) ---
+_link_cache = OrderedDict()  # LinkId -> (expires_at, link_item), least recently used first
+_link_cache_stamp = {'versions': None, 'checked_at': 0.0}  # bucket attribute -> version
+_link_cache_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+# --- Warm-container click event buffer, drained by the sender thread ---
+_click_buffer = deque()
+_click_sender = {'thread': None, 'wakeup': threading.Event(), 'lock': threading.Lock(), 'sent': 0, 'dropped': 0}
+
+# --- Warm-container GeoIP range table (memoryviews over the mapped file) ---
+_geoip = {'loaded': False, 'starts': None, 'ends': None, 'codes': None, 'countries': ()}
 
 class DecimalEncoder(json.JSONEncoder):
     """Helper class to convert a DynamoDB item to JSON."""
@@ -49,7 +110,7 @@ def _create_response(status_code, body, encoder=None):
 
 def lambda_handler(event, context):
     """
-    Handles a link click, increments count, and returns either the redirect URL
+    Handles a link click, increments the click counter, and returns either the redirect URL
     or a flag indicating that a password is required.
     """
     if event.get('httpMethod') == 'OPTIONS':
@@ -66,8 +127,7 @@ def lambda_handler(event, context):
         return _create_response(400, {'error': 'Missing link code in request body.'})
         
     try:
-        response = links_table.get_item(Key={'LinkId': link_id})
-        link_item = response.get('Item')
+        link_item = _get_link(link_id)
         # Also check if link is active
         if not link_item or not link_item.get('IsActive', True):
             return _create_response(404, {'error': 'Link not found or is inactive.'})
@@ -75,32 +135,18 @@ def lambda_handler(event, context):
         print(f"Error getting link: {e}")
         return _create_response(500, {'error': 'Could not retrieve link.'})
 
-    # --- Click Increment & Achievement Logic (Unchanged from your version) ---
+    # --- Click Increment ---
+    # Milestone achievements are not handled here: compact_click_shards detects
+    # milestone crossings when it folds the shards, and process_achievement_events
+    # awards them off the redirect path.
     link_owner_id = link_item.get('UserId')
-    new_click_count = int(link_item.get('NumberOfClicks', 0))
 
     if not (link_owner_id and clicker_user_id and link_owner_id == clicker_user_id):
-        current_click_count = new_click_count
-        new_click_count += 1
         try:
-            links_table.update_item(
-                Key={'LinkId': link_id},
-                UpdateExpression='SET NumberOfClicks = :c',
-                ExpressionAttributeValues={':c': new_click_count}
-            )
-            # Achievement check logic follows...
-            for milestone, achievement_id in ACHIEVEMENT_MILESTONES.items():
-                if new_click_count >= milestone:
-                    if link_owner_id:
-                        _handle_achievement_unlock(
-                            user_id=link_owner_id,
-                            link_item=link_item,
-                            achievement_id=achievement_id,
-                            click_count=milestone
-                        )
+            _increment_click_shard(link_id)
         except ClientError as e:
             print(f"Error updating click count: {e}")
-            new_click_count = current_click_count # Revert on error
+        _record_click_event(link_id, event, body)
 
     # --- MODIFIED RESPONSE LOGIC ---
     is_password_protected = link_item.get('IsPasswordProtected', False)
@@ -117,106 +163,287 @@ def lambda_handler(event, context):
             'Location': link_item.get('String')
         })
 
-# --- Helper Functions for Achievements ---
+def _get_link(link_id):
+    """
+    Returns the redirect-relevant fields of a link, served from the warm-container
+    cache when possible. Returns None if the link does not exist.
+    """
+    now = time.monotonic()
+    _check_link_cache_stamp(now)
+
+    cached = _link_cache.get(link_id)
+    if cached and cached[0] > now:
+        _link_cache.move_to_end(link_id)
+        _record_link_cache_lookup('hits')
+        return cached[1]
 
-def _handle_achievement_unlock(user_id, link_item, achievement_id, click_count):
+    _record_link_cache_lookup('misses')
+    # Strongly consistent, so a miss right after a stamp bump cannot cache the
+    # link's pre-change state for the whole TTL.
+    response = links_table.get_item(
+        Key={'LinkId': link_id},
+        ProjectionExpression='LinkId, UserId, #s, IsActive, IsPasswordProtected',
+        ExpressionAttributeNames={'#s': 'String'},
+        ConsistentRead=True
+    )
+    link_item = response.get('Item')
+    if link_item:
+        _link_cache[link_id] = (now + LINK_CACHE_TTL_SECONDS, link_item)
+        _link_cache.move_to_end(link_id)
+        while len(_link_cache) > LINK_CACHE_MAX_ENTRIES:
+            _link_cache.popitem(last=False)
+    return link_item
+
+def _link_cache_bucket(link_id):
     """
-    Awards an achievement, sends a notification, and updates the user's profile.
+    Returns the stamp bucket of a link. Must hash exactly like the link writers'
+    _bump_links_cache_stamp, which is why it is a CRC32 and not hash().
     """
-    link_id = link_item['LinkId']
-    sorting_key = f"{link_id}#{achievement_id}"
-    
+    return zlib.crc32(link_id.encode()) % LINK_CACHE_STAMP_BUCKETS
+
+def _check_link_cache_stamp(now):
+    """
+    Re-reads the Links cache stamp if it is due and drops the cached links of every
+    bucket another function has bumped since the last check.
+    """
+    if now - _link_cache_stamp['checked_at'] < LINK_CACHE_STAMP_CHECK_SECONDS:
+        return
     try:
-        # Prevent re-awarding the same achievement for the same link
-        response = user_achievements_table.get_item(Key={'UserId': user_id, 'SortingKey': sorting_key})
-        if 'Item' in response:
-            print(f"User '{user_id}' already has achievement '{achievement_id}' for link '{link_id}'.")
-            return
+        response = cache_stamps_table.get_item(
+            Key={'StampId': LINKS_CACHE_STAMP_ID},
+            ConsistentRead=True
+        )
     except ClientError as e:
-        print(f"Error checking existing achievement: {e}")
+        print(f"Could not read links cache stamp, dropping cache: {e}")
+        _link_cache.clear()
         return
+    versions = {name: int(value) for name, value in response.get('Item', {}).items() if name.startswith('B')}
+    previous = _link_cache_stamp['versions']
+    if previous is None:
+        _link_cache.clear()
+    elif versions != previous:
+        changed = {int(name[1:]) for name in versions.keys() | previous.keys()
+                   if versions.get(name) != previous.get(name)}
+        stale = [link_id for link_id in _link_cache if _link_cache_bucket(link_id) in changed]
+        for link_id in stale:
+            del _link_cache[link_id]
+        if stale:
+            _link_cache_stats['invalidations'] += 1
+    _link_cache_stamp['versions'] = versions
+    _link_cache_stamp['checked_at'] = now
+
+def _record_link_cache_lookup(outcome):
+    """Counts a cache hit or miss and periodically logs the running totals."""
+    _link_cache_stats[outcome] += 1
+    lookups = _link_cache_stats['hits'] + _link_cache_stats['misses']
+    if lookups % LINK_CACHE_REPORT_EVERY == 0:
+        print(f"Link cache: {_link_cache_stats['hits']} hits, {_link_cache_stats['misses']} misses, "
+              f"{_link_cache_stats['invalidations']} invalidations, {len(_link_cache)} entries.")
+
+def _increment_click_shard(link_id):
+    """
+    Atomically adds one click to a randomly chosen counter shard of the link.
+    The shards are folded back into Links.NumberOfClicks by compact_click_shards.
+    """
+    shard = random.randrange(CLICK_COUNTER_SHARDS)
+    click_shards_table.update_item(
+        Key={'ShardKey': f"{link_id}#{shard}"},
+        UpdateExpression='SET LinkId = :lid ADD Clicks :one',
+        ExpressionAttributeValues={':lid': link_id, ':one': 1}
+    )
+
+def _record_click_event(link_id, event, body):
+    """
+    Buffers a compact click event for the sender thread; nothing here waits on
+    the network. Analytics are best effort: errors are logged and never fail the
+    redirect.
+    """
+    headers = {key.lower(): value for key, value in (event.get('headers') or {}).items()}
+    click = {
+        'ClickId': uuid.uuid4().hex,
+        'LinkId': link_id,
+        'Timestamp': datetime.now(timezone.utc).isoformat(),
+        'Referrer': _referrer_host(body.get('referrer')),
+        'UserAgentClass': _user_agent_class(headers.get('user-agent', '')),
+        'VisitorHash': _visitor_hash(event, headers, body.get('userId'))
+    }
+    # Set by CloudFront (edge-optimized API endpoints), else resolved offline by
+    # the sender, which also loads the GeoIP table
+    country = headers.get('cloudfront-viewer-country')
+    _click_buffer.append((click, country, None if country else _source_ip(event)))
+
+    if len(_click_buffer) > CLICK_BUFFER_HARD_LIMIT:
+        _click_buffer.popleft()
+        _click_sender['dropped'] += 1
+        if _click_sender['dropped'] % 100 == 1:
+            print(f"Click buffer full, {_click_sender['dropped']} event(s) dropped "
+                  f"({_click_sender['sent']} sent so far).")
+    _start_click_sender()
+    _click_sender['wakeup'].set()
+
+def _start_click_sender():
+    """Starts the sender thread on the first click of the container."""
+    if _click_sender['thread'] is None:
+        _click_sender['thread'] = threading.Thread(target=_run_click_sender, name='click-sender', daemon=True)
+        _click_sender['thread'].start()
+
+def _run_click_sender():
+    """Sends buffered events whenever a click arrives, retrying failed sends."""
+    if not _geoip['loaded']:
+        _load_geoip_table()
+    while True:
+        _click_sender['wakeup'].wait(CLICK_RETRY_SECONDS if _click_buffer else None)
+        _click_sender['wakeup'].clear()
+        try:
+            _flush_click_buffer()
+        except Exception as e:
+            # Keep the thread alive; the events stay buffered for the next attempt
+            print(f"Error sending click events: {e}")
+
+def _flush_click_buffer():
+    """
+    Sends the buffered events, SQS_BATCH_SIZE (or BATCH_WRITE_SIZE without a
+    queue) per call. Events that were not accepted go back to the front of the
+    buffer and the flush stops until the next wakeup or retry.
+    """
+    batch_size = SQS_BATCH_SIZE if CLICK_EVENTS_QUEUE_URL else BATCH_WRITE_SIZE
+    with _click_sender['lock']:
+        while _click_buffer:
+            batch = []
+            while _click_buffer and len(batch) < batch_size:
+                batch.append(_click_buffer.popleft())
+            clicks = [_with_country(*entry) for entry in batch]
+            failed = _send_clicks(clicks)
+            _click_sender['sent'] += len(clicks) - len(failed)
+            if failed:
+                _click_buffer.extendleft(reversed([(click, click['Country'], None) for click in failed]))
+                return
 
-    print(f"User '{user_id}' unlocking achievement '{achievement_id}' for link '{link_id}'.")
+def _with_country(click, country, ip):
+    return {**click, 'Country': country or _country_for_ip(ip) or 'Unknown'}
 
-    # Get achievement details for the notification text
+def _send_clicks(clicks):
+    """Sends one batch of click events. Returns the events that were not accepted."""
     try:
-        # Using 'AchId' to match the table schema
-        response = achievements_table.get_item(Key={'AchId': achievement_id})
-        achievement_item = response.get('Item', {})
-        achievement_name = achievement_item.get('Name', f"Achievement #{achievement_id}")
+        if CLICK_EVENTS_QUEUE_URL:
+            response = sqs_client.send_message_batch(QueueUrl=CLICK_EVENTS_QUEUE_URL, Entries=[
+                {'Id': str(index), 'MessageBody': json.dumps(click)} for index, click in enumerate(clicks)
+            ])
+            return [clicks[int(failure['Id'])] for failure in response.get('Failed', [])]
+        response = dynamodb.batch_write_item(RequestItems={
+            LINK_CLICKS_TABLE_NAME: [{'PutRequest': {'Item': click}} for click in clicks]
+        })
+        return [request['PutRequest']['Item']
+                for request in response.get('UnprocessedItems', {}).get(LINK_CLICKS_TABLE_NAME, [])]
     except ClientError as e:
-        print(f"Could not fetch achievement name: {e}")
-        achievement_name = f"Achievement #{achievement_id}"
-    
-    # Create the entry in UserAchievements table
+        print(f"Error sending {len(clicks)} click event(s): {e}")
+        return clicks
+
+def _flush_on_sigterm(signum, frame):
+    """Sends what is still buffered before the runtime shuts down."""
     try:
-        user_achievement_item = {
-            'UserId': user_id,
-            'SortingKey': sorting_key,
-            'AchievementId': achievement_id,
-            'LinkId': link_id,
-            'LinkName': link_item.get('Name', 'N/A'),
-            'DateEarned': datetime.now(timezone.utc).isoformat()
-        }
-        user_achievements_table.put_item(Item=user_achievement_item)
-    except ClientError as e:
-        print(f"Error awarding achievement: {e}")
-        return
+        _flush_click_buffer()
+    finally:
+        sys.exit(0)
+
+try:
+    signal.signal(signal.SIGTERM, _flush_on_sigterm)
+except ValueError:
+    # Not imported from the main thread (e.g. by a test runner); no shutdown flush
+    pass
 
-    # Update the User's own record with the new achievement
-    _update_user_achievements_list(user_id, user_achievement_item)
+def _visitor_hash(event, headers, user_id):
+    """
+    Salted 64-bit hash identifying the visitor (the signed-in user, otherwise the
+    source IP and User-Agent), used only to feed the unique-visitor sketches.
+    """
+    if user_id:
+        visitor = f"user:{user_id}"
+    else:
+        visitor = f"ip:{_source_ip(event)}|{headers.get('user-agent', '')}"
+    return hashlib.sha256(f"{VISITOR_HASH_SALT}|{visitor}".encode()).hexdigest()[:16]
+
+def _source_ip(event):
+    return (event.get('requestContext') or {}).get('identity', {}).get('sourceIp', '')
 
-    # Send a notification to the user
+def _load_geoip_table():
+    """
+    Maps the GeoIP range table into memory, once per container. Layout, all
+    little-endian: 8-byte magic, uint32 range count, uint32 country count, the
+    2-letter country codes (padded to 4 bytes), then the uint32 range starts,
+    uint32 range ends and uint16 country indexes, sorted by start. A missing or
+    invalid table is logged once and every lookup then returns None.
+    """
+    _geoip['loaded'] = True
+    path = GEOIP_TABLE_PATH
     try:
-        notification_text = (f"Your link '{link_item.get('Name', 'N/A')}' reached {click_count} clicks! "
-                             f"You've earned the achievement: '{achievement_name}'.")
-        notifications_table.put_item(
-            Item={
-                'NotifId': str(uuid.uuid4()),
-                'ToUserId': user_id,
-                'LinkId': link_id,
-                'Text': notification_text,
-                'IsRead': 0, # MODIFIED: Set to integer 0 instead of boolean False
-                'Timestamp': datetime.now(timezone.utc).isoformat()
-            }
-        )
-    except ClientError as e:
-        print(f"Error creating notification: {e}")
+        if not os.path.exists(path) and GEOIP_TABLE_S3_URI:
+            path = os.path.join('/tmp', os.path.basename(GEOIP_TABLE_S3_URI))
+            if not os.path.exists(path):
+                bucket, _, key = GEOIP_TABLE_S3_URI[len('s3://'):].partition('/')
+                boto3.client('s3').download_file(bucket, key, path)
+        if sys.byteorder != 'little':
+            raise ValueError('the table format is little-endian')
+
+        with open(path, 'rb') as f:
+            view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        if bytes(view[:8]) != GEOIP_MAGIC:
+            raise ValueError(f"{path} is not a GeoIP range table")
+        count, country_count = struct.unpack_from('<II', view, 8)
+        offset = 16
+        countries = tuple(sys.intern(bytes(view[offset + 2 * i:offset + 2 * i + 2]).decode('ascii'))
+                          for i in range(country_count))
+        offset += (2 * country_count + 3) & ~3
+        starts = view[offset:offset + 4 * count].cast('I')
+        ends = view[offset + 4 * count:offset + 8 * count].cast('I')
+        codes = view[offset + 8 * count:offset + 10 * count].cast('H')
+        if len(codes) != count:
+            raise ValueError(f"{path} is truncated")
+    except (ClientError, OSError, ValueError, struct.error) as e:
+        print(f"GeoIP table unavailable, unresolved countries stay 'Unknown': {e}")
+        return
+
+    _geoip.update(starts=starts, ends=ends, codes=codes, countries=countries)
+    print(f"Loaded GeoIP table {path}: {count} ranges, {country_count} countries.")
 
-def _update_user_achievements_list(user_id, achievement_data):
+def _country_for_ip(ip):
     """
-    Appends a new achievement object to the 'Achievements' list in the Users table.
+    Two-letter country of an IPv4 address, or None (IPv6, malformed, unknown).
+    A binary search straight over the mapped file: no copies and no new strings.
     """
+    if not _geoip['loaded']:
+        _load_geoip_table()
+    starts = _geoip['starts']
+    if starts is None or not ip:
+        return None
     try:
-        # First, get the user item to check the 'Achievements' attribute
-        user_item = users_table.get_item(Key={'UserId': user_id}).get('Item', {})
-        existing_achievements = user_item.get('Achievements')
-
-        # If 'Achievements' exists and is NOT a list (e.g., it's an empty string),
-        # we overwrite it with the new achievement list.
-        # Otherwise, we use list_append.
-        if existing_achievements is not None and not isinstance(existing_achievements, list):
-            print("DEBUG: 'Achievements' attribute is not a list. Overwriting.")
-            update_expression = "SET Achievements = :new_achievement"
-            expression_values = {':new_achievement': [achievement_data]}
-        else:
-            # This is the normal case: attribute is a list or doesn't exist yet.
-            print("DEBUG: 'Achievements' is a list or does not exist. Appending.")
-            update_expression = "SET Achievements = list_append(if_not_exists(Achievements, :empty_list), :new_achievement)"
-            expression_values = {
-                ':new_achievement': [achievement_data],
-                ':empty_list': []
-            }
-
-        users_table.update_item(
-            Key={'UserId': user_id},
-            UpdateExpression=update_expression,
-            ExpressionAttributeValues=expression_values
-        )
-        print(f"Successfully updated achievements list for user '{user_id}'.")
-    except ClientError as e:
-        print(f"Error updating user's achievements list: {e}")
+        address = int.from_bytes(socket.inet_aton(ip), 'big')
+    except OSError:
+        return None
+    index = bisect.bisect_right(starts, address) - 1
+    if index < 0 or address > _geoip['ends'][index]:
+        return None
+    return _geoip['countries'][_geoip['codes'][index]]
+
+def _referrer_host(referrer):
+    """Keeps only the referring site, e.g. 'www.facebook.com', or 'direct'."""
+    if not referrer:
+        return 'direct'
+    host = urlparse(str(referrer)).netloc.lower()
+    return host or 'direct'
 
+def _user_agent_class(user_agent):
+    """Buckets a User-Agent into bot / tablet / mobile / desktop / unknown."""
+    ua = user_agent.lower()
+    if not ua:
+        return 'unknown'
+    if any(token in ua for token in ('bot', 'crawler', 'spider', 'preview', 'curl', 'python-requests')):
+        return 'bot'
+    if 'ipad' in ua or 'tablet' in ua:
+        return 'tablet'
+    if 'mobi' in ua or 'android' in ua or 'iphone' in ua:
+        return 'mobile'
+    return 'desktop'
 
 # test_event = {
 #     "body": json.dumps({
@@ -0,0 +1,186 @@
+import os
+import json
+import time
+import hashlib
+from datetime import datetime, timezone
+import boto3
+from botocore.exceptions import ClientError
+
+# --- DynamoDB Table Names ---
+TRENDING_TABLE_NAME = os.environ.get('TRENDING_TABLE_NAME', 'TrendingLinks')
+SNAPSHOT_ID = 'current'
+
+# --- Trending Configuration ---
+TRENDING_WINDOW_SECONDS = int(os.environ.get('TRENDING_WINDOW_SECONDS', '3600'))
+TRENDING_TOP_K = int(os.environ.get('TRENDING_TOP_K', '20'))
+# Ranked links kept in the snapshot's Top lists. get_trending_links drops the
+# private, password-protected and inactive ones when serving, so this leaves
+# headroom to still fill TRENDING_TOP_K public links.
+TRENDING_SNAPSHOT_SIZE = int(os.environ.get('TRENDING_SNAPSHOT_SIZE', str(3 * TRENDING_TOP_K)))
+# Candidates tracked per window; more than TOP_K so late risers are not missed
+TRENDING_CAPACITY = int(os.environ.get('TRENDING_CAPACITY', '200'))
+TRENDING_PERSIST_INTERVAL_SECONDS = float(os.environ.get('TRENDING_PERSIST_INTERVAL_SECONDS', '30'))
+CMS_WIDTH = int(os.environ.get('TRENDING_CMS_WIDTH', '2048'))
+CMS_DEPTH = int(os.environ.get('TRENDING_CMS_DEPTH', '4'))
+MAX_SNAPSHOT_RETRIES = 5
+
+dynamodb = boto3.resource('dynamodb')
+trending_table = dynamodb.Table(TRENDING_TABLE_NAME)
+
+
+class CountMinSketch:
+    """Fixed-size frequency estimates that never undercount (width x depth counters)."""
+
+    def __init__(self, width=CMS_WIDTH, depth=CMS_DEPTH):
+        self.width = width
+        self.depth = depth
+        self.rows = [[0] * width for _ in range(depth)]
+
+    def _columns(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=8 * self.depth).digest()
+        return [int.from_bytes(digest[8 * row:8 * row + 8], 'big') % self.width for row in range(self.depth)]
+
+    def add(self, key, count=1):
+        """Adds `count` occurrences of key and returns its new estimate."""
+        estimate = None
+        for row, column in zip(self.rows, self._columns(key)):
+            row[column] += count
+            estimate = row[column] if estimate is None else min(estimate, row[column])
+        return estimate
+
+
+class SpaceSaving:
+    """
+    Space-saving top-K summary backed by a count-min sketch: tracked links count
+    exactly from the moment they enter; an untracked link replaces the smallest
+    candidate once its sketch estimate is larger.
+    """
+
+    def __init__(self, capacity=TRENDING_CAPACITY, sketch=None):
+        self.capacity = capacity
+        self.sketch = sketch or CountMinSketch()
+        self.counts = {}
+
+    def add(self, key, count=1):
+        estimate = self.sketch.add(key, count)
+        if key in self.counts:
+            self.counts[key] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[key] = estimate
+        else:
+            smallest = min(self.counts, key=self.counts.get)
+            if estimate > self.counts[smallest]:
+                del self.counts[smallest]
+                self.counts[key] = estimate
+
+    def top(self, k):
+        return sorted(self.counts.items(), key=lambda entry: (-entry[1], entry[0]))[:k]
+
+
+# Per-container state: {window start epoch: SpaceSaving}, flushed periodically
+_windows = {}
+_last_persist = time.monotonic()
+
+
+def lambda_handler(event, context):
+    """
+    Keeps the trending-links snapshot up to date from the LinkClicks table stream
+    (NEW_IMAGE), for get_trending_links to serve with a single read.
+
+    Clicks are counted per TRENDING_WINDOW_SECONDS window in a space-saving
+    summary backed by a count-min sketch, so memory stays bounded however many
+    links are clicked. Every TRENDING_PERSIST_INTERVAL_SECONDS the container
+    merges its counts into the TrendingLinks item (partition key SnapshotId =
+    "current") and starts over. The item keeps the TRENDING_CAPACITY candidate
+    counts of the current window, its top TRENDING_SNAPSHOT_SIZE and the previous
+    window's top list; get_trending_links filters these down to public links.
+    Counts still in memory when a container is reclaimed are lost,
+    which only makes the ranking slightly less exact.
+    """
+    global _last_persist
+
+    clicks = 0
+    for record in event.get('Records', []):
+        if record.get('eventName') != 'INSERT':
+            continue
+        image = record.get('dynamodb', {}).get('NewImage', {})
+        link_id = image.get('LinkId', {}).get('S')
+        window = _window_start(image.get('Timestamp', {}).get('S', ''))
+        if not link_id or window is None:
+            continue
+        _windows.setdefault(window, SpaceSaving()).add(link_id)
+        clicks += 1
+
+    persisted = 0
+    if _windows and time.monotonic() - _last_persist >= TRENDING_PERSIST_INTERVAL_SECONDS:
+        for window in sorted(_windows):
+            try:
+                _merge_into_snapshot(window, dict(_windows[window].counts))
+            except (ClientError, RuntimeError) as e:
+                # Keep the window in memory and try again on the next batch
+                print(f"Error persisting trending window {window}: {e}")
+                break
+            del _windows[window]
+            persisted += 1
+        _last_persist = time.monotonic()
+
+    print(f"Counted {clicks} click(s), persisted {persisted} trending window(s).")
+    return {'statusCode': 200, 'body': json.dumps({'clicks': clicks, 'windowsPersisted': persisted})}
+
+
+def _window_start(timestamp):
+    """Epoch second at which the click's trending window starts, or None."""
+    try:
+        moment = datetime.fromisoformat(timestamp)
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    epoch = int(moment.timestamp())
+    return epoch - epoch % TRENDING_WINDOW_SECONDS
+
+
+def _merge_into_snapshot(window, counts):
+    """
+    Adds one window's counts to the snapshot item, guarded by an optimistic
+    Version check. A newer window replaces the current one (whose top list becomes
+    PreviousTop); counts for a window older than the snapshot's are dropped.
+    """
+    for _ in range(MAX_SNAPSHOT_RETRIES):
+        snapshot = trending_table.get_item(Key={'SnapshotId': SNAPSHOT_ID}, ConsistentRead=True).get('Item', {})
+        version = int(snapshot.get('Version', 0))
+        current_window = int(snapshot.get('WindowStart', 0))
+
+        if window < current_window:
+            print(f"Dropping counts for past trending window {window}.")
+            return
+        if window == current_window:
+            merged = {link_id: int(count) for link_id, count in snapshot.get('Counts', {}).items()}
+            previous_top = snapshot.get('PreviousTop', [])
+        else:
+            merged = {}
+            previous_top = snapshot.get('Top', [])
+        for link_id, count in counts.items():
+            merged[link_id] = merged.get(link_id, 0) + count
+
+        ranked = sorted(merged.items(), key=lambda entry: (-entry[1], entry[0]))[:TRENDING_CAPACITY]
+        try:
+            trending_table.put_item(
+                Item={
+                    'SnapshotId': SNAPSHOT_ID,
+                    'WindowStart': window,
+                    'WindowSeconds': TRENDING_WINDOW_SECONDS,
+                    'Counts': dict(ranked),
+                    'Top': [{'linkId': link_id, 'clicks': count} for link_id, count in ranked[:TRENDING_SNAPSHOT_SIZE]],
+                    'PreviousTop': previous_top,
+                    'UpdatedAt': datetime.now(timezone.utc).isoformat(),
+                    'Version': version + 1
+                },
+                ConditionExpression='attribute_not_exists(SnapshotId) OR Version = :version',
+                ExpressionAttributeValues={':version': version}
+            )
+            return
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+    raise RuntimeError(f"Could not persist trending window {window} after {MAX_SNAPSHOT_RETRIES} conflicts.")
@@ -1,4 +1,9 @@
 import json
+import time
+import hmac
+import base64
+import hashlib
+import urllib.request
 import boto3
 import os
 
@@ -7,6 +12,20 @@ cognito_client = boto3.client('cognito-idp')
 cloudformation_client = boto3.client('cloudformation')
 dynamodb_resource = boto3.resource('dynamodb')
 
+FALLBACK_USER_POOL_ID = 'us-east-1_a30MYIcaj'
+JWKS_TTL_SECONDS = float(os.environ.get('JWKS_TTL_SECONDS', '86400'))
+JWKS_MIN_REFRESH_SECONDS = 60
+ADMIN_CACHE_TTL_SECONDS = float(os.environ.get('ADMIN_CACHE_TTL_SECONDS', '300'))
+ADMIN_CACHE_MAX_ENTRIES = int(os.environ.get('ADMIN_CACHE_MAX_ENTRIES', '1000'))
+
+# DER prefix of a PKCS#1 v1.5 DigestInfo for SHA-256
+SHA256_DIGEST_INFO_PREFIX = bytes.fromhex('3031300d060960864801650304020105000420')
+
+# Per-container state: resolved once, or refreshed after their TTLs
+_config = {'user_pool_id': None, 'users_table_name': None, 'client_id': None}
+_jwks = {'keys': {}, 'fetched_at': None}
+_admin_cache = {}
+
 def get_env_prefix_from_context(context):
     """
     Parses the environment prefix from the Lambda function's name.
@@ -61,10 +80,148 @@ def get_username_from_dynamodb(user_id, table_name):
         print(f"Error accessing DynamoDB table '{table_name}': {e}")
         return None
 
+def resolve_config(context):
+    """
+    Resolves the User Pool ID, Users table name and app client ID (the ID token
+    audience, from USER_POOL_CLIENT_ID) once per container. USER_POOL_ID skips
+    the CloudFormation lookup entirely. The hardcoded fallback pool is never
+    cached, so the lookup is retried on the next invocation.
+    """
+    if _config['user_pool_id']:
+        return _config['user_pool_id'], _config['users_table_name'], _config['client_id']
+
+    env_prefix = get_env_prefix_from_context(context) if context else None
+    if env_prefix:
+        cognito_stack_name = f"{env_prefix}-shortly-cognito"
+        users_table_name = f"{env_prefix}-Users"
+    else:
+        print("Falling back to default names for Cognito stack and Users table.")
+        cognito_stack_name = "shortly-cognito"
+        users_table_name = "Users"
+
+    users_table_name = os.environ.get('USERS_TABLE_NAME', users_table_name)
+    client_id = os.environ.get('USER_POOL_CLIENT_ID')
+    user_pool_id = os.environ.get('USER_POOL_ID') or get_user_pool_id_from_stack(cognito_stack_name)
+    if not user_pool_id:
+        print(f"WARNING: Could not find User Pool ID from stack '{cognito_stack_name}'. Using hardcoded fallback ID.")
+        return FALLBACK_USER_POOL_ID, users_table_name, client_id
+
+    _config.update(user_pool_id=user_pool_id, users_table_name=users_table_name, client_id=client_id)
+    return user_pool_id, users_table_name, client_id
+
+def _b64url_decode(segment):
+    return base64.urlsafe_b64decode(segment + '=' * (-len(segment) % 4))
+
+def get_signing_key(user_pool_id, kid):
+    """
+    Returns the (n, e) RSA public key for a key ID from the pool's JWKS. The key
+    set is fetched once and refreshed after JWKS_TTL_SECONDS, or early (at most
+    once a minute) when a token names an unknown key after a rotation.
+    """
+    now = time.monotonic()
+    fetched_at = _jwks['fetched_at']
+    stale = fetched_at is None or now - fetched_at > JWKS_TTL_SECONDS
+    unknown = kid not in _jwks['keys'] and (fetched_at is None or now - fetched_at > JWKS_MIN_REFRESH_SECONDS)
+    if stale or unknown:
+        region = user_pool_id.split('_', 1)[0]
+        url = f"https://cognito-idp.{region}.amazonaws.com/{user_pool_id}/.well-known/jwks.json"
+        with urllib.request.urlopen(url, timeout=3) as response:
+            jwks = json.loads(response.read())
+        _jwks['keys'] = {
+            key['kid']: (int.from_bytes(_b64url_decode(key['n']), 'big'), int.from_bytes(_b64url_decode(key['e']), 'big'))
+            for key in jwks.get('keys', []) if key.get('kty') == 'RSA'
+        }
+        _jwks['fetched_at'] = now
+    return _jwks['keys'].get(kid)
+
+def rsa_sha256_verify(message, signature, public_key):
+    """RSASSA-PKCS1-v1_5 signature check with SHA-256 (the RS256 JWT algorithm)."""
+    n, e = public_key
+    key_length = (n.bit_length() + 7) // 8
+    if len(signature) != key_length:
+        return False
+    encoded = pow(int.from_bytes(signature, 'big'), e, n).to_bytes(key_length, 'big')
+    digest_info = SHA256_DIGEST_INFO_PREFIX + hashlib.sha256(message).digest()
+    expected = b'\x00\x01' + b'\xff' * (key_length - len(digest_info) - 3) + b'\x00' + digest_info
+    return hmac.compare_digest(encoded, expected)
+
+def verify_id_token(token, user_pool_id, client_id, get_key=None):
+    """
+    Verifies a Cognito ID token (RS256 signature, issuer, audience, token_use,
+    expiry) and returns its claims, or None if it is not valid. The audience must
+    be `client_id`; without one no token is accepted. `get_key(kid)` defaults to
+    the cached JWKS of the pool.
+    """
+    if not client_id:
+        return None
+    try:
+        header_segment, payload_segment, signature_segment = token.split('.')
+        header = json.loads(_b64url_decode(header_segment))
+        claims = json.loads(_b64url_decode(payload_segment))
+        signature = _b64url_decode(signature_segment)
+    except (ValueError, AttributeError):
+        return None
+
+    if header.get('alg') != 'RS256':
+        return None
+    try:
+        public_key = (get_key or (lambda kid: get_signing_key(user_pool_id, kid)))(header.get('kid'))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Could not load the signing keys for '{user_pool_id}': {e}")
+        return None
+    if not public_key or not rsa_sha256_verify(f"{header_segment}.{payload_segment}".encode(), signature, public_key):
+        return None
+
+    region = user_pool_id.split('_', 1)[0]
+    if claims.get('iss') != f"https://cognito-idp.{region}.amazonaws.com/{user_pool_id}":
+        return None
+    if claims.get('aud') != client_id or claims.get('token_use') != 'id':
+        return None
+    if not isinstance(claims.get('exp'), (int, float)) or claims['exp'] <= time.time():
+        return None
+    return claims
+
+def get_bearer_token(event, body):
+    """The ID token from the Authorization header ("Bearer <token>") or the body's IdToken."""
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == 'authorization' and value:
+            return value.split(' ', 1)[1] if value.lower().startswith('bearer ') else value
+    return body.get('IdToken')
+
+def cache_admin_status(user_id, is_admin, ttl=ADMIN_CACHE_TTL_SECONDS):
+    if len(_admin_cache) >= ADMIN_CACHE_MAX_ENTRIES:
+        # Drop expired answers first, then the oldest ones
+        now = time.monotonic()
+        for key in [key for key, (_, expires) in _admin_cache.items() if expires <= now]:
+            del _admin_cache[key]
+        while len(_admin_cache) >= ADMIN_CACHE_MAX_ENTRIES:
+            del _admin_cache[next(iter(_admin_cache))]
+    _admin_cache[user_id] = (is_admin, time.monotonic() + ttl)
+
+def get_cached_admin_status(user_id):
+    cached = _admin_cache.get(user_id)
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
+    return None
+
+def admin_response(is_admin):
+    return {
+        'statusCode': 200,
+        'headers': {
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Methods': 'POST, OPTIONS'
+        },
+        'body': json.dumps({'isAdmin': is_admin})
+    }
+
 def lambda_handler(event, context):
     """
-    Checks if a user is a member of the 'Admins' group by looking up their
-    username in DynamoDB via their UserId (sub).
+    Checks if a user is a member of the 'Admins' group.
+
+    When the request carries the user's Cognito ID token (Authorization header or
+    "IdToken" in the body), the answer comes from its verified cognito:groups
+    claim without calling AWS. Otherwise the username is looked up in DynamoDB
+    via the UserId (sub) and Cognito is asked, with answers cached per container.
     """
     admin_group_name = os.environ.get('ADMIN_GROUP_NAME', 'Admins')
 
@@ -78,21 +235,9 @@ def lambda_handler(event, context):
             },
             'body': ''
         }
-    
-    env_prefix = get_env_prefix_from_context(context)
-    if env_prefix:
-        cognito_stack_name = f"{env_prefix}-shortly-cognito"
-        users_table_name = f"{env_prefix}-Users"
-    else:
-        print("Falling back to default names for Cognito stack and Users table.")
-        cognito_stack_name = "shortly-cognito"
-        users_table_name = "Users"
-        
-    user_pool_id = get_user_pool_id_from_stack(cognito_stack_name)
-    if not user_pool_id:
-        print(f"WARNING: Could not find User Pool ID from stack '{cognito_stack_name}'. Using hardcoded fallback ID.")
-        user_pool_id = 'us-east-1_a30MYIcaj' # Your specified fallback
-        
+
+    user_pool_id, users_table_name, client_id = resolve_config(context)
+
     try:
         body = json.loads(event.get('body', '{}'))
         user_id = body.get('UserId')
@@ -107,7 +252,18 @@ def lambda_handler(event, context):
                 'body': json.dumps({'message': 'Bad Request: Missing UserId in request body.'})
             }
         
-        # --- NEW LOGIC ---
+        # Hot path: the verified token already lists the user's groups
+        token = get_bearer_token(event, body)
+        claims = verify_id_token(token, user_pool_id, client_id) if token else None
+        if claims and claims.get('sub') == user_id:
+            is_admin = admin_group_name in claims.get('cognito:groups', [])
+            cache_admin_status(user_id, is_admin, min(ADMIN_CACHE_TTL_SECONDS, claims['exp'] - time.time()))
+            return admin_response(is_admin)
+
+        cached = get_cached_admin_status(user_id)
+        if cached is not None:
+            return admin_response(cached)
+
         # Get the Cognito username from the Users table in DynamoDB
         cognito_username = get_username_from_dynamodb(user_id, users_table_name)
         
@@ -126,15 +282,9 @@ def lambda_handler(event, context):
         )
         
         is_admin = any(group['GroupName'] == admin_group_name for group in response.get('Groups', []))
+        cache_admin_status(user_id, is_admin)
 
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'POST, OPTIONS'
-            },
-            'body': json.dumps({'isAdmin': is_admin})
-        }
+        return admin_response(is_admin)
 
     except json.JSONDecodeError:
         return {
@@ -0,0 +1,101 @@
+import os
+import json
+import time
+import boto3
+from botocore.exceptions import ClientError
+
+# --- DynamoDB Table Names ---
+LINK_CLICKS_TABLE_NAME = os.environ.get('LINK_CLICKS_TABLE_NAME', 'LinkClicks')
+
+# batch_write_item takes at most 25 puts; unprocessed ones are retried with backoff
+BATCH_WRITE_SIZE = 25
+MAX_BATCH_WRITE_RETRIES = 3
+
+# --- Initialize DynamoDB ---
+dynamodb = boto3.resource('dynamodb')
+
+
+def lambda_handler(event, context):
+    """
+    Writes the click events queued by track_click to LinkClicks (SQS trigger with
+    ReportBatchItemFailures enabled, batch size 25 or a multiple of it).
+
+    Each message is one click, written with batch_write_item, 25 per call. Only
+    the messages whose click could not be written are reported back for
+    redelivery. ClickId is the table key, so a redelivered click overwrites its
+    own item (a MODIFY on the stream, which rollup_link_clicks ignores) and is
+    never counted twice.
+    """
+    clicks = {}
+    seen = set()
+    failures = []
+    for record in event.get('Records', []):
+        try:
+            click = json.loads(record['body'])
+            if not click.get('ClickId') or not click.get('LinkId'):
+                raise ValueError('missing ClickId or LinkId')
+        except (ValueError, TypeError, AttributeError) as e:
+            # Malformed messages can never succeed; drop them rather than redeliver
+            print(f"Dropping malformed click event {record.get('messageId')}: {e}")
+            continue
+        # batch_write_item rejects a request with the same key twice
+        if click['ClickId'] in seen:
+            continue
+        seen.add(click['ClickId'])
+        clicks[record['messageId']] = click
+
+    message_ids = list(clicks)
+    for start in range(0, len(message_ids), BATCH_WRITE_SIZE):
+        chunk = {message_id: clicks[message_id] for message_id in message_ids[start:start + BATCH_WRITE_SIZE]}
+        failures.extend({'itemIdentifier': message_id} for message_id in _write_clicks(chunk))
+
+    print(f"Wrote {len(clicks) - len(failures)} of {len(event.get('Records', []))} click event(s).")
+    return {'batchItemFailures': failures}
+
+
+def _write_clicks(clicks):
+    """
+    Writes up to 25 clicks (messageId -> click) with batch_write_item, retrying
+    unprocessed items. Returns the message IDs whose click was not written.
+    """
+    pending = dict(clicks)
+    for attempt in range(MAX_BATCH_WRITE_RETRIES + 1):
+        if attempt:
+            time.sleep(0.05 * 2 ** attempt)
+        try:
+            response = dynamodb.batch_write_item(RequestItems={
+                LINK_CLICKS_TABLE_NAME: [{'PutRequest': {'Item': click}} for click in pending.values()]
+            })
+        except ClientError as e:
+            print(f"Error writing click events: {e}")
+            continue
+        unprocessed = {
+            request['PutRequest']['Item']['ClickId']
+            for request in response.get('UnprocessedItems', {}).get(LINK_CLICKS_TABLE_NAME, [])
+        }
+        pending = {message_id: click for message_id, click in pending.items() if click['ClickId'] in unprocessed}
+        if not pending:
+            return []
+    print(f"{len(pending)} click event(s) left unwritten after {MAX_BATCH_WRITE_RETRIES} retries.")
+    return list(pending)
+
+# test_event = {
+#     "Records": [{
+#         "messageId": "059f36b4-87a3-44ab-83d2-661975830a7d",
+#         "body": json.dumps({
+#             "ClickId": "3f2c1d0e9b8a4c7d8e6f5a4b3c2d1e0f",
+#             "LinkId": "test-link-123",
+#             "Timestamp": "2025-01-01T12:00:00+00:00",
+#             "Country": "US",
+#             "Referrer": "direct",
+#             "UserAgentClass": "desktop",
+#             "VisitorHash": "0123456789abcdef"
+#         })
+#     }]
+# }
+
+# # Call lambda handler with test event
+# response = lambda_handler(test_event, None)
+
+# # Print response
+# print(json.dumps(response, indent=2))
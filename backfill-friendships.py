@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+One-shot migration that seeds the Friendships table (partition key PairId =
+"<smaller user id>#<larger user id>") from the data that existed before it:
+
+  • friend-request notifications ("... wants to be friends.") give the latest
+    request of each pair, its sender and its status;
+  • FRIEND# items in UserEdges mark the pair as accepted.
+
+Pairs that already have a Friendships item are left untouched, so the script can
+be re-run after send_friend_request / respond_to_friend_request are deployed.
+
+Usage:
+    python3 backfill-friendships.py [--create-table] [--dry-run]
+"""
+import argparse
+import sys
+from datetime import datetime
+
+import boto3
+from botocore.exceptions import ClientError
+
+REQUEST_TEXT_SUFFIX = 'wants to be friends.'
+
+
+def create_friendships_table(dynamodb, table_name: str):
+    """
+    Create the Friendships table (on-demand billing) if it does not exist yet.
+    """
+    try:
+        table = dynamodb.create_table(
+            TableName=table_name,
+            KeySchema=[{'AttributeName': 'PairId', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': 'PairId', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        print(f"• Creating table {table_name}...")
+        table.wait_until_exists()
+        print(f"✓ Created {table_name}")
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ResourceInUseException':
+            raise
+        print(f"• Table {table_name} already exists")
+
+
+def scan_items(table, projection: str, names: dict = None):
+    """
+    Yield every item of a table with a paginated, projected scan.
+    """
+    paginator = table.meta.client.get_paginator('scan')
+    kwargs = {'TableName': table.name, 'ProjectionExpression': projection, 'PaginationConfig': {'PageSize': 500}}
+    if names:
+        kwargs['ExpressionAttributeNames'] = names
+    for page in paginator.paginate(**kwargs):
+        yield from page.get('Items', [])
+
+
+def collect_pairs(notifications_table, edges_table) -> dict:
+    """
+    Build {PairId: friendship item} from the requests and the friend edges.
+    """
+    pairs = {}
+    for notif in scan_items(notifications_table, 'NotifId, FromUserId, ToUserId, #s, #t, #ts',
+                            {'#s': 'Status', '#t': 'Text', '#ts': 'Timestamp'}):
+        from_user, to_user = notif.get('FromUserId'), notif.get('ToUserId')
+        if not from_user or not to_user or not str(notif.get('Text', '')).endswith(REQUEST_TEXT_SUFFIX):
+            continue
+        pair = f"{min(from_user, to_user)}#{max(from_user, to_user)}"
+        timestamp = notif.get('Timestamp', '')
+        if pair in pairs and pairs[pair]['UpdatedAt'] >= timestamp:
+            continue
+        pairs[pair] = {
+            'PairId': pair,
+            'UserA': min(from_user, to_user),
+            'UserB': max(from_user, to_user),
+            'Status': notif.get('Status', 'pending'),
+            'RequestedBy': from_user,
+            'NotifId': notif['NotifId'],
+            'UpdatedAt': timestamp
+        }
+    print(f"• {len(pairs)} pairs found in Notifications")
+
+    accepted = 0
+    now = datetime.utcnow().isoformat()
+    for edge in scan_items(edges_table, 'UserId, EdgeKey, TargetId'):
+        if not edge['EdgeKey'].startswith('FRIEND#'):
+            continue
+        user_a, user_b = sorted((edge['UserId'], edge['TargetId']))
+        pair = f"{user_a}#{user_b}"
+        existing = pairs.get(pair)
+        if existing and existing['Status'] == 'accepted':
+            continue
+        pairs[pair] = {
+            **(existing or {'PairId': pair, 'UserA': user_a, 'UserB': user_b,
+                            'RequestedBy': edge['UserId'], 'UpdatedAt': now}),
+            'Status': 'accepted'
+        }
+        accepted += 1
+    print(f"• {accepted} pairs marked accepted from UserEdges")
+    return pairs
+
+
+def write_pairs(friendships_table, pairs: dict) -> int:
+    """
+    Put every pair that does not exist yet. Returns the number written.
+    """
+    written = 0
+    for item in pairs.values():
+        try:
+            friendships_table.put_item(Item=item, ConditionExpression='attribute_not_exists(PairId)')
+            written += 1
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed the Friendships table from Notifications and UserEdges.")
+    parser.add_argument('--notifications-table', default='Notifications',
+                        help='Notifications table name (default: Notifications)')
+    parser.add_argument('--edges-table', default='UserEdges', help='UserEdges table name (default: UserEdges)')
+    parser.add_argument('--friendships-table', default='Friendships',
+                        help='Friendships table name (default: Friendships)')
+    parser.add_argument('--create-table', action='store_true', help='Create the Friendships table if missing')
+    parser.add_argument('--dry-run', action='store_true', help='Count the pairs without writing them')
+    args = parser.parse_args()
+
+    dynamodb = boto3.resource('dynamodb')
+    try:
+        if args.create_table and not args.dry_run:
+            create_friendships_table(dynamodb, args.friendships_table)
+        pairs = collect_pairs(dynamodb.Table(args.notifications_table), dynamodb.Table(args.edges_table))
+        written = 0 if args.dry_run else write_pairs(dynamodb.Table(args.friendships_table), pairs)
+    except ClientError as e:
+        print(f"❌ Backfill failed: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"\n✅ Backfill complete: {len(pairs)} pairs, {written} written{' (dry run)' if args.dry_run else ''}.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+One-shot initialisation of the Users.UnreadNotifications counter that
+check_unread_notifications reads instead of scanning the Notifications table.
+
+The Notifications table is scanned once and the unread items are counted per
+recipient, then every Users item gets its counter set to that count (or 0).
+Run it right after deploying the Lambdas that maintain the counter; notifications
+written while it runs may be counted twice or not at all, and are corrected the
+next time the user marks their notifications as read.
+
+Usage:
+    python3 backfill-unread-counters.py [--dry-run]
+"""
+import argparse
+import sys
+from collections import Counter
+
+import boto3
+from botocore.exceptions import ClientError
+
+
+def count_unread(notifications_table) -> Counter:
+    """
+    Count the unread notifications per ToUserId with a paginated scan.
+    """
+    counts = Counter()
+    paginator = notifications_table.meta.client.get_paginator('scan')
+    pages = paginator.paginate(
+        TableName=notifications_table.name,
+        ProjectionExpression='ToUserId, IsRead',
+        PaginationConfig={'PageSize': 500}
+    )
+    scanned = 0
+    for page in pages:
+        for item in page.get('Items', []):
+            scanned += 1
+            if not int(item.get('IsRead', 0)) and item.get('ToUserId'):
+                counts[item['ToUserId']] += 1
+    print(f"• {scanned} notifications scanned, {sum(counts.values())} unread")
+    return counts
+
+
+def write_counters(users_table, counts: Counter, dry_run: bool) -> int:
+    """
+    Set UnreadNotifications on every user. Returns the number of users updated.
+    """
+    paginator = users_table.meta.client.get_paginator('scan')
+    pages = paginator.paginate(
+        TableName=users_table.name,
+        ProjectionExpression='UserId',
+        PaginationConfig={'PageSize': 100}
+    )
+    updated = 0
+    for page in pages:
+        for user in page.get('Items', []):
+            if not dry_run:
+                users_table.update_item(
+                    Key={'UserId': user['UserId']},
+                    UpdateExpression='SET UnreadNotifications = :count',
+                    ExpressionAttributeValues={':count': counts.get(user['UserId'], 0)}
+                )
+            updated += 1
+        print(f"• {updated} users {'checked' if dry_run else 'updated'}")
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Initialise Users.UnreadNotifications from the Notifications table."
+    )
+    parser.add_argument('--users-table', default='Users', help='Users table name (default: Users)')
+    parser.add_argument('--notifications-table', default='Notifications',
+                        help='Notifications table name (default: Notifications)')
+    parser.add_argument('--dry-run', action='store_true', help='Count without writing the counters')
+    args = parser.parse_args()
+
+    dynamodb = boto3.resource('dynamodb')
+    try:
+        counts = count_unread(dynamodb.Table(args.notifications_table))
+        users = write_counters(dynamodb.Table(args.users_table), counts, args.dry_run)
+    except ClientError as e:
+        print(f"❌ Backfill failed: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"\n✅ Backfill complete: {users} users{' (dry run)' if args.dry_run else ''}.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+One-shot migration of the Users.Links / Users.Friends JSON-string blobs into the
+UserEdges adjacency table (partition key UserId, sort key EdgeKey = "LINK#<code>"
+or "FRIEND#<userId>").
+
+The Users table is streamed page by page and the edges are written as each page
+arrives, so memory stays flat however many users there are. Writes are plain puts
+of deterministic keys, so the script can be re-run safely. Run it before deploying
+the Lambdas that read friends and links from UserEdges.
+
+Usage:
+    python3 backfill-user-edges.py [--create-table] [--dry-run]
+"""
+import argparse
+import json
+import sys
+from datetime import datetime
+
+import boto3
+from botocore.exceptions import ClientError
+
+
+def create_edges_table(dynamodb, table_name: str):
+    """
+    Create the UserEdges table (on-demand billing) if it does not exist yet.
+    """
+    try:
+        table = dynamodb.create_table(
+            TableName=table_name,
+            KeySchema=[
+                {'AttributeName': 'UserId', 'KeyType': 'HASH'},
+                {'AttributeName': 'EdgeKey', 'KeyType': 'RANGE'}
+            ],
+            AttributeDefinitions=[
+                {'AttributeName': 'UserId', 'AttributeType': 'S'},
+                {'AttributeName': 'EdgeKey', 'AttributeType': 'S'}
+            ],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        print(f"• Creating table {table_name}...")
+        table.wait_until_exists()
+        print(f"✓ Created {table_name}")
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ResourceInUseException':
+            raise
+        print(f"• Table {table_name} already exists")
+
+
+def parse_blob(raw) -> list:
+    """
+    Parse a legacy JSON-string list attribute, tolerating empty or invalid values.
+    """
+    if isinstance(raw, list):
+        return raw
+    if not raw:
+        return []
+    try:
+        parsed = json.loads(raw)
+    except (json.JSONDecodeError, TypeError):
+        return []
+    return parsed if isinstance(parsed, list) else []
+
+
+def user_edges(user: dict, created_at: str):
+    """
+    Yield the UserEdges items for one legacy Users item.
+    """
+    user_id = user['UserId']
+    for code in parse_blob(user.get('Links')):
+        yield {'UserId': user_id, 'EdgeKey': f"LINK#{code}", 'TargetId': code, 'CreatedAt': created_at}
+    for friend_id in parse_blob(user.get('Friends')):
+        yield {'UserId': user_id, 'EdgeKey': f"FRIEND#{friend_id}", 'TargetId': friend_id, 'CreatedAt': created_at}
+
+
+def backfill(users_table, edges_table, dry_run: bool):
+    """
+    Stream every Users page and write its edges. Returns (users, edges) counts.
+    """
+    created_at = datetime.utcnow().isoformat()
+    scan_kwargs = {
+        'ProjectionExpression': 'UserId, Links, Friends',
+        'PaginationConfig': {'PageSize': 100}
+    }
+    paginator = users_table.meta.client.get_paginator('scan')
+    users_seen = 0
+    edges_written = 0
+
+    with edges_table.batch_writer(overwrite_by_pkeys=['UserId', 'EdgeKey']) as batch:
+        for page in paginator.paginate(TableName=users_table.name, **scan_kwargs):
+            for user in page.get('Items', []):
+                users_seen += 1
+                for edge in user_edges(user, created_at):
+                    edges_written += 1
+                    if not dry_run:
+                        batch.put_item(Item=edge)
+            print(f"• {users_seen} users scanned, {edges_written} edges {'found' if dry_run else 'written'}")
+
+    return users_seen, edges_written
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Backfill the UserEdges table from the Users.Links/Users.Friends JSON strings."
+    )
+    parser.add_argument('--users-table', default='Users', help='Users table name (default: Users)')
+    parser.add_argument('--edges-table', default='UserEdges', help='UserEdges table name (default: UserEdges)')
+    parser.add_argument('--create-table', action='store_true', help='Create the UserEdges table if missing')
+    parser.add_argument('--dry-run', action='store_true', help='Count the edges without writing them')
+    args = parser.parse_args()
+
+    dynamodb = boto3.resource('dynamodb')
+    try:
+        if args.create_table and not args.dry_run:
+            create_edges_table(dynamodb, args.edges_table)
+        users, edges = backfill(dynamodb.Table(args.users_table), dynamodb.Table(args.edges_table), args.dry_run)
+    except ClientError as e:
+        print(f"❌ Backfill failed: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"\n✅ Backfill complete: {users} users, {edges} edges{' (dry run)' if args.dry_run else ''}.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Redirect-latency and throughput benchmark for click event ingestion
+(Lambdas/track_click.py and Lambdas/write_click_events.py).
+
+--redirects redirects of one warm, cached link are sent through
+track_click.lambda_handler with each way of recording the click event:
+
+  • none: the event is not recorded (the baseline)
+  • send_message inline: one synchronous SQS call per redirect
+  • buffered sender: the event is appended to the in-memory buffer and sent by
+    the background thread with send_message_batch
+
+It prints the median and p95 redirect latency of each and the latency each adds
+over the baseline, then checks that the sender queued exactly one message per
+buffered redirect. Those messages are then written to LinkClicks through
+write_click_events.lambda_handler in SQS batches of --batch-size, and the
+script prints the clicks/s and checks that every click was stored.
+
+A local stand-in answers in microseconds, so --latency-ms of simulated network
+time is added to every DynamoDB call. SQS is simulated in-process: each call
+waits --latency-ms, records the messages and reports them all as accepted.
+
+Runs against DynamoDB Local / moto_server (--endpoint-url) or moto in-process.
+
+Usage:
+    python3 benchmark-click-ingest.py [--redirects 2000] [--batch-size 25] [--latency-ms 8] [--endpoint-url http://localhost:8000]
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+
+import boto3
+
+import local_dynamodb
+
+LINK_ID = 'bench-link'
+TABLES = ['Links', 'LinkClickShards', 'LinkClicks', 'CacheStamps']
+
+
+def timed_redirects(track_click, count: int) -> list:
+    """Send `count` redirects. Returns the per-redirect latencies in seconds."""
+    event = {'httpMethod': 'POST', 'headers': {'User-Agent': 'Mozilla/5.0'},
+             'requestContext': {'identity': {'sourceIp': '203.0.113.7'}},
+             'body': json.dumps({'code': LINK_ID})}
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        response = track_click.lambda_handler(event, None)
+        latencies.append(time.perf_counter() - started)
+        if response['statusCode'] != 200:
+            fail(f"Redirect returned {response['statusCode']}: {response['body']}")
+    return latencies
+
+
+class SimulatedQueue:
+    """Answers the SQS client's sends after --latency-ms and keeps the message bodies."""
+
+    class _Http:
+        status_code = 200
+
+    def __init__(self, latency_seconds: float):
+        self.latency_seconds = latency_seconds
+        self.bodies = []
+
+    def register(self, client):
+        client.meta.events.register('provide-client-params.sqs', self.keep_params)
+        client.meta.events.register('before-call.sqs', self.respond)
+
+    def keep_params(self, params, context, **kwargs):
+        context['api_params'] = params
+
+    def respond(self, model, context, **kwargs):
+        time.sleep(self.latency_seconds)
+        params = context['api_params']
+        if model.name == 'SendMessage':
+            self.bodies.append(params['MessageBody'])
+            return self._Http(), {'MessageId': 'm', 'MD5OfMessageBody': ''}
+        self.bodies.extend(entry['MessageBody'] for entry in params['Entries'])
+        return self._Http(), {'Successful': [{'Id': entry['Id'], 'MessageId': 'm', 'MD5OfMessageBody': ''}
+                                             for entry in params['Entries']], 'Failed': []}
+
+
+def fail(message: str):
+    print(f"❌ {message}", file=sys.stderr)
+    sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Click ingestion latency and throughput benchmark.")
+    parser.add_argument('--redirects', type=int, default=2000, help='Redirects per path (default: 2000)')
+    parser.add_argument('--batch-size', type=int, default=25, help='SQS batch size for write_click_events (default: 25)')
+    parser.add_argument('--latency-ms', type=float, default=8, help='Simulated latency per AWS call (default: 8)')
+    parser.add_argument('--endpoint-url', help='DynamoDB Local / moto_server URL (default: moto in-process)')
+    args = parser.parse_args()
+
+    mock = local_dynamodb.start(args.endpoint_url)
+    dynamodb = boto3.resource('dynamodb')
+    try:
+        links_table = local_dynamodb.create_table(dynamodb, 'Links', 'LinkId')
+        local_dynamodb.create_table(dynamodb, 'LinkClickShards', 'ShardKey')
+        clicks_table = local_dynamodb.create_table(dynamodb, 'LinkClicks', 'ClickId')
+        local_dynamodb.create_table(dynamodb, 'CacheStamps', 'StampId')
+        links_table.put_item(Item={'LinkId': LINK_ID, 'UserId': 'owner', 'String': 'https://example.com/',
+                                   'IsActive': True, 'IsPasswordProtected': False})
+        queue_url = 'https://sqs.us-east-1.amazonaws.com/123456789012/bench-click-events'
+
+        track_click = local_dynamodb.import_lambda('track_click')
+        write_click_events = local_dynamodb.import_lambda('write_click_events')
+        track_click.CLICK_EVENTS_QUEUE_URL = queue_url
+
+        def simulated_latency(**kwargs):
+            time.sleep(args.latency_ms / 1000)
+        for client in {track_click.dynamodb.meta.client, write_click_events.dynamodb.meta.client}:
+            client.meta.events.register('before-call.dynamodb', simulated_latency)
+        queue = SimulatedQueue(args.latency_ms / 1000)
+        queue.register(track_click.sqs_client)
+
+        def send_inline(link_id, event, body):
+            # The previous path: build the event and send it before responding
+            track_click.sqs_client.send_message(QueueUrl=queue_url, MessageBody=json.dumps(
+                {'ClickId': 'inline', 'LinkId': link_id, 'Country': 'Unknown'}))
+
+        buffered = track_click._record_click_event
+        paths = (
+            ('none', lambda link_id, event, body: None),
+            ('send_message inline', send_inline),
+            ('buffered sender', buffered),
+        )
+        timed_redirects(track_click, 20)  # warm the link cache and the stamp check
+        track_click._click_buffer.clear()
+
+        print(f"\n{args.redirects} redirects per path ({args.latency_ms:g} ms simulated per AWS call)")
+        print(f"{'path':22}{'median ms':>11}{'p95 ms':>9}{'added ms':>10}")
+        baseline = None
+        for name, record in paths:
+            track_click._record_click_event = record
+            latencies = sorted(timed_redirects(track_click, args.redirects))
+            median = statistics.median(latencies) * 1000
+            baseline = median if baseline is None else baseline
+            print(f"{name:22}{median:>11.2f}{latencies[int(0.95 * (len(latencies) - 1))] * 1000:>9.2f}"
+                  f"{median - baseline:>10.2f}")
+            if name == 'send_message inline':
+                queue.bodies.clear()
+
+        deadline = time.monotonic() + 60
+        while track_click._click_buffer and time.monotonic() < deadline:
+            time.sleep(0.05)
+        with track_click._click_sender['lock']:
+            pass  # wait for an in-flight batch
+        if len(queue.bodies) != args.redirects:
+            fail(f"The sender queued {len(queue.bodies)} click event(s), expected {args.redirects}")
+        print(f"\n✓ The sender queued all {len(queue.bodies)} buffered click events "
+              f"({track_click._click_sender['dropped']} dropped)")
+
+        records = [{'messageId': str(index), 'body': body} for index, body in enumerate(queue.bodies)]
+        started = time.perf_counter()
+        for start in range(0, len(records), args.batch_size):
+            response = write_click_events.lambda_handler({'Records': records[start:start + args.batch_size]}, None)
+            if response['batchItemFailures']:
+                fail(f"write_click_events reported {len(response['batchItemFailures'])} failure(s)")
+        elapsed = time.perf_counter() - started
+        stored = clicks_table.scan(Select='COUNT')['Count']
+        if stored != len(records):
+            fail(f"{stored} click(s) stored, expected {len(records)}")
+        print(f"✓ write_click_events stored {stored} clicks at {stored / elapsed:.0f} clicks/s "
+              f"per consumer, in batches of {args.batch_size}")
+    finally:
+        local_dynamodb.delete_tables(dynamodb, TABLES)
+        if mock:
+            mock.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Contention benchmark for the sharded click counter (Lambdas/track_click.py and
+Lambdas/compact_click_shards.py) on a single hot LinkId.
+
+--workers threads click the same link --clicks times in total, first through the
+old read-modify-write path (get_item, then SET NumberOfClicks = read + 1), then
+through track_click's sharded ADD. For each strategy it prints clicks/s, lost
+updates and the write rate of the hottest item. DynamoDB caps a single item
+(partition key) at roughly 1000 writes/s, so the hottest-item rate is what
+throttles a viral link; sharding divides it by CLICK_COUNTER_SHARDS. After the
+sharded run, compact_click_shards folds the shards and the script checks that
+Links.NumberOfClicks equals the clicks sent.
+
+Runs against DynamoDB Local / moto_server (--endpoint-url) or moto in-process.
+
+Usage:
+    python3 benchmark-click-shards.py [--clicks 2000] [--workers 32] [--shards 10] [--endpoint-url http://localhost:8000]
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+
+import local_dynamodb
+
+LINK_ID = 'hot-link'
+
+
+def legacy_click(links_table, link_id: str):
+    """The pre-sharding path: read the count, write it back incremented."""
+    item = links_table.get_item(Key={'LinkId': link_id})['Item']
+    links_table.update_item(
+        Key={'LinkId': link_id},
+        UpdateExpression='SET NumberOfClicks = :c',
+        ExpressionAttributeValues={':c': int(item.get('NumberOfClicks', 0)) + 1}
+    )
+
+
+def run(click, clicks: int, workers: int) -> float:
+    """Send `clicks` clicks from `workers` threads. Returns the elapsed seconds."""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for future in [executor.submit(click) for _ in range(clicks)]:
+            future.result()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hot-key contention benchmark for the sharded click counter.")
+    parser.add_argument('--clicks', type=int, default=2000, help='Clicks per strategy (default: 2000)')
+    parser.add_argument('--workers', type=int, default=32, help='Concurrent clickers (default: 32)')
+    parser.add_argument('--shards', type=int, default=10, help='CLICK_COUNTER_SHARDS (default: 10)')
+    parser.add_argument('--endpoint-url', help='DynamoDB Local / moto_server URL (default: moto in-process)')
+    args = parser.parse_args()
+
+    os.environ['CLICK_COUNTER_SHARDS'] = str(args.shards)
+    mock = local_dynamodb.start(args.endpoint_url)
+    dynamodb = boto3.resource('dynamodb')
+    tables = ['Links', 'LinkClickShards']
+    try:
+        links_table = local_dynamodb.create_table(dynamodb, 'Links', 'LinkId')
+        local_dynamodb.create_table(dynamodb, 'LinkClickShards', 'ShardKey')
+        track_click = local_dynamodb.import_lambda('track_click')
+        compact_click_shards = local_dynamodb.import_lambda('compact_click_shards')
+
+        print(f"\n{args.clicks} clicks on one LinkId from {args.workers} workers\n")
+        print(f"{'strategy':22}{'clicks/s':>10}{'lost':>8}{'hottest item writes/s':>24}")
+
+        links_table.put_item(Item={'LinkId': LINK_ID, 'NumberOfClicks': 0, 'IsActive': True})
+        elapsed = run(lambda: legacy_click(links_table, LINK_ID), args.clicks, args.workers)
+        stored = int(links_table.get_item(Key={'LinkId': LINK_ID})['Item']['NumberOfClicks'])
+        print(f"{'read-modify-write':22}{args.clicks / elapsed:>10.0f}{args.clicks - stored:>8}"
+              f"{args.clicks / elapsed:>24.0f}")
+
+        links_table.put_item(Item={'LinkId': LINK_ID, 'NumberOfClicks': 0, 'IsActive': True})
+        elapsed = run(lambda: track_click._increment_click_shard(LINK_ID), args.clicks, args.workers)
+        shard_counts = Counter({
+            item['ShardKey']: int(item['Clicks'])
+            for item in dynamodb.Table('LinkClickShards').scan()['Items']
+        })
+        counted = sum(shard_counts.values())
+        hottest = max(shard_counts.values())
+        print(f"{'sharded ADD':22}{args.clicks / elapsed:>10.0f}{args.clicks - counted:>8}"
+              f"{hottest / elapsed:>24.0f}")
+
+        compact_click_shards._compact_link(LINK_ID, {})
+        folded = int(links_table.get_item(Key={'LinkId': LINK_ID})['Item']['NumberOfClicks'])
+        print(f"\nShards used: {len(shard_counts)} (hottest took {hottest / args.clicks:.0%} of the writes)")
+        if folded != args.clicks:
+            print(f"❌ Compaction folded {folded} clicks, expected {args.clicks}", file=sys.stderr)
+            sys.exit(1)
+        print(f"✓ Compaction folded all {folded} clicks into Links.NumberOfClicks")
+    finally:
+        local_dynamodb.delete_tables(dynamodb, tables)
+        if mock:
+            mock.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for friend-list hydration in get_user_friends and
+get_active_friends at 10, 100 and 1000 friends.
+
+For each size the user's friend edges are loaded into UserEdges. Two paths are
+then timed: the old one (one get_item per friend, in a loop) and each handler's
+concurrent batch_get_item hydration. The script prints the DynamoDB round
+trips and the median latency per request, and checks that both handlers
+return every friend.
+
+A local stand-in answers in microseconds, so --latency-ms of simulated network
+time is added to every DynamoDB call. That makes the sequential round trips
+show up the way they do against the real service.
+
+Runs against DynamoDB Local / moto_server (--endpoint-url) or moto in-process.
+
+Usage:
+    python3 benchmark-friend-hydration.py [--sizes 10 100 1000] [--runs 5] [--latency-ms 8] [--endpoint-url http://localhost:8000]
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from collections import Counter
+
+import boto3
+
+import local_dynamodb
+
+USER_ID = 'bench-user'
+TABLES = ['Users', 'UserEdges']
+
+
+def legacy_hydrate(users_table, edges_table, user_id: str) -> list:
+    """The pre-batching path: query the edges, then one get_item per friend."""
+    friends = []
+    kwargs = {'KeyConditionExpression': 'UserId = :u AND begins_with(EdgeKey, :f)',
+              'ExpressionAttributeValues': {':u': user_id, ':f': 'FRIEND#'}}
+    while True:
+        response = edges_table.query(**kwargs)
+        for edge in response['Items']:
+            friend = users_table.get_item(Key={'UserId': edge['TargetId']}).get('Item')
+            if friend:
+                friends.append({'UserId': friend['UserId'], 'Username': friend.get('Username', '')})
+        if 'LastEvaluatedKey' not in response:
+            return friends
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def friend_count(response: dict) -> int:
+    body = json.loads(response['body'])
+    return len(body['friends'] if 'friends' in body else body['data'])
+
+
+def timed(call, runs: int) -> tuple:
+    """Run `call` `runs` times. Returns (median seconds, last result)."""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = call()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Friend-list hydration latency benchmark.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000], help='Friend counts (default: 10 100 1000)')
+    parser.add_argument('--runs', type=int, default=5, help='Requests per path and size (default: 5)')
+    parser.add_argument('--latency-ms', type=float, default=8, help='Simulated latency per DynamoDB call (default: 8)')
+    parser.add_argument('--endpoint-url', help='DynamoDB Local / moto_server URL (default: moto in-process)')
+    args = parser.parse_args()
+
+    mock = local_dynamodb.start(args.endpoint_url)
+    dynamodb = boto3.resource('dynamodb')
+    try:
+        users_table = local_dynamodb.create_table(dynamodb, 'Users', 'UserId')
+        edges_table = local_dynamodb.create_table(dynamodb, 'UserEdges', 'UserId', 'EdgeKey')
+        get_user_friends = local_dynamodb.import_lambda('get_user_friends')
+        get_active_friends = local_dynamodb.import_lambda('get_active_friends')
+
+        calls = Counter()
+
+        def on_call(event_name, **kwargs):
+            calls[event_name.rsplit('.', 1)[-1]] += 1
+            time.sleep(args.latency_ms / 1000)
+        # Each module created its own resource, so each client gets the hook
+        for client in {users_table.meta.client, get_user_friends.dynamodb.meta.client,
+                       get_active_friends.dynamodb.meta.client}:
+            client.meta.events.register('before-call.dynamodb', on_call)
+
+        users_table.put_item(Item={'UserId': USER_ID, 'Username': 'bench', 'IsActive': True})
+        event = {'httpMethod': 'POST', 'body': json.dumps({'UserId': USER_ID})}
+        paths = (
+            ('get_item per friend', lambda: len(legacy_hydrate(users_table, edges_table, USER_ID))),
+            ('get_user_friends', lambda: friend_count(get_user_friends.lambda_handler(event, None))),
+            ('get_active_friends', lambda: friend_count(get_active_friends.lambda_handler(event, None))),
+        )
+
+        print(f"\n{'friends':>8}  {'path':22}{'round trips':>13}{'median ms':>12}")
+        loaded = 0
+        for size in sorted(args.sizes):
+            with users_table.batch_writer() as users, edges_table.batch_writer() as edges:
+                for i in range(loaded, size):
+                    users.put_item(Item={'UserId': f"friend{i:05d}", 'Username': f"friend {i}",
+                                         'FullName': f"Friend {i}", 'Email': f"friend{i}@example.com", 'IsActive': True})
+                    edges.put_item(Item={'UserId': USER_ID, 'EdgeKey': f"FRIEND#friend{i:05d}", 'TargetId': f"friend{i:05d}"})
+            loaded = size
+
+            for name, call in paths:
+                calls.clear()
+                median, returned = timed(call, args.runs)
+                if returned != size:
+                    print(f"❌ {name} returned {returned} of {size} friends", file=sys.stderr)
+                    sys.exit(1)
+                print(f"{size:>8}  {name:22}{sum(calls.values()) / args.runs:>13.0f}{median * 1000:>12.1f}")
+        print("\n✓ Every path returned the full friend list at each size")
+    finally:
+        local_dynamodb.delete_tables(dynamodb, TABLES)
+        if mock:
+            mock.stop()
+
+
+if __name__ == '__main__':
+    main()
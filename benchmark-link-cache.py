@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark and invalidation check for track_click's warm-container link cache.
+
+--redirects redirects are drawn from a Zipf distribution over --links links and
+sent through track_click.lambda_handler, while a random link is edited (its
+cache stamp bumped, as the link writers do) every --edit-every redirects. The
+stream is run once with a single stamp bucket, where every edit drops each warm
+container's whole cache as the old global Links version did, and once with
+--buckets buckets, where an edit only drops the cached links hashed to the same
+bucket. For each the script counts the GetItem calls that reach the Links and
+CacheStamps tables, compares them with the one Links read per redirect made
+without the cache, and prints the cache's own hit/miss/invalidation counters.
+
+It then deactivates the hottest link through delete_link.lambda_handler, waits
+one stamp-check interval and checks that the next redirect returns 404 instead
+of the cached destination.
+
+Runs against DynamoDB Local / moto_server (--endpoint-url) or moto in-process.
+
+Usage:
+    python3 benchmark-link-cache.py [--redirects 10000] [--links 2000] [--skew 1.1] [--edit-every 50] [--buckets 64] [--endpoint-url http://localhost:8000]
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+import boto3
+
+import local_dynamodb
+
+STAMP_CHECK_SECONDS = 0.5
+TABLES = ['Links', 'LinkClickShards', 'LinkClicks', 'CacheStamps', 'Users']
+
+
+def zipf_stream(count: int, links: int, skew: float, seed: int) -> list:
+    """Return `count` link ids drawn with P(rank r) proportional to 1 / r^skew."""
+    rng = random.Random(seed)
+    cumulative = list(itertools.accumulate(1 / rank ** skew for rank in range(1, links + 1)))
+    return rng.choices([f"link{i:05d}" for i in range(links)], cum_weights=cumulative, k=count)
+
+
+def redirect(track_click, link_id: str) -> int:
+    event = {'httpMethod': 'POST', 'headers': {}, 'body': json.dumps({'code': link_id})}
+    return track_click.lambda_handler(event, None)['statusCode']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Link cache reads-per-redirect benchmark.")
+    parser.add_argument('--redirects', type=int, default=10000, help='Redirects to send (default: 10000)')
+    parser.add_argument('--links', type=int, default=2000, help='Distinct links (default: 2000)')
+    parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent (default: 1.1)')
+    parser.add_argument('--seed', type=int, default=7, help='Random seed (default: 7)')
+    parser.add_argument('--edit-every', type=int, default=50, help='Redirects between link edits (default: 50)')
+    parser.add_argument('--buckets', type=int, default=64, help='Cache stamp buckets to compare with 1 (default: 64)')
+    parser.add_argument('--endpoint-url', help='DynamoDB Local / moto_server URL (default: moto in-process)')
+    args = parser.parse_args()
+
+    os.environ['LINK_CACHE_STAMP_CHECK_SECONDS'] = str(STAMP_CHECK_SECONDS)
+    mock = local_dynamodb.start(args.endpoint_url)
+    dynamodb = boto3.resource('dynamodb')
+    try:
+        links_table = local_dynamodb.create_table(dynamodb, 'Links', 'LinkId')
+        local_dynamodb.create_table(dynamodb, 'LinkClickShards', 'ShardKey')
+        local_dynamodb.create_table(dynamodb, 'LinkClicks', 'ClickId')
+        local_dynamodb.create_table(dynamodb, 'CacheStamps', 'StampId')
+        local_dynamodb.create_table(dynamodb, 'Users', 'UserId')
+        with links_table.batch_writer() as batch:
+            for i in range(args.links):
+                batch.put_item(Item={'LinkId': f"link{i:05d}", 'UserId': 'owner', 'String': f"https://example.com/{i}",
+                                     'IsActive': True, 'IsPasswordProtected': False, 'NumberOfClicks': 0})
+
+        track_click = local_dynamodb.import_lambda('track_click')
+        delete_link = local_dynamodb.import_lambda('delete_link')
+
+        reads = Counter()
+
+        def count_read(params, **kwargs):
+            reads[params['TableName']] += 1
+        track_click.links_table.meta.client.meta.events.register('provide-client-params.dynamodb.GetItem', count_read)
+
+        stream = zipf_stream(args.redirects, args.links, args.skew, args.seed)
+        edits = random.Random(args.seed + 1)
+        results = {}
+        for buckets in (1, args.buckets):
+            # Both sides must hash into the same number of buckets
+            track_click.LINK_CACHE_STAMP_BUCKETS = delete_link.LINK_CACHE_STAMP_BUCKETS = buckets
+            track_click._link_cache.clear()
+            track_click._link_cache_stamp.update(versions=None, checked_at=0.0)
+            track_click._link_cache_stats.update(hits=0, misses=0, invalidations=0)
+            reads.clear()
+            started = time.perf_counter()
+            for count, link_id in enumerate(stream, 1):
+                redirect(track_click, link_id)
+                if count % args.edit_every == 0:
+                    delete_link._bump_links_cache_stamp(f"link{edits.randrange(args.links):05d}")
+            results[buckets] = (dict(reads), dict(track_click._link_cache_stats), time.perf_counter() - started)
+
+        print(f"\n{args.redirects} redirects over {args.links} links (Zipf s={args.skew}), "
+              f"one link edited every {args.edit_every} redirects")
+        print(f"{'':28}{'without cache':>14}{'1 bucket':>12}{f'{args.buckets} buckets':>12}")
+        rows = (
+            ('Links reads', lambda reads, stats: reads.get('Links', 0)),
+            ('CacheStamps reads', lambda reads, stats: reads.get('CacheStamps', 0)),
+            ('reads per 10k redirects',
+             lambda reads, stats: round((reads.get('Links', 0) + reads.get('CacheStamps', 0)) * 10000 / args.redirects)),
+            ('hit rate %', lambda reads, stats: round(100 * stats['hits'] / max(stats['hits'] + stats['misses'], 1), 1)),
+            ('invalidations', lambda reads, stats: stats['invalidations']),
+        )
+        without_cache = {'Links reads': args.redirects, 'CacheStamps reads': 0, 'reads per 10k redirects': 10000,
+                         'hit rate %': 0, 'invalidations': 0}
+        for name, value in rows:
+            print(f"{name:28}{without_cache[name]:>14}"
+                  + ''.join(f"{value(*results[buckets][:2]):>12}" for buckets in (1, args.buckets)))
+        print(f"{'seconds':28}{'':>14}" + ''.join(f"{results[buckets][2]:>12.1f}" for buckets in (1, args.buckets)))
+
+        hottest = Counter(stream).most_common(1)[0][0]
+        redirect(track_click, hottest)
+        delete_link.lambda_handler({'httpMethod': 'POST', 'body': json.dumps({'LinkId': hottest})}, None)
+        time.sleep(STAMP_CHECK_SECONDS)
+        status = redirect(track_click, hottest)
+        if status != 404:
+            print(f"❌ Deactivated link {hottest} still redirected (status {status})", file=sys.stderr)
+            sys.exit(1)
+        print(f"✓ Deactivating {hottest} invalidated its cached copy within {STAMP_CHECK_SECONDS}s "
+              f"(404 on next redirect, {args.buckets} buckets)")
+    finally:
+        local_dynamodb.delete_tables(dynamodb, TABLES)
+        if mock:
+            mock.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for get_user_by_id's parallel profile fan-out.
+
+A delay is injected into each branch's DynamoDB call (the Users get_item, the
+UserAchievements query and the Links index query). For each delay mix the
+script times the three branches run one after another, as the Lambda used to,
+and lambda_handler's parallel fan-out. It prints both medians next to the sum
+and the slowest of the injected delays. The stand-in's own time is measured first
+with no delays and taken off each median, and the script checks that the
+parallel time added follows the slowest branch rather than the sum.
+
+It then sends --timed-out loads in a row whose links branch outlives the
+deadline, followed by a normal load. It checks that the slow loads come back
+degraded and that the normal load does not queue behind their abandoned
+branches in the executor. Each stale branch outlives the later slow loads, so
+with fewer than 3 + --timed-out workers the normal load queues.
+
+Runs against DynamoDB Local / moto_server (--endpoint-url) or moto in-process.
+
+Usage:
+    python3 benchmark-profile-fanout.py [--runs 10] [--timeout-ms 1000] [--timed-out 6] [--endpoint-url http://localhost:8000]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import boto3
+
+import local_dynamodb
+
+USER_ID = 'bench-user'
+TABLES = ['Users', 'Links', 'UserAchievements', 'Achievement']
+# (users ms, achievements ms, links ms)
+DELAY_MIXES = [(0, 0, 0), (100, 100, 100), (50, 100, 200), (200, 50, 50), (25, 25, 300)]
+
+
+def timed(call, runs: int) -> tuple:
+    """Run `call` `runs` times. Returns (median seconds, last result)."""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = call()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples), result
+
+
+def fail(message: str):
+    print(f"❌ {message}", file=sys.stderr)
+    sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile fan-out latency benchmark.")
+    parser.add_argument('--runs', type=int, default=10, help='Profile loads per path and mix (default: 10)')
+    parser.add_argument('--timeout-ms', type=float, default=1000, help='Profile deadline (default: 1000)')
+    parser.add_argument('--timed-out', type=int, default=6, help='Consecutive timed-out loads (default: 6)')
+    parser.add_argument('--endpoint-url', help='DynamoDB Local / moto_server URL (default: moto in-process)')
+    args = parser.parse_args()
+
+    os.environ['PROFILE_BRANCH_TIMEOUT_SECONDS'] = str(args.timeout_ms / 1000)
+    mock = local_dynamodb.start(args.endpoint_url)
+    dynamodb = boto3.resource('dynamodb')
+    try:
+        users_table = local_dynamodb.create_table(dynamodb, 'Users', 'UserId')
+        links_table = local_dynamodb.create_table(dynamodb, 'Links', 'LinkId', indexes=[('UserId-index', 'UserId', None)])
+        user_achievements_table = local_dynamodb.create_table(dynamodb, 'UserAchievements', 'UserId', 'SortingKey')
+        achievements_table = local_dynamodb.create_table(dynamodb, 'Achievement', 'AchId')
+        users_table.put_item(Item={'UserId': USER_ID, 'Username': 'bench', 'IsActive': True})
+        with links_table.batch_writer() as batch:
+            for i in range(10):
+                batch.put_item(Item={'LinkId': f"link{i:03d}", 'UserId': USER_ID, 'String': f"https://example.com/{i}",
+                                     'Name': f"Link {i}", 'IsActive': True, 'IsPrivate': False})
+        for ach_id in ('1', '2'):
+            achievements_table.put_item(Item={'AchId': ach_id, 'Name': f"Milestone {ach_id}"})
+            user_achievements_table.put_item(Item={'UserId': USER_ID, 'SortingKey': f"link000#{ach_id}",
+                                                   'AchievementId': ach_id, 'LinkId': 'link000'})
+
+        profile = local_dynamodb.import_lambda('get_user_by_id')
+        delays = {'Users': 0.0, 'UserAchievements': 0.0, 'Links': 0.0}
+
+        def delay(params, **kwargs):
+            time.sleep(delays.get(params.get('TableName'), 0.0))
+
+        # Every thread builds its own client in _tables(), so hook each one
+        original_tables = profile._tables
+
+        def tables_with_delays():
+            tables = original_tables()
+            client = tables['users'].meta.client
+            if not getattr(client, 'bench_delays', False):
+                client.meta.events.register('provide-client-params.dynamodb', delay)
+                client.bench_delays = True
+            return tables
+        profile._tables = tables_with_delays
+
+        event = {'httpMethod': 'POST', 'body': json.dumps({'ProfileOwnerId': USER_ID, 'LoggedInUserId': USER_ID})}
+
+        def sequential():
+            profile._get_user_info(USER_ID)
+            profile._get_user_achievements(USER_ID)
+            profile._get_user_links_page(USER_ID, True, profile.DEFAULT_LINKS_PAGE_SIZE)
+
+        def parallel():
+            response = profile.lambda_handler(event, None)
+            if response['statusCode'] != 200:
+                fail(f"Profile load returned {response['statusCode']}: {response['body']}")
+            return json.loads(response['body'])
+
+        parallel()  # load the achievement catalog and build the per-thread clients
+        print(f"\n{'delays ms (user/ach/links)':28}{'sum':>6}{'slowest':>9}{'sequential +ms':>16}{'parallel +ms':>14}")
+        baseline = None
+        for mix in DELAY_MIXES:
+            delays.update(zip(('Users', 'UserAchievements', 'Links'), (ms / 1000 for ms in mix)))
+            sequential_median, _ = timed(sequential, args.runs)
+            parallel_median, body = timed(parallel, args.runs)
+            if body.get('degraded'):
+                fail(f"Branches {body['degraded']} degraded with delays {mix}")
+            if baseline is None:
+                baseline = (sequential_median, parallel_median)
+                print(f"{'0/0/0 (stand-in time, ms)':28}{0:>6}{0:>9}"
+                      f"{sequential_median * 1000:>16.1f}{parallel_median * 1000:>14.1f}")
+                continue
+            sequential_added = (sequential_median - baseline[0]) * 1000
+            parallel_added = (parallel_median - baseline[1]) * 1000
+            print(f"{'/'.join(map(str, mix)):28}{sum(mix):>6}{max(mix):>9}"
+                  f"{sequential_added:>16.1f}{parallel_added:>14.1f}")
+            if parallel_added > max(mix) + 0.5 * (sum(mix) - max(mix)):
+                fail(f"Parallel load added {parallel_added:.1f} ms, closer to the sum than the slowest branch")
+        print("✓ Parallel profile time follows the slowest branch, not the sum")
+
+        # Each stale links branch outlives all the later timed-out loads, so they pile up
+        delays.update(Users=0.01, UserAchievements=0.01, Links=(args.timed_out + 1) * args.timeout_ms / 1000)
+        for _ in range(args.timed_out):
+            body = parallel()
+            if body.get('degraded') != ['links']:
+                fail(f"A load with a slow links branch returned degraded={body.get('degraded')}")
+        delays.update(Users=0.01, UserAchievements=0.01, Links=0.01)
+        # Stale branches still hold their workers for a while; a load queued behind
+        # them waits, one that is not costs about the no-delay time plus 10 ms
+        median, body = timed(parallel, 3)
+        if body.get('degraded') or median > baseline[1] + 0.05:
+            fail(f"Loads after {args.timed_out} timed-out loads took {median * 1000:.1f} ms "
+                 f"(degraded={body.get('degraded')})")
+        print(f"✓ {args.timed_out} timed-out loads came back degraded; the next loads took {median * 1000:.1f} ms "
+              f"with {profile.PROFILE_EXECUTOR_WORKERS} executor workers")
+        profile._profile_executor.shutdown(wait=True)  # let the stale branches finish against the stand-in
+    finally:
+        local_dynamodb.delete_tables(dynamodb, TABLES)
+        if mock:
+            mock.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Accuracy-versus-memory benchmark for the trending-links summary used by
+Lambdas/update_trending_links.py (space-saving candidates backed by a
+count-min sketch).
+
+A synthetic click stream is drawn from a Zipf distribution over --links links
+and fed to summaries of several sizes. For each size the script prints the
+sketch memory (counters x 4 bytes plus ~64 bytes per candidate), the recall of
+the true top-K and the mean relative error of the reported counts.
+
+Nothing is read from or written to AWS; boto3 is only needed because the
+Lambda module creates its client on import.
+
+Usage:
+    python3 benchmark-trending.py [--clicks 500000] [--links 50000] [--skew 1.1] [--top 20]
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Lambdas'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from update_trending_links import CountMinSketch, SpaceSaving  # noqa: E402
+
+CONFIGURATIONS = [
+    # (candidates, sketch width, sketch depth)
+    (50, 256, 2),
+    (100, 512, 3),
+    (200, 1024, 4),
+    (200, 2048, 4),
+    (500, 4096, 4),
+    (1000, 8192, 5),
+]
+
+
+def zipf_stream(clicks: int, links: int, skew: float, seed: int) -> list:
+    """
+    Return `clicks` link ids drawn with P(rank r) proportional to 1 / r^skew.
+    Ranks are shuffled onto the ids so the hot links are not simply the first ones.
+    """
+    rng = random.Random(seed)
+    ids = [f"link-{i:06d}" for i in range(links)]
+    rng.shuffle(ids)
+    cumulative = list(itertools.accumulate(1 / rank ** skew for rank in range(1, links + 1)))
+    return rng.choices(ids, cum_weights=cumulative, k=clicks)
+
+
+def evaluate(stream: list, truth: Counter, top: int, capacity: int, width: int, depth: int) -> dict:
+    summary = SpaceSaving(capacity=capacity, sketch=CountMinSketch(width=width, depth=depth))
+    started = time.perf_counter()
+    for link_id in stream:
+        summary.add(link_id)
+    elapsed = time.perf_counter() - started
+
+    reported = summary.top(top)
+    true_top = {link_id for link_id, _ in truth.most_common(top)}
+    errors = [abs(count - truth[link_id]) / truth[link_id] for link_id, count in reported]
+    return {
+        'memory': width * depth * 4 + capacity * 64,
+        'recall': len(true_top & {link_id for link_id, _ in reported}) / len(true_top),
+        'error': sum(errors) / len(errors) if errors else 0.0,
+        'rate': len(stream) / elapsed if elapsed else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trending summary accuracy vs. memory on a Zipf click stream.")
+    parser.add_argument('--clicks', type=int, default=500000, help='Clicks in the stream (default: 500000)')
+    parser.add_argument('--links', type=int, default=50000, help='Distinct links (default: 50000)')
+    parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent (default: 1.1)')
+    parser.add_argument('--top', type=int, default=20, help='K of the top-K being measured (default: 20)')
+    parser.add_argument('--seed', type=int, default=7, help='Random seed (default: 7)')
+    args = parser.parse_args()
+
+    print(f"• Generating {args.clicks} clicks over {args.links} links (Zipf s={args.skew})...")
+    stream = zipf_stream(args.clicks, args.links, args.skew, args.seed)
+    truth = Counter(stream)
+    exact_memory = len(truth) * 64
+    print(f"• Exact counting would track {len(truth)} links (~{exact_memory // 1024} KB)\n")
+
+    print(f"{'candidates':>10} {'width':>6} {'depth':>5} {'memory KB':>10} "
+          f"{'recall@' + str(args.top):>10} {'count err':>10} {'clicks/s':>10}")
+    for capacity, width, depth in CONFIGURATIONS:
+        result = evaluate(stream, truth, args.top, capacity, width, depth)
+        print(f"{capacity:>10} {width:>6} {depth:>5} {result['memory'] / 1024:>10.1f} "
+              f"{result['recall']:>10.0%} {result['error']:>10.2%} {result['rate']:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark and correctness check for the per-user UnreadNotifications
+counter read by check_unread_notifications.
+
+The Notifications table is grown to each of --sizes items, almost all of them
+addressed to other users. At each size the script times two things:
+
+  • the old check: a Notifications scan filtered on ToUserId and IsRead = 0,
+    first page only, as the Lambda used to do
+  • check_unread_notifications.lambda_handler: one projected Users get_item
+
+It prints the median latency and the items read by each. The old check's
+answer is wrong once the user's notifications fall past the first 1MB page.
+
+It then runs the counter through its lifecycle and checks every step. Unread
+notifications come in through new_notif, mark_notifications_as_read moves the
+NotificationsReadAt watermark, and respond_to_friend_request's decrement only
+applies to a request newer than the watermark.
+
+Runs against DynamoDB Local / moto_server (--endpoint-url) or moto in-process.
+
+Usage:
+    python3 benchmark-unread-counter.py [--sizes 1000 10000 50000] [--runs 5] [--endpoint-url http://localhost:8000]
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+import uuid
+
+import boto3
+
+import local_dynamodb
+
+USER_ID = 'bench-user'
+UNREAD_FOR_USER = 5
+TABLES = ['Users', 'Notifications']
+
+
+def legacy_check(notifications_table, user_id: str) -> tuple:
+    """The old check: one filtered scan page. Returns (has unread, items read)."""
+    response = notifications_table.scan(
+        FilterExpression='ToUserId = :u AND IsRead = :zero',
+        ExpressionAttributeValues={':u': user_id, ':zero': 0}
+    )
+    return bool(response['Items']), response['ScannedCount']
+
+
+def timed(call, runs: int) -> tuple:
+    """Run `call` `runs` times. Returns (median seconds, last result)."""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = call()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples), result
+
+
+def send_notification(new_notif, to_user: str):
+    body = {'ToUserId': to_user, 'FromUserId': 'someone', 'Text': 'hello', 'IsRead': 0}
+    response = new_notif.lambda_handler({'body': json.dumps(body)}, None)
+    if response['statusCode'] != 201:
+        print(f"❌ new_notif failed: {response['body']}", file=sys.stderr)
+        sys.exit(1)
+
+
+def unread_count(check_unread) -> int:
+    response = check_unread.lambda_handler({'body': json.dumps({'UserId': USER_ID})}, None)
+    return json.loads(response['body'])['unreadCount']
+
+
+def expect(label: str, actual, expected):
+    if actual != expected:
+        print(f"❌ {label}: got {actual}, expected {expected}", file=sys.stderr)
+        sys.exit(1)
+    print(f"✓ {label}: {actual}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Unread-notification counter benchmark.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000],
+                        help='Notifications table sizes (default: 1000 10000 50000)')
+    parser.add_argument('--runs', type=int, default=5, help='Checks per path and size (default: 5)')
+    parser.add_argument('--endpoint-url', help='DynamoDB Local / moto_server URL (default: moto in-process)')
+    args = parser.parse_args()
+
+    mock = local_dynamodb.start(args.endpoint_url)
+    dynamodb = boto3.resource('dynamodb')
+    try:
+        users_table = local_dynamodb.create_table(dynamodb, 'Users', 'UserId')
+        notifications_table = local_dynamodb.create_table(dynamodb, 'Notifications', 'NotificationId')
+        check_unread = local_dynamodb.import_lambda('check_unread_notifications')
+        new_notif = local_dynamodb.import_lambda('new_notif')
+        mark_read = local_dynamodb.import_lambda('mark_notifications_as_read')
+        respond = local_dynamodb.import_lambda('respond_to_friend_request')
+
+        users_table.put_item(Item={'UserId': USER_ID, 'IsActive': True})
+        users_table.put_item(Item={'UserId': 'someone', 'IsActive': True})
+        for _ in range(UNREAD_FOR_USER):
+            send_notification(new_notif, USER_ID)
+
+        print(f"\n{'notifications':>14}  {'check':28}{'items read':>12}{'median ms':>11}{'answer':>8}")
+        loaded = UNREAD_FOR_USER
+        for size in sorted(args.sizes):
+            with notifications_table.batch_writer() as batch:
+                for i in range(loaded, size):
+                    batch.put_item(Item={'NotificationId': str(uuid.uuid4()), 'ToUserId': f"other{i % 997}",
+                                         'FromUserId': 'someone', 'IsRead': i % 2, 'Text': 'x' * 200,
+                                         'Timestamp': '2025-01-01T00:00:00+00:00'})
+            loaded = max(loaded, size)
+
+            median, (has_unread, scanned) = timed(lambda: legacy_check(notifications_table, USER_ID), args.runs)
+            print(f"{size:>14}  {'scan (first page)':28}{scanned:>12}{median * 1000:>11.1f}{str(has_unread):>8}")
+            median, count = timed(lambda: unread_count(check_unread), args.runs)
+            print(f"{size:>14}  {'UnreadNotifications get_item':28}{1:>12}{median * 1000:>11.1f}{str(count > 0):>8}")
+            if count != UNREAD_FOR_USER:
+                print(f"❌ Counter reads {count}, expected {UNREAD_FOR_USER}", file=sys.stderr)
+                sys.exit(1)
+
+        print()
+        expect('Unread count after new_notif', unread_count(check_unread), UNREAD_FOR_USER)
+        response = mark_read.lambda_handler({'body': json.dumps({'userId': USER_ID})}, None)
+        expect('markedCount from mark_notifications_as_read', json.loads(response['body'])['markedCount'], UNREAD_FOR_USER)
+        expect('Unread count after marking read', unread_count(check_unread), 0)
+
+        # Answering a friend request decrements the counter only if the request is
+        # newer than the watermark; older ones were already counted as read.
+        send_notification(new_notif, USER_ID)
+        expect('Unread count after one new notification', unread_count(check_unread), 1)
+        respond._decrement_unread(USER_ID, '2000-01-01T00:00:00+00:00')
+        expect('Unread count after answering a request older than the watermark', unread_count(check_unread), 1)
+        respond._decrement_unread(USER_ID, '2999-01-01T00:00:00+00:00')
+        expect('Unread count after answering a request newer than the watermark', unread_count(check_unread), 0)
+        print("\n✓ Counter latency is independent of the Notifications table size")
+    finally:
+        local_dynamodb.delete_tables(dynamodb, TABLES)
+        if mock:
+            mock.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Build the compact IPv4 → country range table that track_click memory-maps to
+resolve click countries without any network service.
+
+Input is a CSV GeoIP database with one range per row, in either form:
+
+    start,end,country[,...]     start/end as dotted IPv4 or integers
+                                (IP2Location LITE DB1, DB-IP lite country)
+    network,country[,...]       CIDR notation, e.g. 1.0.0.0/24,AU
+
+A header row, IPv6 rows and rows without a two-letter country are skipped.
+Ranges are sorted, adjacent ranges of the same country are merged and overlaps
+are rejected. Output layout (little-endian):
+
+    8-byte magic "GEOIP1\\0\\0" · uint32 range count · uint32 country count
+    2-byte country codes (padded to 4 bytes)
+    uint32 starts[count] · uint32 ends[count] · uint16 country index[count]
+
+Ship the file in a Lambda layer (GEOIP_TABLE_PATH, default
+/opt/geoip/countries.bin) or upload it with --upload and set
+GEOIP_TABLE_S3_URI. --benchmark N times N lookups through track_click's own
+resolver.
+
+Usage:
+    python3 build-geoip-table.py IP2LOCATION-LITE-DB1.CSV countries.bin [--benchmark 2000000]
+    python3 build-geoip-table.py dbip-country-lite.csv countries.bin --upload s3://my-bucket/geoip/countries.bin
+"""
+import argparse
+import csv
+import ipaddress
+import os
+import random
+import socket
+import struct
+import sys
+import time
+
+import boto3
+from botocore.exceptions import ClientError
+
+MAGIC = b'GEOIP1\0\0'
+
+
+def parse_address(value: str):
+    """
+    Integer value of a dotted IPv4 address or decimal string, or None (IPv6, junk).
+    """
+    value = value.strip()
+    if value.isdigit():
+        number = int(value)
+        return number if number <= 0xFFFFFFFF else None
+    try:
+        return int(ipaddress.IPv4Address(value))
+    except ValueError:
+        return None
+
+
+def read_ranges(csv_path: str) -> list:
+    """
+    Return [(start, end, country)] for every usable IPv4 row of the CSV.
+    """
+    ranges = []
+    skipped = 0
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        for row in csv.reader(f):
+            if len(row) < 2:
+                skipped += 1
+                continue
+            if '/' in row[0]:
+                try:
+                    network = ipaddress.ip_network(row[0].strip(), strict=False)
+                except ValueError:
+                    network = None
+                if network is None or network.version != 4:
+                    skipped += 1
+                    continue
+                start, end, country = int(network.network_address), int(network.broadcast_address), row[1]
+            elif len(row) >= 3:
+                start, end, country = parse_address(row[0]), parse_address(row[1]), row[2]
+            else:
+                skipped += 1
+                continue
+
+            country = country.strip().upper()
+            if start is None or end is None or start > end or len(country) != 2 or not country.isalpha():
+                skipped += 1
+                continue
+            ranges.append((start, end, country))
+    print(f"• {len(ranges)} IPv4 ranges read, {skipped} rows skipped")
+    return ranges
+
+
+def merge_ranges(ranges: list) -> list:
+    """
+    Sort the ranges, merge touching ranges of the same country, reject overlaps.
+    """
+    merged = []
+    for start, end, country in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            raise ValueError(f"overlapping ranges at {ipaddress.IPv4Address(start)}")
+        if merged and merged[-1][2] == country and start == merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], end, country)
+        else:
+            merged.append((start, end, country))
+    print(f"• {len(merged)} ranges after merging")
+    return merged
+
+
+def write_table(ranges: list, output_path: str) -> int:
+    """
+    Write the binary range table. Returns its size in bytes.
+    """
+    countries = sorted({country for _, _, country in ranges})
+    index = {country: i for i, country in enumerate(countries)}
+    header = MAGIC + struct.pack('<II', len(ranges), len(countries))
+    codes = ''.join(countries).encode('ascii')
+    codes += b'\0' * (-len(codes) % 4)
+    with open(output_path, 'wb') as f:
+        f.write(header)
+        f.write(codes)
+        f.write(struct.pack(f'<{len(ranges)}I', *(start for start, _, _ in ranges)))
+        f.write(struct.pack(f'<{len(ranges)}I', *(end for _, end, _ in ranges)))
+        f.write(struct.pack(f'<{len(ranges)}H', *(index[country] for _, _, country in ranges)))
+    return os.path.getsize(output_path)
+
+
+def benchmark(table_path: str, lookups: int, ranges: list):
+    """
+    Time `lookups` resolutions through track_click's resolver and spot-check
+    its answers against the ranges.
+    """
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Lambdas'))
+    os.environ['GEOIP_TABLE_PATH'] = os.path.abspath(table_path)
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    from track_click import _country_for_ip  # noqa: E402
+
+    rng = random.Random(7)
+    for start, end, country in rng.sample(ranges, min(1000, len(ranges))):
+        address = socket.inet_ntoa(struct.pack('>I', rng.randint(start, end)))
+        if _country_for_ip(address) != country:
+            print(f"❌ {address} resolved to {_country_for_ip(address)}, expected {country}")
+            sys.exit(1)
+    print("✓ Spot check of 1000 ranges passed")
+
+    addresses = [socket.inet_ntoa(struct.pack('>I', rng.getrandbits(32))) for _ in range(min(lookups, 100000))]
+    repeat = max(1, lookups // len(addresses))
+    resolved = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for address in addresses:
+            if _country_for_ip(address):
+                resolved += 1
+    elapsed = time.perf_counter() - started
+    total = repeat * len(addresses)
+    print(f"✓ {total} lookups in {elapsed:.2f}s: {total / elapsed:,.0f} lookups/s, "
+          f"{elapsed / total * 1e9:.0f} ns/lookup, {resolved / total:.1%} resolved")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the memory-mapped GeoIP country range table.")
+    parser.add_argument('csv', help='GeoIP CSV (start,end,country or network,country)')
+    parser.add_argument('output', help='Output table file, e.g. countries.bin')
+    parser.add_argument('--upload', metavar='S3_URI', help='Upload the table to s3://bucket/key')
+    parser.add_argument('--benchmark', type=int, metavar='N', help='Time N lookups with the built table')
+    args = parser.parse_args()
+
+    try:
+        ranges = merge_ranges(read_ranges(args.csv))
+    except (OSError, ValueError) as e:
+        print(f"❌ Could not read {args.csv}: {e}", file=sys.stderr)
+        sys.exit(1)
+    if not ranges:
+        print("❌ No IPv4 ranges found.", file=sys.stderr)
+        sys.exit(1)
+
+    size = write_table(ranges, args.output)
+    print(f"✓ Wrote {args.output}: {len(ranges)} ranges, {size / 1024:.0f} KB")
+
+    if args.upload:
+        bucket, _, key = args.upload[len('s3://'):].partition('/')
+        try:
+            boto3.client('s3').upload_file(args.output, bucket, key)
+        except ClientError as e:
+            print(f"❌ Upload failed: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"✓ Uploaded to {args.upload}")
+
+    if args.benchmark:
+        benchmark(args.output, args.benchmark, ranges)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Add the ToUserId-Timestamp-index global secondary index to the Notifications
+table (partition key ToUserId, sort key Timestamp, all attributes projected).
+
+get_all_notifications and compact_read_notifications query it with a
+Timestamp range, newest first, instead of reading the user's whole history.
+The index is built online; the script waits until it is ACTIVE. Deploy those
+Lambdas only after it finishes.
+
+Usage:
+    python3 create-notification-index.py [--table Notifications]
+"""
+import argparse
+import sys
+import time
+
+import boto3
+from botocore.exceptions import ClientError
+
+INDEX_NAME = 'ToUserId-Timestamp-index'
+
+
+def index_status(client, table_name: str):
+    """
+    Return the IndexStatus of INDEX_NAME, or None if the index does not exist.
+    """
+    table = client.describe_table(TableName=table_name)['Table']
+    for index in table.get('GlobalSecondaryIndexes', []):
+        if index['IndexName'] == INDEX_NAME:
+            return index['IndexStatus']
+    return None
+
+
+def create_index(client, table_name: str):
+    """
+    Request the index, using on-demand capacity if the table does.
+    """
+    table = client.describe_table(TableName=table_name)['Table']
+    create = {
+        'IndexName': INDEX_NAME,
+        'KeySchema': [
+            {'AttributeName': 'ToUserId', 'KeyType': 'HASH'},
+            {'AttributeName': 'Timestamp', 'KeyType': 'RANGE'}
+        ],
+        'Projection': {'ProjectionType': 'ALL'}
+    }
+    if table.get('BillingModeSummary', {}).get('BillingMode') != 'PAY_PER_REQUEST':
+        throughput = table['ProvisionedThroughput']
+        create['ProvisionedThroughput'] = {
+            'ReadCapacityUnits': throughput['ReadCapacityUnits'],
+            'WriteCapacityUnits': throughput['WriteCapacityUnits']
+        }
+
+    client.update_table(
+        TableName=table_name,
+        AttributeDefinitions=[
+            {'AttributeName': 'ToUserId', 'AttributeType': 'S'},
+            {'AttributeName': 'Timestamp', 'AttributeType': 'S'}
+        ],
+        GlobalSecondaryIndexUpdates=[{'Create': create}]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=f"Create {INDEX_NAME} on the Notifications table.")
+    parser.add_argument('--table', default='Notifications', help='Notifications table name (default: Notifications)')
+    args = parser.parse_args()
+
+    client = boto3.client('dynamodb')
+    try:
+        status = index_status(client, args.table)
+        if status is None:
+            create_index(client, args.table)
+            print(f"• Creating {INDEX_NAME} on {args.table}...")
+        else:
+            print(f"• {INDEX_NAME} already exists ({status})")
+
+        while index_status(client, args.table) != 'ACTIVE':
+            time.sleep(15)
+            print("• Still backfilling...")
+    except ClientError as e:
+        print(f"❌ Could not create {INDEX_NAME}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"\n✅ {INDEX_NAME} is ACTIVE on {args.table}.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Export Links, Users, UserAchievements and the LinkClicks click log to
+compressed Parquet files for offline analytics, so heavy reporting runs on
+columnar files instead of scanning the live tables.
+
+Each table is read with a parallel scan (--segments workers, one per scan
+segment). Every worker streams its pages into ParquetWriter record batches of
+--batch-rows rows, so memory stays bounded whatever the table size. Output
+layout (Hive-style partitions, one file per segment and partition):
+
+    <output>/<table>/part-<segment>.parquet
+    <output>/LinkClicks/date=YYYY-MM-DD/part-<segment>.parquet
+
+Attributes without a column of their own are kept as JSON in the Extra
+column; passwords and e-mail addresses are never exported. An s3:// output is
+written to a temporary directory first and uploaded table by table.
+
+Requires pyarrow (pip install pyarrow).
+
+Usage:
+    python3 export-parquet.py --output ./export [--segments 8] [--tables Links LinkClicks]
+    python3 export-parquet.py --output s3://my-bucket/exports/2026-10-18 --compression snappy
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import boto3
+from boto3.dynamodb.types import Binary
+from botocore.exceptions import ClientError
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Column name -> type ('string', 'int', 'bool' or 'timestamp'), per table
+TABLE_COLUMNS = {
+    'Links': {
+        'LinkId': 'string', 'UserId': 'string', 'Name': 'string', 'Description': 'string',
+        'String': 'string', 'IsPrivate': 'bool', 'IsPasswordProtected': 'bool', 'IsActive': 'bool',
+        'NumberOfClicks': 'int', 'Date': 'timestamp'
+    },
+    'Users': {
+        'UserId': 'string', 'Username': 'string', 'FullName': 'string', 'Country': 'string',
+        'DateJoined': 'timestamp', 'IsActive': 'bool', 'UnreadNotifications': 'int'
+    },
+    'UserAchievements': {
+        'UserId': 'string', 'SortingKey': 'string', 'AchievementId': 'string', 'LinkId': 'string',
+        'LinkName': 'string', 'DateEarned': 'timestamp'
+    },
+    'LinkClicks': {
+        'ClickId': 'string', 'LinkId': 'string', 'Timestamp': 'timestamp', 'Country': 'string',
+        'Referrer': 'string', 'UserAgentClass': 'string', 'VisitorHash': 'string'
+    }
+}
+
+# Tables partitioned by the day of one of their timestamp columns
+PARTITION_COLUMNS = {'LinkClicks': 'Timestamp'}
+
+EXCLUDED_ATTRIBUTES = {'Password', 'Email'}
+
+
+def arrow_schema(table_name: str):
+    types = {'string': pa.string(), 'int': pa.int64(), 'bool': pa.bool_(), 'timestamp': pa.timestamp('us', tz='UTC')}
+    fields = [pa.field(name, types[kind]) for name, kind in TABLE_COLUMNS[table_name].items()]
+    return pa.schema(fields + [pa.field('Extra', pa.string())])
+
+
+def to_timestamp(value):
+    """
+    Parse an ISO 8601 string (naive values are UTC, as the Lambdas write them).
+    """
+    try:
+        moment = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def convert(value, kind: str):
+    """
+    Convert a DynamoDB value to the column's type, or None if it does not fit.
+    """
+    if value is None:
+        return None
+    if kind == 'timestamp':
+        return to_timestamp(value)
+    if kind == 'int':
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+    if kind == 'bool':
+        return value if isinstance(value, bool) else None
+    return str(value)
+
+
+def json_default(value):
+    if isinstance(value, Decimal):
+        return int(value) if value % 1 == 0 else float(value)
+    if isinstance(value, set):
+        return sorted(value, key=str)
+    if isinstance(value, (Binary, bytes, bytearray)):
+        return None
+    raise TypeError(f"Cannot serialise {type(value)}")
+
+
+class SegmentWriter:
+    """
+    Buffers one scan segment's rows per partition and writes them as record batches.
+    """
+
+    def __init__(self, table_name: str, directory: str, segment: int, batch_rows: int, compression: str):
+        self.table_name = table_name
+        self.directory = directory
+        self.segment = segment
+        self.batch_rows = batch_rows
+        self.compression = compression
+        self.schema = arrow_schema(table_name)
+        self.columns = TABLE_COLUMNS[table_name]
+        self.buffers = {}
+        self.writers = {}
+        self.rows = 0
+
+    def add(self, item: dict):
+        row = {name: convert(item.get(name), kind) for name, kind in self.columns.items()}
+        extra = {name: value for name, value in item.items()
+                 if name not in self.columns and name not in EXCLUDED_ATTRIBUTES}
+        row['Extra'] = json.dumps(extra, default=json_default, sort_keys=True) if extra else None
+
+        partition = ''
+        partition_column = PARTITION_COLUMNS.get(self.table_name)
+        if partition_column:
+            moment = row[partition_column]
+            partition = f"date={moment.date().isoformat() if moment else 'unknown'}"
+
+        buffer = self.buffers.setdefault(partition, [])
+        buffer.append(row)
+        self.rows += 1
+        if len(buffer) >= self.batch_rows:
+            self.flush(partition)
+        elif sum(len(rows) for rows in self.buffers.values()) >= 4 * self.batch_rows:
+            # Many small partitions: write out the largest to keep memory bounded
+            self.flush(max(self.buffers, key=lambda key: len(self.buffers[key])))
+
+    def flush(self, partition: str):
+        rows = self.buffers.pop(partition, [])
+        if not rows:
+            return
+        writer = self.writers.get(partition)
+        if writer is None:
+            directory = os.path.join(self.directory, partition) if partition else self.directory
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"part-{self.segment:03d}.parquet")
+            writer = self.writers[partition] = pq.ParquetWriter(path, self.schema, compression=self.compression)
+        writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=self.schema))
+
+    def close(self):
+        for partition in list(self.buffers):
+            self.flush(partition)
+        for writer in self.writers.values():
+            writer.close()
+
+
+def export_segment(table, directory: str, segment: int, total_segments: int,
+                   batch_rows: int, compression: str, progress: dict, lock) -> int:
+    """
+    Scan one segment of the table into Parquet. Returns the number of rows written.
+    """
+    writer = SegmentWriter(table.name, directory, segment, batch_rows, compression)
+    paginator = table.meta.client.get_paginator('scan')
+    try:
+        for page in paginator.paginate(TableName=table.name, Segment=segment, TotalSegments=total_segments,
+                                       PaginationConfig={'PageSize': 1000}):
+            for item in page.get('Items', []):
+                writer.add(item)
+            with lock:
+                progress['rows'] += len(page.get('Items', []))
+                print(f"• {table.name}: {progress['rows']} items exported", file=sys.stderr)
+    finally:
+        writer.close()
+    return writer.rows
+
+
+def export_table(dynamodb, table_name: str, output: str, segments: int, batch_rows: int, compression: str) -> int:
+    directory = os.path.join(output, table_name)
+    if os.path.isdir(directory):
+        shutil.rmtree(directory)
+    os.makedirs(directory)
+
+    table = dynamodb.Table(table_name)
+    progress = {'rows': 0}
+    lock = threading.Lock()
+    with ThreadPoolExecutor(max_workers=segments) as executor:
+        futures = [executor.submit(export_segment, table, directory, segment, segments,
+                                   batch_rows, compression, progress, lock)
+                   for segment in range(segments)]
+        return sum(future.result() for future in futures)
+
+
+def upload_directory(s3_client, directory: str, bucket: str, prefix: str) -> int:
+    """
+    Upload every file under `directory` to s3://bucket/prefix/, keeping the layout.
+    """
+    uploaded = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            key = '/'.join(filter(None, [prefix.strip('/'), os.path.relpath(path, directory).replace(os.sep, '/')]))
+            s3_client.upload_file(path, bucket, key)
+            uploaded += 1
+    return uploaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export DynamoDB tables to partitioned Parquet files.")
+    parser.add_argument('--output', required=True, help='Local directory or s3://bucket/prefix')
+    parser.add_argument('--tables', nargs='+', default=list(TABLE_COLUMNS), choices=list(TABLE_COLUMNS),
+                        help='Tables to export (default: all)')
+    parser.add_argument('--segments', type=int, default=8, help='Parallel scan segments (default: 8)')
+    parser.add_argument('--batch-rows', type=int, default=10000, help='Rows per record batch (default: 10000)')
+    parser.add_argument('--compression', default='zstd', choices=['zstd', 'snappy', 'gzip', 'none'],
+                        help='Parquet compression codec (default: zstd)')
+    args = parser.parse_args()
+
+    if pa is None:
+        print("❌ pyarrow is required: pip install pyarrow", file=sys.stderr)
+        sys.exit(1)
+
+    to_s3 = args.output.startswith('s3://')
+    if to_s3:
+        bucket, _, prefix = args.output[len('s3://'):].partition('/')
+        output = tempfile.mkdtemp(prefix='parquet-export-')
+    else:
+        output = args.output
+        os.makedirs(output, exist_ok=True)
+
+    dynamodb = boto3.resource('dynamodb')
+    s3_client = boto3.client('s3') if to_s3 else None
+    try:
+        for table_name in args.tables:
+            rows = export_table(dynamodb, table_name, output, args.segments, args.batch_rows, args.compression)
+            print(f"✓ {table_name}: {rows} rows")
+            if to_s3:
+                files = upload_directory(s3_client, os.path.join(output, table_name), bucket,
+                                         f"{prefix.strip('/')}/{table_name}")
+                shutil.rmtree(os.path.join(output, table_name))
+                print(f"✓ Uploaded {files} file(s) to s3://{bucket}/{prefix.strip('/')}/{table_name}")
+    except ClientError as e:
+        print(f"❌ Export failed: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if to_s3:
+            shutil.rmtree(output, ignore_errors=True)
+
+    print(f"\n✅ Export complete: {', '.join(args.tables)} → {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Helpers shared by the benchmark and stress scripts: point boto3 at a local
+DynamoDB stand-in, import Lambda modules against it and create throwaway tables.
+
+With an endpoint URL (DynamoDB Local, or `moto_server`) every DynamoDB client,
+including the ones the Lambda modules create on import, talks to that endpoint.
+Without one, moto's in-process mock is used (pip install moto).
+"""
+import functools
+import importlib
+import os
+import sys
+import threading
+
+LAMBDAS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Lambdas')
+
+
+def start(endpoint_url: str = None):
+    """
+    Route DynamoDB to the stand-in. Must run before any Lambda module is imported.
+    Returns the moto mock (call .stop() when done) or None for an endpoint.
+    """
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'local')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'local')
+    if endpoint_url:
+        os.environ['AWS_ENDPOINT_URL_DYNAMODB'] = endpoint_url
+        print(f"• Using DynamoDB at {endpoint_url}")
+        return None
+    try:
+        from moto import mock_aws
+    except ImportError:
+        print("❌ No --endpoint-url given and moto is not installed (pip install moto).", file=sys.stderr)
+        sys.exit(1)
+    _serialize_moto_requests()
+    mock = mock_aws()
+    mock.start()
+    print("• Using moto's in-process DynamoDB mock (absolute timings are not DynamoDB's)")
+    return mock
+
+
+def _serialize_moto_requests():
+    """
+    moto's in-process backend is not thread-safe (concurrent transactions fail
+    inside it), so requests from concurrent threads are handled one at a time.
+    Client-side interleaving, e.g. between a read and a write, is unaffected.
+    """
+    from moto.core.botocore_stubber import BotocoreStubber
+    if getattr(BotocoreStubber.__call__, 'serialized', False):
+        return
+    lock = threading.Lock()
+    handle = BotocoreStubber.__call__
+
+    @functools.wraps(handle)
+    def serialized_call(self, *args, **kwargs):
+        with lock:
+            return handle(self, *args, **kwargs)
+    serialized_call.serialized = True
+    BotocoreStubber.__call__ = serialized_call
+
+
+def import_lambda(module_name: str):
+    """Import Lambdas/<module_name>.py (after start(), so its clients use the stand-in)."""
+    if LAMBDAS_DIR not in sys.path:
+        sys.path.insert(0, LAMBDAS_DIR)
+    return importlib.import_module(module_name)
+
+
+def create_table(dynamodb, name: str, hash_key: str, range_key: str = None, indexes: list = ()):
+    """
+    Create an on-demand table with string keys, plus GSIs given as
+    (index name, hash key, range key or None). Drops an existing table first.
+    """
+    try:
+        dynamodb.Table(name).delete()
+        dynamodb.Table(name).wait_until_not_exists()
+    except dynamodb.meta.client.exceptions.ResourceNotFoundException:
+        pass
+
+    attributes = {hash_key} | ({range_key} if range_key else set())
+    key_schema = [{'AttributeName': hash_key, 'KeyType': 'HASH'}]
+    if range_key:
+        key_schema.append({'AttributeName': range_key, 'KeyType': 'RANGE'})
+    kwargs = {'TableName': name, 'KeySchema': key_schema, 'BillingMode': 'PAY_PER_REQUEST'}
+    if indexes:
+        kwargs['GlobalSecondaryIndexes'] = []
+        for index_name, index_hash, index_range in indexes:
+            attributes |= {index_hash} | ({index_range} if index_range else set())
+            index_schema = [{'AttributeName': index_hash, 'KeyType': 'HASH'}]
+            if index_range:
+                index_schema.append({'AttributeName': index_range, 'KeyType': 'RANGE'})
+            kwargs['GlobalSecondaryIndexes'].append(
+                {'IndexName': index_name, 'KeySchema': index_schema, 'Projection': {'ProjectionType': 'ALL'}}
+            )
+    kwargs['AttributeDefinitions'] = [{'AttributeName': attribute, 'AttributeType': 'S'} for attribute in sorted(attributes)]
+    table = dynamodb.create_table(**kwargs)
+    table.wait_until_exists()
+    return table
+
+
+def delete_tables(dynamodb, names):
+    for name in names:
+        try:
+            dynamodb.Table(name).delete()
+        except dynamodb.meta.client.exceptions.ResourceNotFoundException:
+            pass
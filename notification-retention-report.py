@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Size report for the Notifications retention policy, plus the one-time setup it
+needs.
+
+The report scans the Notifications table once and, per recipient, compares the
+item collection today with what remains once every notification past its
+retention (ExpiresAt, or the policy below for items written before ExpiresAt
+existed) is gone. It prints item counts, estimated bytes and the read capacity
+a full read of one user's notifications costs (eventually consistent query,
+0.5 RCU per 4 KB).
+
+Retention policy (days, matching the writers' defaults):
+    general 90 · achievement 180 · friend_response 30 ·
+    friend_request 30 once answered, kept while pending
+
+Usage:
+    python3 notification-retention-report.py [--top 10]
+    python3 notification-retention-report.py --enable-ttl --backfill-ttl --create-digests-table
+"""
+import argparse
+import math
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import boto3
+from botocore.exceptions import ClientError
+
+RETENTION_DAYS = {
+    'general': 90,
+    'achievement': 180,
+    'friend_response': 30,
+    'friend_request': 30
+}
+
+
+def notification_type(item: dict) -> str:
+    """
+    Return the stored Type, or infer it for items written before Type existed.
+    """
+    if item.get('Type'):
+        return item['Type']
+    text = str(item.get('Text', ''))
+    if text.endswith('wants to be friends.'):
+        return 'friend_request'
+    if text.endswith('your friend request.'):
+        return 'friend_response'
+    if 'achievement' in text:
+        return 'achievement'
+    return 'general'
+
+
+def policy_expiry(item: dict):
+    """
+    Epoch second at which the item expires under the policy, or None to keep it.
+    """
+    if 'ExpiresAt' in item:
+        return int(item['ExpiresAt'])
+    kind = notification_type(item)
+    if kind == 'friend_request' and item.get('Status') == 'pending':
+        return None
+    try:
+        written = datetime.fromisoformat(str(item.get('Timestamp', '')))
+    except ValueError:
+        return None
+    if written.tzinfo is None:
+        written = written.replace(tzinfo=timezone.utc)
+    return int(written.timestamp()) + RETENTION_DAYS[kind] * 86400
+
+
+def item_size(value) -> int:
+    """
+    Rough DynamoDB item size in bytes (names + values, as documented by AWS).
+    """
+    if isinstance(value, dict):
+        return sum(len(name.encode()) + item_size(v) for name, v in value.items()) + 3
+    if isinstance(value, (list, set)):
+        return sum(item_size(v) for v in value) + 3
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, bool) or value is None:
+        return 1
+    if isinstance(value, (int, float, Decimal)):
+        return len(str(value).lstrip('-').replace('.', '')) // 2 + 1
+    return len(str(value).encode())
+
+
+def query_rcus(total_bytes: int) -> float:
+    """RCUs for reading `total_bytes` with an eventually consistent query."""
+    return math.ceil(total_bytes / 4096) * 0.5 if total_bytes else 0.5
+
+
+def percentile(values: list, fraction: float):
+    if not values:
+        return 0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def build_report(table, now: int) -> dict:
+    """
+    Scan the table and return per-user {'items', 'bytes', 'kept_items', 'kept_bytes'}.
+    """
+    users = defaultdict(lambda: {'items': 0, 'bytes': 0, 'kept_items': 0, 'kept_bytes': 0})
+    paginator = table.meta.client.get_paginator('scan')
+    scanned = 0
+    for page in paginator.paginate(TableName=table.name, PaginationConfig={'PageSize': 500}):
+        for item in page.get('Items', []):
+            scanned += 1
+            stats = users[item.get('ToUserId', '?')]
+            size = item_size(item) - 3
+            stats['items'] += 1
+            stats['bytes'] += size
+            expiry = policy_expiry(item)
+            if expiry is None or expiry > now:
+                stats['kept_items'] += 1
+                stats['kept_bytes'] += size
+        print(f"• {scanned} notifications scanned", file=sys.stderr)
+    return users
+
+
+def print_report(users: dict, top: int):
+    if not users:
+        print("No notifications found.")
+        return
+
+    before_items = sum(u['items'] for u in users.values())
+    after_items = sum(u['kept_items'] for u in users.values())
+    before_bytes = sum(u['bytes'] for u in users.values())
+    after_bytes = sum(u['kept_bytes'] for u in users.values())
+    before_rcus = sum(query_rcus(u['bytes']) for u in users.values())
+    after_rcus = sum(query_rcus(u['kept_bytes']) for u in users.values())
+
+    def pct(before, after):
+        return f"{(1 - after / before) * 100:.1f}%" if before else "n/a"
+
+    print(f"\nRecipients: {len(users)}")
+    print(f"{'':24}{'today':>14}{'retained':>14}{'saved':>10}")
+    print(f"{'items':24}{before_items:>14}{after_items:>14}{pct(before_items, after_items):>10}")
+    print(f"{'bytes (est.)':24}{before_bytes:>14}{after_bytes:>14}{pct(before_bytes, after_bytes):>10}")
+    for label, fraction in (('p50', 0.5), ('p95', 0.95), ('max', 1.0)):
+        before = percentile([u['items'] for u in users.values()], fraction)
+        after = percentile([u['kept_items'] for u in users.values()], fraction)
+        print(f"{'items per user, ' + label:24}{before:>14}{after:>14}{pct(before, after):>10}")
+    print(f"{'RCUs, read every user':24}{before_rcus:>14.1f}{after_rcus:>14.1f}{pct(before_rcus, after_rcus):>10}")
+
+    print(f"\nLargest item collections (top {top}):")
+    largest = sorted(users.items(), key=lambda entry: entry[1]['bytes'], reverse=True)[:top]
+    for user_id, stats in largest:
+        print(f"  {user_id:40} {stats['items']:>6} → {stats['kept_items']:<6} items  "
+              f"{query_rcus(stats['bytes']):>6.1f} → {query_rcus(stats['kept_bytes']):<6.1f} RCU")
+
+
+def enable_ttl(client, table_name: str):
+    """
+    Turn on DynamoDB TTL for ExpiresAt (no-op if already enabled).
+    """
+    status = client.describe_time_to_live(TableName=table_name)['TimeToLiveDescription']
+    if status.get('TimeToLiveStatus') in ('ENABLED', 'ENABLING'):
+        print(f"• TTL already {status['TimeToLiveStatus'].lower()} on {table_name}")
+        return
+    client.update_time_to_live(
+        TableName=table_name,
+        TimeToLiveSpecification={'Enabled': True, 'AttributeName': 'ExpiresAt'}
+    )
+    print(f"✓ Enabled TTL on {table_name}.ExpiresAt")
+
+
+def backfill_ttl(table) -> int:
+    """
+    Set Type and ExpiresAt on items written before they existed. Returns the count.
+    """
+    paginator = table.meta.client.get_paginator('scan')
+    updated = 0
+    for page in paginator.paginate(TableName=table.name, PaginationConfig={'PageSize': 500}):
+        for item in page.get('Items', []):
+            if 'ExpiresAt' in item or 'NotifId' not in item:
+                continue
+            expiry = policy_expiry(item)
+            if expiry is None:
+                continue
+            try:
+                table.update_item(
+                    Key={'NotifId': item['NotifId']},
+                    UpdateExpression='SET ExpiresAt = :expires_at, #t = if_not_exists(#t, :type)',
+                    ConditionExpression='attribute_exists(NotifId) AND attribute_not_exists(ExpiresAt)',
+                    ExpressionAttributeNames={'#t': 'Type'},
+                    ExpressionAttributeValues={':expires_at': expiry, ':type': notification_type(item)}
+                )
+                updated += 1
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+        print(f"• {updated} legacy notifications given an ExpiresAt")
+    return updated
+
+
+def create_digests_table(dynamodb, table_name: str):
+    """
+    Create the NotificationDigests table (on-demand billing) if it does not exist yet.
+    """
+    try:
+        table = dynamodb.create_table(
+            TableName=table_name,
+            KeySchema=[{'AttributeName': 'UserId', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': 'UserId', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        print(f"• Creating table {table_name}...")
+        table.wait_until_exists()
+        print(f"✓ Created {table_name}")
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ResourceInUseException':
+            raise
+        print(f"• Table {table_name} already exists")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Notifications retention report and setup.")
+    parser.add_argument('--table', default='Notifications', help='Notifications table name (default: Notifications)')
+    parser.add_argument('--digests-table', default='NotificationDigests',
+                        help='NotificationDigests table name (default: NotificationDigests)')
+    parser.add_argument('--top', type=int, default=10, help='How many of the largest users to list (default: 10)')
+    parser.add_argument('--enable-ttl', action='store_true', help='Enable DynamoDB TTL on ExpiresAt')
+    parser.add_argument('--backfill-ttl', action='store_true', help='Set ExpiresAt on notifications that lack it')
+    parser.add_argument('--create-digests-table', action='store_true', help='Create the NotificationDigests table')
+    args = parser.parse_args()
+
+    dynamodb = boto3.resource('dynamodb')
+    table = dynamodb.Table(args.table)
+    try:
+        if args.create_digests_table:
+            create_digests_table(dynamodb, args.digests_table)
+        if args.enable_ttl:
+            enable_ttl(dynamodb.meta.client, args.table)
+        if args.backfill_ttl:
+            backfill_ttl(table)
+        print_report(build_report(table, int(time.time())), args.top)
+    except ClientError as e:
+        print(f"❌ Failed: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Recompute the per-user counters kept on the Users items and report drift:
+
+  • NumberOfClicks    sum of Links.NumberOfClicks over the user's links
+                      (added by compact_click_shards)
+  • ActiveLinks       the user's links with IsActive true
+                      (new_short_url(s_bulk), delete_link, restore_link)
+  • AchievementCount  the user's UserAchievements items
+                      (process_achievement_events)
+
+Links, UserAchievements and Users are read with parallel scans (--segments
+workers each). With --fix, every drifting user is corrected with a SET that is
+conditional on the counters still holding the values seen by the scan; users
+whose counters moved in the meantime are skipped and reported, so a re-run
+picks them up without clobbering live increments.
+
+The first run also serves as the backfill for users created before the
+counters existed.
+
+Usage:
+    python3 reconcile-user-counters.py [--segments 8] [--top 20] [--fix]
+"""
+import argparse
+import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from botocore.exceptions import ClientError
+
+COUNTERS = ('NumberOfClicks', 'ActiveLinks', 'AchievementCount')
+
+
+def parallel_scan(table, projection: str, segments: int, names: dict = None):
+    """
+    Scan the table with `segments` parallel workers and return all projected items.
+    """
+    def scan_segment(segment):
+        paginator = table.meta.client.get_paginator('scan')
+        kwargs = {'TableName': table.name, 'ProjectionExpression': projection,
+                  'Segment': segment, 'TotalSegments': segments, 'PaginationConfig': {'PageSize': 1000}}
+        if names:
+            kwargs['ExpressionAttributeNames'] = names
+        return [item for page in paginator.paginate(**kwargs) for item in page.get('Items', [])]
+
+    with ThreadPoolExecutor(max_workers=segments) as executor:
+        items = [item for chunk in executor.map(scan_segment, range(segments)) for item in chunk]
+    print(f"• {table.name}: {len(items)} items scanned")
+    return items
+
+
+def expected_counters(links_table, achievements_table, segments: int) -> dict:
+    """
+    Return {UserId: Counter(NumberOfClicks, ActiveLinks, AchievementCount)} from source.
+    """
+    expected = {}
+    for link in parallel_scan(links_table, 'UserId, IsActive, NumberOfClicks', segments):
+        if not link.get('UserId'):
+            continue
+        counters = expected.setdefault(link['UserId'], Counter())
+        counters['NumberOfClicks'] += int(link.get('NumberOfClicks', 0))
+        if link.get('IsActive', True):
+            counters['ActiveLinks'] += 1
+    for achievement in parallel_scan(achievements_table, 'UserId', segments):
+        expected.setdefault(achievement['UserId'], Counter())['AchievementCount'] += 1
+    return expected
+
+
+def find_drift(users: list, expected: dict) -> list:
+    """
+    Return [(user, {counter: (stored, expected)})] for every user whose counters drifted.
+    """
+    drifted = []
+    for user in users:
+        counters = expected.get(user['UserId'], Counter())
+        diff = {
+            name: (user.get(name), counters[name])
+            for name in COUNTERS
+            if user.get(name) is None or int(user[name]) != counters[name]
+        }
+        if diff:
+            drifted.append((user, diff))
+    return drifted
+
+
+def print_report(users: list, drifted: list, top: int):
+    print(f"\nUsers: {len(users)}, drifting: {len(drifted)}")
+    for name in COUNTERS:
+        stored = sum(int(user.get(name) or 0) for user in users)
+        expected = stored + sum(diff[name][1] - int(diff[name][0] or 0) for _, diff in drifted if name in diff)
+        affected = sum(1 for _, diff in drifted if name in diff)
+        print(f"  {name:18} stored {stored:>10}  recomputed {expected:>10}  "
+              f"drift {expected - stored:>+8}  ({affected} users)")
+
+    if drifted:
+        print(f"\nLargest drift (top {top}):")
+        largest = sorted(drifted, key=lambda entry: -sum(abs(b - int(a or 0)) for a, b in entry[1].values()))
+        for user, diff in largest[:top]:
+            details = ', '.join(f"{name} {stored} → {expected}" for name, (stored, expected) in diff.items())
+            print(f"  {user['UserId']:40} {details}")
+
+
+def fix_drift(users_table, drifted: list) -> tuple:
+    """
+    Set the recomputed counters if they have not moved since the scan.
+    Returns (fixed, skipped).
+    """
+    fixed = skipped = 0
+    for user, diff in drifted:
+        names, values, sets, conditions = {}, {}, [], []
+        for index, (name, (stored, expected)) in enumerate(diff.items()):
+            names[f"#c{index}"] = name
+            values[f":v{index}"] = expected
+            sets.append(f"#c{index} = :v{index}")
+            if stored is None:
+                conditions.append(f"attribute_not_exists(#c{index})")
+            else:
+                values[f":s{index}"] = stored
+                conditions.append(f"#c{index} = :s{index}")
+        try:
+            users_table.update_item(
+                Key={'UserId': user['UserId']},
+                UpdateExpression=f"SET {', '.join(sets)}",
+                ConditionExpression=' AND '.join(['attribute_exists(UserId)'] + conditions),
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values
+            )
+            fixed += 1
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            skipped += 1
+    return fixed, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute per-user counters and report drift.")
+    parser.add_argument('--users-table', default='Users', help='Users table name (default: Users)')
+    parser.add_argument('--links-table', default='Links', help='Links table name (default: Links)')
+    parser.add_argument('--achievements-table', default='UserAchievements',
+                        help='UserAchievements table name (default: UserAchievements)')
+    parser.add_argument('--segments', type=int, default=8, help='Parallel scan segments (default: 8)')
+    parser.add_argument('--top', type=int, default=20, help='How many drifting users to list (default: 20)')
+    parser.add_argument('--fix', action='store_true', help='Write the recomputed counters')
+    args = parser.parse_args()
+
+    dynamodb = boto3.resource('dynamodb')
+    users_table = dynamodb.Table(args.users_table)
+    try:
+        expected = expected_counters(dynamodb.Table(args.links_table),
+                                     dynamodb.Table(args.achievements_table), args.segments)
+        users = parallel_scan(users_table, f"UserId, {', '.join(COUNTERS)}", args.segments)
+        drifted = find_drift(users, expected)
+        print_report(users, drifted, args.top)
+        if args.fix and drifted:
+            fixed, skipped = fix_drift(users_table, drifted)
+            print(f"\n✓ Fixed {fixed} user(s); {skipped} changed during the scan, re-run to reconcile them")
+    except ClientError as e:
+        print(f"❌ Reconciliation failed: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"\n✅ Reconciliation complete{' (report only)' if not args.fix else ''}.")
+
+
+if __name__ == '__main__':
+    main()
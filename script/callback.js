@@ -38,20 +38,22 @@ document.addEventListener("DOMContentLoaded", async () => {
     const uuid = payload.sub;
 
     localStorage.setItem("UserId", uuid);
+    // Sent with the session bootstrap, which reads the admin flag from the
+    // token's verified cognito:groups claim instead of asking Cognito.
+    localStorage.setItem("IdToken", idToken);
 
-    // --- Step 2: Check admin status (MODIFIED) ---
-    // This now uses POST with a request body instead of a GET with a query string.
-    console.log(`${API}users/is-user-admin`);
-    const isAdminResp = await fetch(`${API}users/is-user-admin`, {
+    // --- Step 2: Check admin status ---
+    // The session bootstrap endpoint returns the admin flag together with the
+    // rest of the user's status.
+    const bootstrapResp = await fetch(`${API}users/session-bootstrap`, {
       method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
+      headers: { 'Content-Type': 'application/json', 'Authorization': `Bearer ${idToken}` },
       body: JSON.stringify({ UserId: uuid })
     });
 
-    const isAdminBody = await isAdminResp.json();
+    const bootstrapBody = await bootstrapResp.json();
 
-    // The response from the new Lambda is simpler, so we can parse it directly.
-    const isAdmin = isAdminResp.ok && isAdminBody.isAdmin === true;
+    const isAdmin = bootstrapResp.ok && bootstrapBody.isAdmin === true;
     localStorage.setItem("isAdmin", isAdmin);
 
     // --- Step 3: Redirect into the application (no changes here) ---
@@ -131,6 +131,8 @@ function buildNavBar() {
 function signOff() {
   localStorage.removeItem("UserId");
   localStorage.removeItem("isAdmin");
+  localStorage.removeItem("IdToken");
+  sessionStorage.removeItem("sessionBootstrap");
   window.location.href = "index.html";
 }
 
@@ -213,8 +215,8 @@ function renderFriendRequests(requests) {
                 <button class="btn btn-danger btn-sm" title="Reject">✕</button>
             </div>`;
 
-    card.querySelector(".btn-success").onclick = () => respondToRequest(req.NotifId, true, card);
-    card.querySelector(".btn-danger").onclick = () => respondToRequest(req.NotifId, false, card);
+    card.querySelector(".btn-success").onclick = () => respondToRequest(req, true, card);
+    card.querySelector(".btn-danger").onclick = () => respondToRequest(req, false, card);
     container.appendChild(card);
   });
 }
@@ -242,14 +244,20 @@ function renderOtherNotifications(notifications) {
   });
 }
 
-async function respondToRequest(notificationID, accept, cardEl) {
+async function respondToRequest(req, accept, cardEl) {
   try {
     // This fetch call is already using POST with a body, so it's correct.
     const resp = await fetch(`${API}links/respond-friend-request`, {
       // method: "POST",
       method: "PUT",
       headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ notificationID, accept }),
+      body: JSON.stringify({
+        notificationID: req.NotifId,
+        FromUserId: req.FromUserId,
+        ToUserId: req.ToUserId,
+        Timestamp: req.Timestamp,
+        accept
+      }),
     });
     if (!resp.ok) throw new Error("Response not OK");
 
@@ -309,45 +317,58 @@ async function loadFriendsList() {
 async function runUserChecks() {
   if (!currentUserID) return;
 
-  // Check for Unread Notifications
+  // One call for unread notifications, active status and admin flag.
+  // The last response is kept per tab and revalidated with its ETag.
+  let data;
   try {
-    // MODIFIED: Using POST with a body instead of GET with a query string.
-    const resp = await fetch(API + 'notif/check_unread_notifications', {
+    const cached = JSON.parse(sessionStorage.getItem("sessionBootstrap") || "null");
+    const headers = { 'Content-Type': 'application/json' };
+    if (cached && cached.userId === currentUserID) headers['If-None-Match'] = cached.etag;
+    // Lets the bootstrap read the admin flag from the token instead of Cognito
+    const idToken = localStorage.getItem("IdToken");
+    if (idToken) headers['Authorization'] = `Bearer ${idToken}`;
+
+    const resp = await fetch(API + 'users/session-bootstrap', {
       method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
+      headers,
       body: JSON.stringify({ UserId: currentUserID })
     });
-    const data = await resp.json();
-    if (data.hasUnreadNotifications) {
-      const container = document.getElementById('nav-friends-container');
-      if (container && !container.querySelector('.notification-dot')) {
-        container.insertAdjacentHTML('beforeend', '<div class="notification-dot"></div>');
-      }
+    if (resp.status === 304 && cached) {
+      data = cached.data;
+    } else {
+      if (!resp.ok) throw new Error("Session bootstrap failed");
+      data = await resp.json();
+      sessionStorage.setItem("sessionBootstrap", JSON.stringify({
+        userId: currentUserID,
+        etag: resp.headers.get('ETag'),
+        data
+      }));
     }
   } catch (e) {
-    console.error("Failed to check for notifications:", e);
+    console.error("Failed to load session status:", e);
+    return;
   }
 
-  // Check if Account is Active
-  try {
-    // MODIFIED: Using POST with a body instead of GET with a query string.
-    const r = await fetch(API + 'users/is-user-banned', {
-      method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ userId: currentUserID })
-    });
-    const data = await r.json();
-    if (!data.isActive) {
-      Swal.fire({
-        title: "Account Deactivated",
-        text: "Your account is currently inactive. Please contact an administrator.",
-        icon: "warning",
-        allowOutsideClick: false,
-        confirmButtonText: 'Logout'
-      }).then(() => signOff());
+  // Unread Notifications
+  if (data.hasUnreadNotifications) {
+    const container = document.getElementById('nav-friends-container');
+    if (container && !container.querySelector('.notification-dot')) {
+      container.insertAdjacentHTML('beforeend', '<div class="notification-dot"></div>');
     }
-  } catch (e) {
-    console.error("Failed to check user active status:", e);
+  }
+
+  // Admin flag (kept fresh for the next page load)
+  localStorage.setItem("isAdmin", data.isAdmin === true);
+
+  // Account Active
+  if (!data.isActive) {
+    Swal.fire({
+      title: "Account Deactivated",
+      text: "Your account is currently inactive. Please contact an administrator.",
+      icon: "warning",
+      allowOutsideClick: false,
+      confirmButtonText: 'Logout'
+    }).then(() => signOff());
   }
 }
 
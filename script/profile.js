@@ -49,6 +49,9 @@ $(document).ready(async function () {
     // --- Render Links DataTable ---
     // This uses the same logic as before, but now gets the 'links' data from the consolidated API call.
     initializeLinksTable(links, isOwner);
+
+    // Links are paginated by the API; append the remaining pages as they arrive.
+    loadRemainingLinks(profileID, me, data.nextCursor);
   } catch (e) {
     console.error("Failed to load profile:", e);
     // You could show an error message to the user on the page here.
@@ -191,6 +194,37 @@ function initializeLinksTable(links, isOwner) {
   });
 }
 
+/**
+ * Fetches the remaining pages of the profile's links and appends them to the table.
+ * @param {string} profileID - The profile owner's ID.
+ * @param {string} me - The logged-in user's ID.
+ * @param {string|null} cursor - The continuation token returned with the previous page.
+ */
+async function loadRemainingLinks(profileID, me, cursor) {
+  const table = $("#linksTable").DataTable();
+  while (cursor) {
+    try {
+      const resp = await fetch(API + "users/get-user-by-id", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({
+          ProfileOwnerId: profileID,
+          LoggedInUserId: me,
+          cursor: cursor,
+        }),
+      });
+      if (!resp.ok) throw new Error(`Status: ${resp.status}`);
+      const page = await resp.json();
+      table.rows.add(page.links).draw(false);
+      $("#user-items-count").text(`Links created: ${table.rows().count()}`);
+      cursor = page.nextCursor;
+    } catch (e) {
+      console.error("Failed to load more links:", e);
+      return;
+    }
+  }
+}
+
 /**
  * Sets up all the event listeners for the link details modal.
  * @param {boolean} isOwner - Whether the current viewer owns the profile.
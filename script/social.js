@@ -99,30 +99,8 @@ $(document).ready(() => {
         u.picture ||
         "https://placehold.co/80x80/007bff/FFFFFF?text=??"; // Default avatar
 
-      // --- MODIFIED: Correctly calculate linkCount ---
-      // This now handles the Links attribute as a JSON formatted string.
-      let linkCount = 0;
-      if (u.Links && typeof u.Links === "string") {
-        try {
-          // Parse the string into a JavaScript array
-          const parsedLinks = JSON.parse(u.Links);
-          // Make sure the parsed result is actually an array before getting its length
-          if (Array.isArray(parsedLinks)) {
-            linkCount = parsedLinks.length;
-          }
-        } catch (e) {
-          // If the string is not valid JSON, log the error and default to 0.
-          console.error(
-            `Error parsing Links attribute for user ${userId}:`,
-            u.Links,
-            e
-          );
-          linkCount = 0;
-        }
-      } else if (u.linkCount) {
-        // Fallback for mock data that might use 'linkCount' directly
-        linkCount = u.linkCount;
-      }
+      // ActiveLinks is the counter kept on the Users item by the link writers
+      const linkCount = u.ActiveLinks || u.linkCount || 0;
 
       const card = $(`
             <div class="user-card mb-2" data-userid="${userId}">
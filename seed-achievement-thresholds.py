@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+One-shot migration of the link click milestones into the Achievement table.
+
+compact_click_shards used to hard-code which click count awards which
+achievement. It now reads the ClickThreshold attribute of the Achievement rows,
+the same catalog get_user_by_id and process_achievement_events read names from,
+so the rows need their thresholds set. Existing rows are updated in place (the
+other attributes are kept); a missing row is created with a placeholder Name.
+
+Run it before deploying compact_click_shards: until a row has a ClickThreshold,
+no milestone events are queued for it, and compacted links move past it.
+
+Usage:
+    python3 seed-achievement-thresholds.py [--threshold 1=25 --threshold 2=100 ...] [--dry-run]
+"""
+import argparse
+import sys
+
+import boto3
+from botocore.exceptions import ClientError
+
+# The milestones compact_click_shards used to hard-code (AchId -> clicks)
+DEFAULT_THRESHOLDS = {'1': 25, '2': 100, '3': 1000, '4': 10000}
+
+
+def parse_threshold(value: str) -> tuple:
+    """Parse an AchId=clicks argument."""
+    ach_id, _, clicks = value.partition('=')
+    if not ach_id or not clicks.isdigit() or int(clicks) < 1:
+        raise argparse.ArgumentTypeError(f"expected AchId=clicks, got {value!r}")
+    return ach_id, int(clicks)
+
+
+def seed_thresholds(achievements_table, thresholds: dict, dry_run: bool) -> int:
+    """
+    Set ClickThreshold on every given achievement. Returns the number of rows written.
+    """
+    if len(set(thresholds.values())) != len(thresholds):
+        print("❌ Two achievements share a click threshold.", file=sys.stderr)
+        sys.exit(1)
+    written = 0
+    for ach_id, clicks in sorted(thresholds.items(), key=lambda item: item[1]):
+        print(f"• {ach_id}: {clicks} clicks")
+        if not dry_run:
+            achievements_table.update_item(
+                Key={'AchId': ach_id},
+                UpdateExpression='SET ClickThreshold = :clicks, #name = if_not_exists(#name, :name)',
+                ExpressionAttributeNames={'#name': 'Name'},
+                ExpressionAttributeValues={':clicks': clicks, ':name': f"{clicks} clicks"}
+            )
+        written += 1
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Set the click thresholds of link milestone achievements in the Achievement table."
+    )
+    parser.add_argument('--achievements-table', default='Achievement',
+                        help='Achievement table name (default: Achievement)')
+    parser.add_argument('--threshold', type=parse_threshold, action='append', metavar='ACHID=CLICKS',
+                        help='Achievement and the click count that awards it (default: 1=25 2=100 3=1000 4=10000)')
+    parser.add_argument('--dry-run', action='store_true', help='Print the thresholds without writing them')
+    args = parser.parse_args()
+
+    thresholds = dict(args.threshold) if args.threshold else DEFAULT_THRESHOLDS
+    dynamodb = boto3.resource('dynamodb')
+    try:
+        written = seed_thresholds(dynamodb.Table(args.achievements_table), thresholds, args.dry_run)
+    except ClientError as e:
+        print(f"❌ Seeding failed: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"\n✅ Click thresholds set on {written} achievements{' (dry run)' if args.dry_run else ''}.")
+
+
+if __name__ == '__main__':
+    main()
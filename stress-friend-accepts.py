@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress test and latency comparison for respond_to_friend_request.
+
+--senders users each send one friend request (send_friend_request) to the same
+user, who then accepts all of them at once from --workers threads. Two paths
+are run:
+
+  • the old accept: read the notification and both users, parse their Friends
+    JSON strings, append and write both users back (two update_items)
+  • respond_to_friend_request.lambda_handler: one TransactWriteItems adding a
+    UserEdges item per direction, plus the conditional unread decrement
+
+For each path it prints round trips per accept and how many of the friendships
+survived. For the transactional path it also checks that the receiving user
+has one FRIEND# edge per sender, every sender has the reverse edge, every
+Friendships item is accepted, the unread counter is back to zero and a second
+answer to a request gets 409.
+
+Latency is compared separately, one accept at a time over --latency-sample
+fresh requests per path, with --latency-ms of simulated network time added to
+every DynamoDB call (a local stand-in answers in microseconds). Concurrent
+latencies against the in-process mock would only measure its request queue,
+and moto copies its tables for every transaction, so use --endpoint-url with
+DynamoDB Local for latency numbers that reflect the service.
+
+Runs against DynamoDB Local / moto_server (--endpoint-url) or moto in-process.
+
+Usage:
+    python3 stress-friend-accepts.py [--senders 100] [--workers 100] [--latency-sample 20] [--latency-ms 8] [--endpoint-url http://localhost:8000]
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from boto3.dynamodb.conditions import Key
+
+import local_dynamodb
+
+RECEIVER = 'popular-user'
+LATENCY_RECEIVER = 'latency-user'
+TABLES = ['Users', 'Notifications', 'Friendships', 'UserEdges']
+
+
+def legacy_accept(dynamodb, notif_id: str):
+    """The pre-transaction accept: read everything, append to Friends, write both users."""
+    users_table = dynamodb.Table('Users')
+    notif = dynamodb.Table('Notifications').get_item(Key={'NotifId': notif_id})['Item']
+    for user_id, friend_id in ((notif['FromUserId'], notif['ToUserId']), (notif['ToUserId'], notif['FromUserId'])):
+        user = users_table.get_item(Key={'UserId': user_id})['Item']
+        friends = json.loads(user.get('Friends') or '[]')
+        friends.append(friend_id)
+        users_table.update_item(Key={'UserId': user_id}, UpdateExpression='SET Friends = :f',
+                                ExpressionAttributeValues={':f': json.dumps(friends)})
+
+
+def run(accept, notifications: list, workers: int) -> list:
+    """Accept every notification from `workers` threads. Returns per-accept latencies."""
+    def timed_accept(notif):
+        started = time.perf_counter()
+        accept(notif)
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(timed_accept, notifications))
+
+
+def send_requests(send_friend_request, notifications_table, senders: list, receiver: str) -> list:
+    """Send a friend request from each sender to `receiver`. Returns the stored requests."""
+    for sender in senders:
+        response = send_friend_request.lambda_handler(
+            {'body': json.dumps({'FromUserId': sender, 'ToUserId': receiver})}, None)
+        if response['statusCode'] != 200:
+            fail(f"send_friend_request failed for {sender}: {response['body']}")
+    return [item for item in notifications_table.scan()['Items'] if item['ToUserId'] == receiver]
+
+
+def fail(message: str):
+    print(f"❌ {message}", file=sys.stderr)
+    sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent friend-accept stress test.")
+    parser.add_argument('--senders', type=int, default=100, help='Friend requests to accept (default: 100)')
+    parser.add_argument('--workers', type=int, default=100, help='Concurrent accepts (default: 100)')
+    parser.add_argument('--latency-sample', type=int, default=20, help='Sequential accepts timed per path (default: 20)')
+    parser.add_argument('--latency-ms', type=float, default=8, help='Simulated latency per DynamoDB call (default: 8)')
+    parser.add_argument('--endpoint-url', help='DynamoDB Local / moto_server URL (default: moto in-process)')
+    args = parser.parse_args()
+
+    mock = local_dynamodb.start(args.endpoint_url)
+    dynamodb = boto3.resource('dynamodb')
+    try:
+        users_table = local_dynamodb.create_table(dynamodb, 'Users', 'UserId')
+        notifications_table = local_dynamodb.create_table(dynamodb, 'Notifications', 'NotifId')
+        friendships_table = local_dynamodb.create_table(dynamodb, 'Friendships', 'PairId')
+        edges_table = local_dynamodb.create_table(dynamodb, 'UserEdges', 'UserId', 'EdgeKey')
+        send_friend_request = local_dynamodb.import_lambda('send_friend_request')
+        respond = local_dynamodb.import_lambda('respond_to_friend_request')
+
+        calls = Counter()
+        simulated_latency = [0.0]
+
+        def on_call(event_name, **kwargs):
+            calls[event_name.rsplit('.', 1)[-1]] += 1
+            time.sleep(simulated_latency[0])
+        for client in {dynamodb.meta.client, respond.dynamodb.meta.client}:
+            client.meta.events.register('before-call.dynamodb', on_call)
+
+        senders = [f"sender{i:03d}" for i in range(args.senders)]
+        latency_senders = [f"timed{i:03d}" for i in range(2 * args.latency_sample)]
+        with users_table.batch_writer() as batch:
+            for user_id in [RECEIVER, LATENCY_RECEIVER] + senders + latency_senders:
+                batch.put_item(Item={'UserId': user_id, 'Username': user_id, 'IsActive': True, 'Friends': '[]'})
+        requests = send_requests(send_friend_request, notifications_table, senders, RECEIVER)
+        timed_requests = send_requests(send_friend_request, notifications_table, latency_senders, LATENCY_RECEIVER)
+        print(f"• {len(requests)} pending requests to {RECEIVER}")
+
+        def transactional_accept(notif):
+            body = {'NotifId': notif['NotifId'], 'accept': True, 'FromUserId': notif['FromUserId'],
+                    'ToUserId': notif['ToUserId'], 'Timestamp': notif['Timestamp']}
+            response = respond.lambda_handler({'httpMethod': 'POST', 'body': json.dumps(body)}, None)
+            if response['statusCode'] != 200:
+                fail(f"Accepting {notif['NotifId']} returned {response['statusCode']}: {response['body']}")
+
+        paths = (
+            ('read + update both users', lambda notif: legacy_accept(dynamodb, notif['NotifId'])),
+            ('transaction + UserEdges', transactional_accept),
+        )
+
+        print(f"\n{args.workers} concurrent accepts")
+        print(f"{'path':26}{'round trips':>13}{'friends kept':>14}")
+        calls.clear()
+        run(paths[0][1], requests, args.workers)
+        kept = len(json.loads(users_table.get_item(Key={'UserId': RECEIVER})['Item']['Friends']))
+        print(f"{paths[0][0]:26}{sum(calls.values()) / len(requests):>13.1f}{f'{kept}/{len(requests)}':>14}")
+        calls.clear()
+        run(paths[1][1], requests, args.workers)
+        edges = edges_table.query(KeyConditionExpression=Key('UserId').eq(RECEIVER))['Items']
+        kept = len({edge['TargetId'] for edge in edges})
+        print(f"{paths[1][0]:26}{sum(calls.values()) / len(requests):>13.1f}{f'{kept}/{len(requests)}':>14}")
+
+        if kept != len(senders):
+            fail(f"{RECEIVER} has {kept} friend edges, expected {len(senders)}")
+        missing = [sender for sender in senders
+                   if 'Item' not in edges_table.get_item(Key={'UserId': sender, 'EdgeKey': f"FRIEND#{RECEIVER}"})]
+        if missing:
+            fail(f"{len(missing)} sender(s) are missing the reverse edge, e.g. {missing[0]}")
+        statuses = Counter(item['Status'] for item in friendships_table.scan()['Items']
+                           if RECEIVER in (item['UserA'], item['UserB']))
+        if statuses != Counter({'accepted': len(senders)}):
+            fail(f"Friendships statuses are {dict(statuses)}")
+        unread = int(users_table.get_item(Key={'UserId': RECEIVER})['Item'].get('UnreadNotifications', 0))
+        if unread:
+            fail(f"{RECEIVER} still has {unread} unread notification(s)")
+        again = respond.lambda_handler({'httpMethod': 'POST', 'body': json.dumps({
+            'NotifId': requests[0]['NotifId'], 'accept': False, 'FromUserId': requests[0]['FromUserId'],
+            'ToUserId': RECEIVER, 'Timestamp': requests[0]['Timestamp']})}, None)
+        if again['statusCode'] != 409:
+            fail(f"A second answer returned {again['statusCode']}, expected 409")
+        print(f"\n✓ All {len(senders)} concurrent accepts kept both edges, unread count is 0, "
+              f"a repeated answer gets 409")
+
+        print(f"\nSequential latency ({args.latency_ms:g} ms simulated per DynamoDB call)")
+        print(f"{'path':26}{'median ms':>13}{'p95 ms':>10}")
+        simulated_latency[0] = args.latency_ms / 1000
+        for (name, accept), sample in zip(paths, (timed_requests[::2], timed_requests[1::2])):
+            latencies = sorted(run(accept, sample, 1))
+            print(f"{name:26}{statistics.median(latencies) * 1000:>13.1f}"
+                  f"{latencies[int(0.95 * (len(latencies) - 1))] * 1000:>10.1f}")
+    finally:
+        local_dynamodb.delete_tables(dynamodb, TABLES)
+        if mock:
+            mock.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Shared helpers for the offline Lambda tests: AWS settings that keep boto3 from
+looking for real credentials, the Lambdas directory on sys.path, and a locally
+generated RSA key for signing Cognito-style ID tokens.
+"""
+import base64
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+
+import pytest
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'test')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'test')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Lambdas'))
+
+USER_POOL_ID = 'us-east-1_TestPool1'
+CLIENT_ID = 'test-client-id'
+KID = 'test-key'
+USER_ID = '4488d498-20e1-70d5-3ad2-fa9eb8f64af1'
+
+# DER prefix of a PKCS#1 v1.5 DigestInfo for SHA-256
+SHA256_DIGEST_INFO_PREFIX = bytes.fromhex('3031300d060960864801650304020105000420')
+
+
+def _is_probable_prime(n, rng, rounds=40):
+    if n < 2:
+        return False
+    for p in (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37):
+        if n % p == 0:
+            return n == p
+    d, r = n - 1, 0
+    while d % 2 == 0:
+        d, r = d // 2, r + 1
+    for _ in range(rounds):
+        x = pow(rng.randrange(2, n - 1), d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(r - 1):
+            x = pow(x, 2, n)
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _random_prime(bits, rng):
+    while True:
+        candidate = rng.getrandbits(bits) | (1 << (bits - 1)) | 1
+        if _is_probable_prime(candidate, rng):
+            return candidate
+
+
+@pytest.fixture(scope='session')
+def rsa_key():
+    """A 1024-bit RSA key as (n, e, d); small, but the verification path is the same."""
+    rng = random.Random(2024)
+    e = 65537
+    while True:
+        p, q = _random_prime(512, rng), _random_prime(512, rng)
+        phi = (p - 1) * (q - 1)
+        if p != q and phi % e:
+            return p * q, e, pow(e, -1, phi)
+
+
+def b64url(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def make_token(rsa_key, header=None, **claims):
+    """Sign an RS256 JWT with the test key. Claims default to a valid ID token."""
+    n, _, d = rsa_key
+    header = {'alg': 'RS256', 'kid': KID, **(header or {})}
+    payload = {
+        'sub': USER_ID,
+        'iss': f"https://cognito-idp.us-east-1.amazonaws.com/{USER_POOL_ID}",
+        'aud': CLIENT_ID,
+        'token_use': 'id',
+        'exp': int(time.time()) + 3600,
+        'cognito:groups': ['Admins'],
+        **claims
+    }
+    signing_input = f"{b64url(json.dumps(header).encode())}.{b64url(json.dumps(payload).encode())}"
+    key_length = (n.bit_length() + 7) // 8
+    digest_info = SHA256_DIGEST_INFO_PREFIX + hashlib.sha256(signing_input.encode()).digest()
+    padded = b'\x00\x01' + b'\xff' * (key_length - len(digest_info) - 3) + b'\x00' + digest_info
+    signature = pow(int.from_bytes(padded, 'big'), d, n).to_bytes(key_length, 'big')
+    return f"{signing_input}.{b64url(signature)}"
@@ -0,0 +1,120 @@
+"""
+Offline tests for Lambdas/get_session_bootstrap.py: name resolution from the
+function's environment prefix, and the page-load path with a valid ID token
+(one Users get_item, no Cognito or CloudFormation calls, 304 on a matching ETag).
+
+    python3 -m pytest tests/
+"""
+import json
+import time
+
+import pytest
+from botocore.stub import Stubber
+
+import get_session_bootstrap
+from conftest import CLIENT_ID, KID, USER_ID, USER_POOL_ID, make_token
+
+PROJECTION = 'UserId, IsActive, Username, FullName, Picture, UnreadNotifications'
+USER_ITEM = {
+    'UserId': {'S': USER_ID}, 'IsActive': {'BOOL': True}, 'Username': {'S': 'jdoe'},
+    'FullName': {'S': 'J Doe'}, 'UnreadNotifications': {'N': '3'}
+}
+
+
+class FakeContext:
+    function_name = 'test-get-session-bootstrap'
+
+
+@pytest.fixture
+def stubbed_aws(monkeypatch):
+    """Fail the test on any Cognito, CloudFormation or DynamoDB call not queued."""
+    stubbers = {
+        'cognito': Stubber(get_session_bootstrap.cognito_client),
+        'cloudformation': Stubber(get_session_bootstrap.cloudformation_client),
+        'dynamodb': Stubber(get_session_bootstrap.dynamodb.meta.client),
+    }
+    for stubber in stubbers.values():
+        stubber.activate()
+    monkeypatch.delenv('USER_POOL_ID', raising=False)
+    monkeypatch.delenv('USERS_TABLE_NAME', raising=False)
+    monkeypatch.setattr(get_session_bootstrap, '_config', {'user_pool_id': None, 'users_table_name': None})
+    monkeypatch.setattr(get_session_bootstrap, '_admin_cache', {})
+    yield stubbers
+    for stubber in stubbers.values():
+        stubber.assert_no_pending_responses()
+        stubber.deactivate()
+
+
+@pytest.fixture
+def signed_in(rsa_key, stubbed_aws, monkeypatch):
+    """A resolved pool and client ID, with the test key as the pool's JWKS."""
+    n, e, _ = rsa_key
+    monkeypatch.setenv('USER_POOL_ID', USER_POOL_ID)
+    monkeypatch.setattr(get_session_bootstrap, 'USER_POOL_CLIENT_ID', CLIENT_ID)
+    monkeypatch.setattr(get_session_bootstrap, '_jwks', {'keys': {KID: (n, e)}, 'fetched_at': time.monotonic()})
+    return stubbed_aws
+
+
+def _expect_user_read(stubber, table_name='test-get-session-Users'):
+    # The resource layer deserializes the response in place, so queue a copy
+    stubber.add_response('get_item', {'Item': dict(USER_ITEM)},
+                         {'TableName': table_name, 'Key': {'UserId': USER_ID}, 'ProjectionExpression': PROJECTION})
+
+
+def _event(rsa_key, etag=None, **claims):
+    headers = {'Authorization': f"Bearer {make_token(rsa_key, **claims)}"}
+    if etag:
+        headers['If-None-Match'] = etag
+    return {'httpMethod': 'POST', 'headers': headers, 'body': json.dumps({'UserId': USER_ID})}
+
+
+def test_token_page_load_is_one_users_read(rsa_key, signed_in):
+    _expect_user_read(signed_in['dynamodb'])
+
+    response = get_session_bootstrap.lambda_handler(_event(rsa_key), FakeContext())
+    assert response['statusCode'] == 200
+    body = json.loads(response['body'])
+    assert body['isAdmin'] is True
+    assert body['unreadCount'] == 3
+    assert body['profile']['Username'] == 'jdoe'
+
+
+def test_matching_etag_returns_304(rsa_key, signed_in):
+    _expect_user_read(signed_in['dynamodb'])
+    _expect_user_read(signed_in['dynamodb'])
+
+    etag = get_session_bootstrap.lambda_handler(_event(rsa_key), FakeContext())['headers']['ETag']
+    response = get_session_bootstrap.lambda_handler(_event(rsa_key, etag=etag), FakeContext())
+    assert response['statusCode'] == 304
+    assert response['body'] == ''
+
+
+def test_table_name_override(rsa_key, signed_in, monkeypatch):
+    monkeypatch.setenv('USERS_TABLE_NAME', 'CustomUsers')
+    _expect_user_read(signed_in['dynamodb'], 'CustomUsers')
+
+    assert get_session_bootstrap.lambda_handler(_event(rsa_key), FakeContext())['statusCode'] == 200
+
+
+def test_pool_resolved_from_stack_and_cached(stubbed_aws):
+    stubbed_aws['cloudformation'].add_response('describe_stacks', {'Stacks': [{
+        'StackName': 'test-get-session-shortly-cognito', 'CreationTime': '2025-01-01T00:00:00Z',
+        'StackStatus': 'CREATE_COMPLETE',
+        'Outputs': [{'OutputKey': 'AuthUserPoolP6ytmUserPoolId', 'OutputValue': USER_POOL_ID}]
+    }]}, {'StackName': 'test-get-session-shortly-cognito'})
+
+    expected = (USER_POOL_ID, 'test-get-session-Users')
+    assert get_session_bootstrap._resolve_config(FakeContext()) == expected
+    # Cached: no second describe_stacks
+    assert get_session_bootstrap._resolve_config(FakeContext()) == expected
+
+
+def test_unresolved_pool_is_not_cached_and_not_admin(rsa_key, stubbed_aws):
+    stubbed_aws['cloudformation'].add_client_error(
+        'describe_stacks', 'ValidationError', expected_params={'StackName': 'test-get-session-shortly-cognito'})
+    _expect_user_read(stubbed_aws['dynamodb'])
+
+    response = get_session_bootstrap.lambda_handler(_event(rsa_key), FakeContext())
+    assert response['statusCode'] == 200
+    assert json.loads(response['body'])['isAdmin'] is False
+    assert get_session_bootstrap._config['user_pool_id'] is None
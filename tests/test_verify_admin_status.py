@@ -0,0 +1,151 @@
+"""
+Offline tests for the ID-token check in Lambdas/verify_admin_status.py.
+
+Tokens are signed with the RSA key generated in conftest.py, so no network or
+AWS account is needed: the JWKS lookup is replaced by the test key and the
+boto3 clients are wrapped in Stubbers that fail on any unexpected call.
+
+    python3 -m pytest tests/
+"""
+import base64
+import json
+import time
+
+import pytest
+from botocore.stub import Stubber
+
+import verify_admin_status
+from conftest import CLIENT_ID, KID, USER_ID, USER_POOL_ID, b64url, make_token
+
+
+@pytest.fixture
+def get_key(rsa_key):
+    n, e, _ = rsa_key
+    return lambda kid: (n, e) if kid == KID else None
+
+
+@pytest.fixture
+def stubbed_aws(monkeypatch):
+    """Fail the test on any Cognito, CloudFormation or DynamoDB call."""
+    stubbers = [
+        Stubber(verify_admin_status.cognito_client),
+        Stubber(verify_admin_status.cloudformation_client),
+        Stubber(verify_admin_status.dynamodb_resource.meta.client),
+    ]
+    for stubber in stubbers:
+        stubber.activate()
+    monkeypatch.setattr(verify_admin_status, '_config', {'user_pool_id': None, 'users_table_name': None, 'client_id': None})
+    monkeypatch.setattr(verify_admin_status, '_admin_cache', {})
+    yield stubbers
+    for stubber in stubbers:
+        stubber.assert_no_pending_responses()
+        stubber.deactivate()
+
+
+class FakeContext:
+    function_name = 'test-verify-admin-status'
+
+
+def test_valid_token_returns_claims(rsa_key, get_key):
+    claims = verify_admin_status.verify_id_token(make_token(rsa_key), USER_POOL_ID, CLIENT_ID, get_key)
+    assert claims['sub'] == USER_ID
+    assert claims['cognito:groups'] == ['Admins']
+
+
+def test_expired_token_is_rejected(rsa_key, get_key):
+    token = make_token(rsa_key, exp=int(time.time()) - 1)
+    assert verify_admin_status.verify_id_token(token, USER_POOL_ID, CLIENT_ID, get_key) is None
+
+
+def test_wrong_issuer_is_rejected(rsa_key, get_key):
+    token = make_token(rsa_key, iss='https://cognito-idp.us-east-1.amazonaws.com/us-east-1_OtherPool')
+    assert verify_admin_status.verify_id_token(token, USER_POOL_ID, CLIENT_ID, get_key) is None
+
+
+def test_wrong_audience_is_rejected(rsa_key, get_key):
+    token = make_token(rsa_key, aud='some-other-client')
+    assert verify_admin_status.verify_id_token(token, USER_POOL_ID, CLIENT_ID, get_key) is None
+
+
+def test_no_configured_client_id_rejects_every_token(rsa_key, get_key):
+    assert verify_admin_status.verify_id_token(make_token(rsa_key), USER_POOL_ID, None, get_key) is None
+
+
+def test_access_token_is_rejected(rsa_key, get_key):
+    token = make_token(rsa_key, token_use='access')
+    assert verify_admin_status.verify_id_token(token, USER_POOL_ID, CLIENT_ID, get_key) is None
+
+
+def test_tampered_payload_is_rejected(rsa_key, get_key):
+    header, _, signature = make_token(rsa_key, **{'cognito:groups': []}).split('.')
+    _, payload, _ = make_token(rsa_key).split('.')
+    assert verify_admin_status.verify_id_token(f"{header}.{payload}.{signature}", USER_POOL_ID, CLIENT_ID, get_key) is None
+
+
+def test_tampered_signature_is_rejected(rsa_key, get_key):
+    header, payload, signature = make_token(rsa_key).split('.')
+    flipped = bytearray(base64.urlsafe_b64decode(signature + '=' * (-len(signature) % 4)))
+    flipped[-1] ^= 1
+    token = f"{header}.{payload}.{b64url(bytes(flipped))}"
+    assert verify_admin_status.verify_id_token(token, USER_POOL_ID, CLIENT_ID, get_key) is None
+
+
+@pytest.mark.parametrize('header', [{'alg': 'none'}, {'alg': 'HS256'}, {'kid': 'unknown-key'}])
+def test_unsupported_algorithm_or_unknown_key_is_rejected(rsa_key, get_key, header):
+    token = make_token(rsa_key, header=header)
+    assert verify_admin_status.verify_id_token(token, USER_POOL_ID, CLIENT_ID, get_key) is None
+
+
+@pytest.mark.parametrize('token', ['', 'not-a-jwt', 'a.b.c', None])
+def test_malformed_token_is_rejected(get_key, token):
+    assert verify_admin_status.verify_id_token(token, USER_POOL_ID, CLIENT_ID, get_key) is None
+
+
+def test_handler_answers_from_token_without_aws_calls(rsa_key, stubbed_aws, monkeypatch):
+    n, e, _ = rsa_key
+    monkeypatch.setenv('USER_POOL_ID', USER_POOL_ID)
+    monkeypatch.setenv('USER_POOL_CLIENT_ID', CLIENT_ID)
+    monkeypatch.setattr(verify_admin_status, '_jwks', {'keys': {KID: (n, e)}, 'fetched_at': time.monotonic()})
+
+    for groups, expected in ((['Admins'], True), ([], False)):
+        verify_admin_status._admin_cache.clear()
+        event = {
+            'headers': {'Authorization': f"Bearer {make_token(rsa_key, **{'cognito:groups': groups})}"},
+            'body': json.dumps({'UserId': USER_ID})
+        }
+        response = verify_admin_status.lambda_handler(event, FakeContext())
+        assert response['statusCode'] == 200
+        assert json.loads(response['body'])['isAdmin'] is expected
+
+
+def test_token_for_another_user_is_not_trusted(rsa_key, stubbed_aws, monkeypatch):
+    n, e, _ = rsa_key
+    monkeypatch.setenv('USER_POOL_ID', USER_POOL_ID)
+    monkeypatch.setenv('USER_POOL_CLIENT_ID', CLIENT_ID)
+    monkeypatch.setattr(verify_admin_status, '_jwks', {'keys': {KID: (n, e)}, 'fetched_at': time.monotonic()})
+    _, _, dynamodb_stubber = stubbed_aws
+    dynamodb_stubber.add_response('get_item', {}, {'TableName': 'Users', 'Key': {'UserId': 'someone-else'}})
+
+    event = {'headers': {'Authorization': f"Bearer {make_token(rsa_key)}"},
+             'body': json.dumps({'UserId': 'someone-else'})}
+    response = verify_admin_status.lambda_handler(event, None)
+    assert json.loads(response['body'])['isAdmin'] is False
+
+
+def test_fallback_user_pool_is_not_cached(stubbed_aws, monkeypatch):
+    monkeypatch.delenv('USER_POOL_ID', raising=False)
+    _, cloudformation_stubber, _ = stubbed_aws
+    cloudformation_stubber.add_client_error('describe_stacks', 'ValidationError', expected_params={'StackName': 'test-verify-admin-shortly-cognito'})
+    cloudformation_stubber.add_response('describe_stacks', {'Stacks': [{
+        'StackName': 'test-verify-admin-shortly-cognito', 'CreationTime': '2025-01-01T00:00:00Z',
+        'StackStatus': 'CREATE_COMPLETE',
+        'Outputs': [{'OutputKey': 'AuthUserPoolP6ytmUserPoolId', 'OutputValue': USER_POOL_ID}]
+    }]}, {'StackName': 'test-verify-admin-shortly-cognito'})
+
+    user_pool_id, users_table_name, _ = verify_admin_status.resolve_config(FakeContext())
+    assert user_pool_id == verify_admin_status.FALLBACK_USER_POOL_ID
+    assert users_table_name == 'test-verify-admin-Users'
+
+    assert verify_admin_status.resolve_config(FakeContext())[0] == USER_POOL_ID
+    # Resolved from the stack: cached, no third describe_stacks
+    assert verify_admin_status.resolve_config(FakeContext())[0] == USER_POOL_ID